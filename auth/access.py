@@ -0,0 +1,195 @@
+import argparse
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from db.connection import get_connection
+
+# Remote access control.
+# Each machine (by MAC address) must be "allowed" by the Google Apps Script access sheet before
+# anyone can log in on it. An "allowed" verdict is remembered in access_cache for ACCESS_TTL_HOURS,
+# so repeat logins on the same machine do not wait for the network; "denied" is never cached.
+# CLUBBOT_ACCESS_URL points the check at another server (e.g. `python -m auth.access --stub`).
+
+# REPLACE THIS WITH YOUR DEPLOYED GOOGLE APPS SCRIPT WEB APP URL
+# Example: "https://script.google.com/macros/s/YOUR_DEPLOYMENT_ID/exec"
+GOOGLE_APPS_SCRIPT_URL = "https://script.google.com/macros/s/AKfycbzlZsY44p-P7BQyTkgOEg_Yd9Oly5t5SHTihOMIdFT6WM7CxnKTs6dipqLzI2bPlZTL/exec"
+ACCESS_URL = os.environ.get("CLUBBOT_ACCESS_URL") or GOOGLE_APPS_SCRIPT_URL
+ACCESS_TTL_HOURS = float(os.environ.get("CLUBBOT_ACCESS_TTL_HOURS") or 24)  # 0 disables the cache
+ACCESS_TIMEOUT_SECONDS = 10
+
+ALLOWED = "allowed"
+DENIED = "denied"
+UNREACHABLE = "unreachable"  # Network error, timeout or an answer we do not understand
+
+AccessResult = namedtuple("AccessResult", ["verdict", "message", "cached"])
+
+
+def get_mac_address():
+    """Retrieves the MAC address of the current machine."""
+    # Using uuid.getnode() which is cross-platform.
+    # Format it as XX:XX:XX:XX:XX:XX
+    mac_num = uuid.getnode()
+    mac_hex = ':'.join(f"{(mac_num >> i) & 0xff:02x}" for i in range(40, -1, -8))
+    return mac_hex
+
+
+# --- Cache ---
+def ensure_access_cache_schema(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS access_cache (
+            mac TEXT PRIMARY KEY,
+            verdict TEXT NOT NULL,
+            username TEXT,
+            checked_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        );
+    """)
+    conn.commit()
+
+
+def cached_allowed(conn, mac, now=None):
+    """True when `mac` was allowed by the server and that verdict has not expired yet."""
+    row = conn.execute("SELECT verdict, expires_at FROM access_cache WHERE mac = ?", (mac,)).fetchone()
+    return row is not None and row[0] == ALLOWED and row[1] > (now or time.time())
+
+
+def remember_allowed(conn, mac, username, ttl_hours=ACCESS_TTL_HOURS, now=None):
+    now = now or time.time()
+    with conn:
+        conn.execute("""
+            INSERT INTO access_cache (mac, verdict, username, checked_at, expires_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(mac) DO UPDATE SET verdict = excluded.verdict, username = excluded.username,
+                checked_at = excluded.checked_at, expires_at = excluded.expires_at
+        """, (mac, ALLOWED, username, now, now + ttl_hours * 3600))
+
+
+def forget_access(conn, mac=None):
+    """Drops the cached verdict of `mac` (of every machine when None), forcing a network check."""
+    with conn:
+        if mac is None:
+            conn.execute("DELETE FROM access_cache")
+        else:
+            conn.execute("DELETE FROM access_cache WHERE mac = ?", (mac,))
+
+
+# --- Remote check ---
+def check_remote_access(mac, username, url=ACCESS_URL, timeout=ACCESS_TIMEOUT_SECONDS):
+    """
+    Asks the access server about `mac`. The Apps Script answers 'allowed' or 'denied' and also
+    logs the attempt, so the username is sent along.
+    """
+    if not url or url == "YOUR_GOOGLE_APPS_SCRIPT_WEB_APP_URL_HERE":
+        print("WARNING: GOOGLE_APPS_SCRIPT_URL is not set. Remote access control is disabled.")
+        return AccessResult(ALLOWED, "Google Apps Script URL not configured. Access check skipped.", False)
+
+    query = urllib.parse.urlencode({"action": "check", "mac": mac, "username": username})
+    try:
+        with urllib.request.urlopen(f"{url}?{query}", timeout=timeout) as response:
+            result = response.read().decode("utf-8", errors="replace").strip().lower()
+    except TimeoutError:
+        return AccessResult(UNREACHABLE, "Access timed out. Please check your network.", False)
+    except urllib.error.URLError as e:
+        if isinstance(e.reason, TimeoutError):
+            return AccessResult(UNREACHABLE, "Access timed out. Please check your network.", False)
+        return AccessResult(UNREACHABLE, f"Error connecting to access server: {e}", False)
+    except OSError as e:
+        return AccessResult(UNREACHABLE, f"Error connecting to access server: {e}", False)
+
+    print(f"GAS response for MAC check ({mac}): {result}")
+    if result == ALLOWED:
+        return AccessResult(ALLOWED, "", False)
+    if result == DENIED:
+        return AccessResult(DENIED, "Configuration error Code:Access. Please contact developer.", False)
+    return AccessResult(UNREACHABLE, f"Unknown response from access server: {result}", False)
+
+
+def check_access(conn, mac, username, url=ACCESS_URL, ttl_hours=ACCESS_TTL_HOURS, timeout=ACCESS_TIMEOUT_SECONDS):
+    """Cached verdict when there is a fresh one, else the server's (an "allowed" answer is cached)."""
+    if ttl_hours > 0 and cached_allowed(conn, mac):
+        return AccessResult(ALLOWED, "", True)
+    result = check_remote_access(mac, username, url, timeout)
+    if result.verdict == ALLOWED and ttl_hours > 0:
+        remember_allowed(conn, mac, username, ttl_hours)
+    elif result.verdict == DENIED:
+        forget_access(conn, mac)
+    return result
+
+
+class AccessStub:
+    """
+    Local HTTP stand-in for the Apps Script: answers `verdict` ("allowed", "denied" or anything
+    else) after `latency` seconds, and counts the checks it received.
+    """
+
+    def __init__(self, port=0, verdict=ALLOWED, latency=0.0):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                stub.requests.append({key: values[0] for key, values in query.items()})
+                if stub.latency:
+                    time.sleep(stub.latency)
+                reply = stub.verdict.encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(reply)))
+                self.end_headers()
+                self.wfile.write(reply)
+
+            def log_message(self, *args):
+                pass
+
+        self.verdict = verdict
+        self.latency = latency
+        self.requests = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/exec"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# === MAIN ===
+if __name__ == "__main__":
+    # Run from the project root: python -m auth.access
+    parser = argparse.ArgumentParser(description="Check this machine's access, or serve a local stand-in")
+    parser.add_argument("--user", default="admin", help="Username sent with the check")
+    parser.add_argument("--url", default=ACCESS_URL)
+    parser.add_argument("--forget", action="store_true", help="Clear the cached verdict of this machine first")
+    parser.add_argument("--stub", choices=[ALLOWED, DENIED], help="Serve a local access server answering this")
+    parser.add_argument("--port", type=int, default=8765, help="Port of --stub")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds --stub waits before answering")
+    args = parser.parse_args()
+
+    if args.stub:
+        with AccessStub(args.port, args.stub, args.latency) as stub:
+            print(f"🌐 Access stand-in answering '{args.stub}' at {stub.url}")
+            print(f"   Start the app with CLUBBOT_ACCESS_URL={stub.url}  (Ctrl+C to stop)")
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                pass
+    else:
+        conn = get_connection()
+        mac = get_mac_address()
+        if args.forget:
+            forget_access(conn, mac)
+        start = time.perf_counter()
+        result = check_access(conn, mac, args.user, args.url)
+        source = "cache" if result.cached else "server"
+        print(f"{'✅' if result.verdict == ALLOWED else '❌'} {mac}: {result.verdict} "
+              f"({source}, {(time.perf_counter() - start) * 1000:.0f} ms) {result.message}")
@@ -0,0 +1,232 @@
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import statistics
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from db.connection import get_connection
+from db.indexes import ensure_meta_table
+
+# Password hashing for the users table.
+# Hashes are salted and memory-hard (scrypt), or PBKDF2-SHA256 where this Python's OpenSSL has no
+# scrypt, and carry their own parameters:
+#
+#   scrypt$16384$8$1$<salt>$<hash>
+#   pbkdf2_sha256$600000$<salt>$<hash>
+#
+# Hashes written before this module (unsalted SHA-256 hex) still verify and are replaced on the
+# next successful login, as are hashes made with other cost parameters than the current ones.
+# The cost is tuned per machine with:  python -m auth.passwords --benchmark --target-ms 250 --save
+
+SCRYPT_AVAILABLE = hasattr(hashlib, "scrypt")
+SALT_BYTES = 16
+HASH_BYTES = 32
+MAX_SCRYPT_MEMORY = 256 * 1024 * 1024  # Upper bound the benchmark may pick (128 * n * r bytes)
+
+HashParams = namedtuple("HashParams", ["algorithm", "n", "r", "p", "iterations"], defaults=(None, None, None, None))
+
+SCRYPT_DEFAULT = HashParams("scrypt", n=2 ** 14, r=8, p=1)
+PBKDF2_DEFAULT = HashParams("pbkdf2_sha256", iterations=600000)
+DEFAULT_PARAMS = SCRYPT_DEFAULT if SCRYPT_AVAILABLE else PBKDF2_DEFAULT
+PARAMS_KEY = "password_hash_params"  # schema_meta key of the tuned parameters
+
+VERIFIED_CACHE_SIZE = 32
+
+AuthResult = namedtuple("AuthResult", ["user", "message"])  # user: (id, username, role) or None
+
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii")
+
+
+def _derive(password, salt, params):
+    if params.algorithm == "scrypt":
+        return hashlib.scrypt(password.encode(), salt=salt, n=params.n, r=params.r, p=params.p,
+                              maxmem=2 * 128 * params.n * params.r + 1024 * 1024, dklen=HASH_BYTES)
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, params.iterations, dklen=HASH_BYTES)
+
+
+def hash_password(password, params=DEFAULT_PARAMS):
+    salt = os.urandom(SALT_BYTES)
+    digest = _b64(_derive(password, salt, params))
+    if params.algorithm == "scrypt":
+        return f"scrypt${params.n}${params.r}${params.p}${_b64(salt)}${digest}"
+    return f"pbkdf2_sha256${params.iterations}${_b64(salt)}${digest}"
+
+
+def is_legacy_hash(stored):
+    return len(stored) == 64 and "$" not in stored
+
+
+def parse_hash(stored):
+    """Returns (HashParams, salt, digest) of a stored hash; (None, None, digest) for legacy SHA-256."""
+    if is_legacy_hash(stored):
+        return None, None, stored
+    parts = stored.split("$")
+    if parts[0] == "scrypt" and len(parts) == 6:
+        params = HashParams("scrypt", n=int(parts[1]), r=int(parts[2]), p=int(parts[3]))
+    elif parts[0] == "pbkdf2_sha256" and len(parts) == 4:
+        params = HashParams("pbkdf2_sha256", iterations=int(parts[1]))
+    else:
+        raise ValueError(f"Unrecognised password hash format: {parts[0]!r}")
+    return params, base64.b64decode(parts[-2]), base64.b64decode(parts[-1])
+
+
+# Successful verifications of this process, keyed by an HMAC (with a per-process random key) of the
+# stored hash and the password, so logging in again in the same session skips the derivation.
+_verified = OrderedDict()
+_verified_lock = threading.Lock()
+_verified_key = os.urandom(32)
+
+
+def _verified_token(password, stored):
+    return hmac.new(_verified_key, f"{stored}\0{password}".encode(), hashlib.sha256).digest()
+
+
+def _remember_verified(password, stored):
+    with _verified_lock:
+        _verified[_verified_token(password, stored)] = True
+        if len(_verified) > VERIFIED_CACHE_SIZE:
+            _verified.popitem(last=False)
+
+
+def verify_password(password, stored):
+    token = _verified_token(password, stored)
+    with _verified_lock:
+        if token in _verified:
+            _verified.move_to_end(token)
+            return True
+
+    params, salt, digest = parse_hash(stored)
+    if params is None:
+        ok = hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), digest)
+    elif params.algorithm == "scrypt" and not SCRYPT_AVAILABLE:
+        print("❌ This password was hashed with scrypt, which this Python build does not provide.")
+        return False
+    else:
+        ok = hmac.compare_digest(_derive(password, salt, params), digest)
+
+    if ok:
+        _remember_verified(password, stored)
+    return ok
+
+
+def needs_rehash(stored, params=DEFAULT_PARAMS):
+    """True for legacy hashes and hashes made with other parameters than `params`."""
+    return parse_hash(stored)[0] != params
+
+
+# --- Tuned parameters (stored in schema_meta) ---
+def load_hash_params(conn):
+    ensure_meta_table(conn)
+    row = conn.execute("SELECT value FROM schema_meta WHERE key = ?", (PARAMS_KEY,)).fetchone()
+    if row is None:
+        return DEFAULT_PARAMS
+    params = HashParams(**json.loads(row[0]))
+    if params.algorithm == "scrypt" and not SCRYPT_AVAILABLE:
+        return PBKDF2_DEFAULT
+    return params
+
+
+def save_hash_params(conn, params):
+    ensure_meta_table(conn)
+    with conn:
+        conn.execute("""
+            INSERT INTO schema_meta (key, value) VALUES (?, ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        """, (PARAMS_KEY, json.dumps(params._asdict())))
+
+
+# --- Login ---
+_DUMMY_HASH = None
+
+
+def authenticate(conn, username, password):
+    """
+    Checks `password` for `username` and upgrades the stored hash when it is legacy or uses old
+    cost parameters. Slow by design (one key derivation, two on upgrade): call it off the GUI thread.
+    """
+    global _DUMMY_HASH
+    row = conn.execute("SELECT id, username, password_hash, role, status FROM users WHERE username = ?",
+                       (username,)).fetchone()
+    params = load_hash_params(conn)
+    if row is None:
+        # Same work as a real check, so response time does not reveal which usernames exist
+        _DUMMY_HASH = _DUMMY_HASH or hash_password("", params)
+        verify_password(password, _DUMMY_HASH)
+        return AuthResult(None, "Invalid username or password.")
+
+    user_id, db_username, stored_hash, role, status = row
+    if status == 'inactive':
+        return AuthResult(None, "Account is inactive. Please contact admin.")
+    if not verify_password(password, stored_hash):
+        return AuthResult(None, "Invalid username or password.")
+    if needs_rehash(stored_hash, params):
+        new_hash = hash_password(password, params)
+        with conn:
+            conn.execute("UPDATE users SET password_hash = ? WHERE id = ?", (new_hash, user_id))
+        _remember_verified(password, new_hash)
+        print(f"✅ Upgraded the password hash of '{db_username}' to {params.algorithm}.")
+    return AuthResult((user_id, db_username, role), "")
+
+
+# --- Benchmark ---
+def time_verification(params, rounds=3):
+    """Median milliseconds to verify a password hashed with `params`."""
+    stored = hash_password("benchmark-password", params)
+    _, salt, _ = parse_hash(stored)
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        _derive("benchmark-password", salt, params)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def pick_params(target_ms, algorithm=None):
+    """Strongest parameters of `algorithm` whose verification stays within `target_ms` on this machine."""
+    algorithm = algorithm or DEFAULT_PARAMS.algorithm
+    if algorithm == "scrypt":
+        best, n = None, 2 ** 12
+        while 128 * n * 8 <= MAX_SCRYPT_MEMORY:
+            params = HashParams("scrypt", n=n, r=8, p=1)
+            elapsed = time_verification(params)
+            print(f"   scrypt n=2^{n.bit_length() - 1:<3} {elapsed:8.1f} ms  ({128 * n * 8 // 2 ** 20} MiB)")
+            if elapsed > target_ms:
+                break
+            best, n = params, n * 2
+        return best or HashParams("scrypt", n=2 ** 12, r=8, p=1)
+
+    probe = HashParams("pbkdf2_sha256", iterations=100000)
+    elapsed = time_verification(probe)
+    iterations = max(100000, int(probe.iterations * target_ms / elapsed) // 10000 * 10000)
+    print(f"   pbkdf2 100000 iterations {elapsed:.1f} ms -> {iterations} iterations")
+    return HashParams("pbkdf2_sha256", iterations=iterations)
+
+
+# === MAIN ===
+if __name__ == "__main__":
+    # Run from the project root: python -m auth.passwords --benchmark
+    parser = argparse.ArgumentParser(description="Tune password hashing cost for this machine")
+    parser.add_argument("--benchmark", action="store_true", help="Time verification at increasing cost")
+    parser.add_argument("--target-ms", type=float, default=250, help="Longest acceptable verification time")
+    parser.add_argument("--algorithm", choices=["scrypt", "pbkdf2_sha256"], default=DEFAULT_PARAMS.algorithm)
+    parser.add_argument("--save", action="store_true", help="Use the picked parameters for new hashes")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    current = load_hash_params(conn)
+    print(f"📋 Current parameters: {dict((k, v) for k, v in current._asdict().items() if v is not None)} "
+          f"({time_verification(current):.0f} ms per verification)")
+    if args.benchmark:
+        picked = pick_params(args.target_ms, args.algorithm)
+        print(f"✅ Picked {dict((k, v) for k, v in picked._asdict().items() if v is not None)} "
+              f"for a {args.target_ms:.0f} ms target ({time_verification(picked):.0f} ms)")
+        if args.save:
+            save_hash_params(conn, picked)
+            print("💾 Saved; existing passwords are rehashed on their next login.")
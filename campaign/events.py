@@ -0,0 +1,76 @@
+import json
+import threading
+import time
+
+# Sender -> GUI protocol.
+# With --events the sender process writes one JSON object per line on stdout instead of free text.
+# Every item event names the campaign item it is about, so the GUI never has to guess which contact
+# a line belongs to. Anything else the process prints is wrapped in a "log" event.
+# The other way round the GUI writes "stop" on the sender's stdin to end a run early.
+
+EVENT_STARTED = "started"    # items, workers, transport
+EVENT_ITEM = "item"          # id, number, status, attempts, worker, latency_ms, error_class, error
+EVENT_LOG = "log"            # message
+EVENT_FINISHED = "finished"  # sent, failed, elapsed_ms, status (db.campaigns CAMPAIGN_*)
+
+
+class EventWriter:
+    """Writes events as newline-delimited JSON; safe to call from the sender's worker threads."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        line = json.dumps({"event": event, "ts": round(time.time(), 3), **fields})
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def item(self, item, status, worker_index):
+        self.emit(
+            EVENT_ITEM,
+            id=item.index,
+            number=item.number,
+            status=status,
+            attempts=item.attempts,
+            worker=worker_index + 1,
+            latency_ms=int(item.latency * 1000) if item.latency is not None else None,
+            error_class=item.error_class if status != "Sent" else None,
+            error=item.error if status != "Sent" else None,
+        )
+
+
+class LogStream:
+    """
+    File-like stand-in for sys.stdout that turns every printed line into a "log" event,
+    so stray prints (ours or a library's) can never break the event stream.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self._local = threading.local()  # Each thread assembles its own line
+
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", "") + text
+        *lines, self._local.buffer = buffer.split("\n")
+        for line in lines:
+            if line.strip():
+                self.writer.emit(EVENT_LOG, message=line)
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def parse_event(line):
+    """Decodes one line of sender output; anything that is not an event becomes a "log" event."""
+    line = line.strip()
+    if line.startswith("{"):
+        try:
+            event = json.loads(line)
+            if isinstance(event, dict) and "event" in event:
+                return event
+        except ValueError:
+            pass
+    return {"event": EVENT_LOG, "message": line}
@@ -0,0 +1,162 @@
+import argparse
+import random
+from collections import namedtuple
+
+from campaign.templates import compile_template, first_name, TemplateError
+
+# Campaign planning: decides which message each selected contact gets.
+# Messages a contact already received, and the contact fields used by the message templates,
+# are looked up for all contacts in one set-based query each (temp table join) instead of one
+# query per contact. The joins are CROSS JOINs so SQLite always walks the (statistics-less) temp
+# table and looks the contacts up by key, instead of scanning the big table.
+
+MODE_SAME = "same"  # First selected message the contact has not had yet
+MODE_RANDOM = "random"  # Random pick among the messages the contact has not had yet
+
+PlanItem = namedtuple("PlanItem", ["contact_id", "number", "name", "message_id", "text"])
+
+
+def fill_plan_contacts(conn, contact_ids):
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS plan_contacts (contact_id INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM temp.plan_contacts")
+    conn.executemany("INSERT OR IGNORE INTO temp.plan_contacts (contact_id) VALUES (?)",
+                     [(cid,) for cid in contact_ids])
+
+
+def load_contact_fields(conn, contact_ids, fields):
+    """Returns {contact_id: {field: value}} for the given contacts, in one query."""
+    fill_plan_contacts(conn, contact_ids)
+    columns = ", ".join(f"c.{field}" for field in fields)
+    rows = conn.execute(f"""
+        SELECT c.rowid, {columns}
+        FROM temp.plan_contacts p
+        CROSS JOIN contacts c ON c.rowid = p.contact_id
+    """).fetchall()
+    conn.execute("DELETE FROM temp.plan_contacts")
+    conn.commit()
+    return {row[0]: dict(zip(fields, row[1:])) for row in rows}
+
+
+def load_sent_pairs(conn, contact_ids, message_ids):
+    """Returns {contact_id: {message_id, ...}} for the given contacts and messages, in one query."""
+    fill_plan_contacts(conn, contact_ids)
+    qmarks = ",".join("?" * len(message_ids))
+    rows = conn.execute(f"""
+        SELECT l.contact_id, l.message_id
+        FROM temp.plan_contacts p
+        CROSS JOIN contact_message_log l ON l.contact_id = p.contact_id
+        WHERE l.message_id IN ({qmarks})
+    """, list(message_ids)).fetchall()
+    conn.execute("DELETE FROM temp.plan_contacts")
+    conn.commit()
+
+    sent = {}
+    for contact_id, message_id in rows:
+        sent.setdefault(contact_id, set()).add(message_id)
+    return sent
+
+
+class CampaignPlan:
+    """The resolved recipient list: one PlanItem per contact with a WhatsApp number."""
+
+    def __init__(self, items, message_ids, mode, invalid_messages=None):
+        self.items = items
+        self.message_ids = message_ids
+        self.mode = mode
+        self.invalid_messages = invalid_messages or {}  # Message id -> template error, left out of the plan
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def counts_by_message(self):
+        counts = {mid: 0 for mid in self.message_ids}
+        for item in self.items:
+            counts[item.message_id] += 1
+        return counts
+
+    @classmethod
+    def build(cls, conn, contacts, message_ids, mode=MODE_SAME, rng=None):
+        """
+        contacts: iterable of rows starting with (rowid, name, whatsapp, ...).
+        message_ids: selected message ids, in the order they should be preferred.
+        """
+        rng = rng or random
+        message_ids = list(message_ids)
+        qmarks = ",".join("?" * len(message_ids))
+        id_to_message = dict(conn.execute(
+            f"SELECT id, content FROM messages WHERE id IN ({qmarks})", message_ids).fetchall())
+        message_ids = [mid for mid in message_ids if mid in id_to_message]
+        if not message_ids:
+            return cls([], [], mode)
+
+        # Each message is compiled once; contact fields the templates use are loaded in one query.
+        # A message whose template does not compile is left out rather than failing the campaign.
+        templates = {}
+        invalid = {}
+        for mid in message_ids:
+            try:
+                templates[mid] = compile_template(id_to_message[mid])
+            except TemplateError as e:
+                invalid[mid] = str(e)
+        message_ids = [mid for mid in message_ids if mid in templates]
+        if not message_ids:
+            raise ValueError("None of the selected messages has a valid template: " +
+                             "; ".join(f"message {mid}: {error}" for mid, error in invalid.items()))
+        fields = sorted(set().union(*(t.fields for t in templates.values())) - {"name", "whatsapp"})
+
+        recipients = [c for c in contacts if c[2]]  # Contacts without a number cannot be messaged
+        recipient_ids = [c[0] for c in recipients]
+        sent = load_sent_pairs(conn, recipient_ids, message_ids)
+        extra = load_contact_fields(conn, recipient_ids, fields) if fields else {}
+
+        items = []
+        for contact in recipients:
+            contact_id, name, number = contact[0], contact[1], contact[2]
+            already_sent = sent.get(contact_id, ())
+            available_ids = [mid for mid in message_ids if mid not in already_sent] or message_ids
+            chosen_id = rng.choice(available_ids) if mode == MODE_RANDOM else available_ids[0]
+            values = {"name": name, "whatsapp": number}
+            values.update(extra.get(contact_id, ()))
+            items.append(PlanItem(contact_id, number, first_name(name), chosen_id,
+                                  templates[chosen_id].render(values, rng)))
+        return cls(items, message_ids, mode, invalid)
+
+
+def load_contacts(conn, group=None):
+    """All contacts, or the members of a group given by id or name, as (rowid, name, whatsapp)."""
+    if group is None:
+        return conn.execute("SELECT rowid, name, whatsapp FROM contacts").fetchall()
+    row = conn.execute("SELECT id FROM groups WHERE id = ? OR name = ?", (group, group)).fetchone()
+    if not row:
+        raise ValueError(f"Group not found: {group}")
+    return conn.execute("""
+        SELECT c.rowid, c.name, c.whatsapp
+        FROM contact_group_map m
+        JOIN contacts c ON c.rowid = m.contact_id
+        WHERE m.group_id = ?
+    """, (row[0],)).fetchall()
+
+
+# === MAIN ===
+if __name__ == "__main__":
+    from db.connection import get_connection
+
+    parser = argparse.ArgumentParser(description="Preview a campaign plan without sending anything")
+    parser.add_argument("--messages", type=int, nargs="+", required=True, help="Message ids to send")
+    parser.add_argument("--group", help="Group id or name (default: all contacts)")
+    parser.add_argument("--mode", choices=[MODE_SAME, MODE_RANDOM], default=MODE_SAME)
+    parser.add_argument("--show", type=int, default=10, help="Number of planned messages to print")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    plan = CampaignPlan.build(conn, load_contacts(conn, args.group), args.messages, args.mode)
+    for message_id, error in plan.invalid_messages.items():
+        print(f"⚠️ Message {message_id} left out, its template is invalid: {error}")
+    print(f"📋 {len(plan)} recipients planned")
+    for message_id, count in plan.counts_by_message().items():
+        print(f"   message {message_id}: {count}")
+    for item in plan.items[:args.show]:
+        print(f"➡️ {item.number}: {item.text[:60]}")
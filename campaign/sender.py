@@ -0,0 +1,289 @@
+import argparse
+import queue
+import random
+import threading
+import time
+
+from campaign.transports import FakeGateway, TRANSPORTS, transport_factory
+
+# Concurrent campaign sender.
+# The campaign is shared between N workers through one work queue. Each worker has its own
+# transport (for WhatsApp Web: its own Chrome profile), waits its own random delay between messages,
+# and all of them together respect a global messages-per-minute cap. A failed item goes back on
+# the queue and is picked up by a different worker until it runs out of attempts.
+# Aborting the pool (the sender got SIGTERM) drops the queued items and waits a bounded time for
+# the sends already under way, so their results are still reported before the caller shuts down.
+
+DEFAULT_MAX_ATTEMPTS = 2
+ABORT_TIMEOUT = 10  # Seconds an aborted pool waits for the sends already under way
+
+
+class RateLimiter:
+    """Per-worker pause: a random delay between min_delay and max_delay seconds after each send."""
+
+    def __init__(self, min_delay, max_delay):
+        self.min_delay = min_delay
+        self.max_delay = max(min_delay, max_delay)
+
+    def wait(self):
+        delay = random.uniform(self.min_delay, self.max_delay)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class GlobalRateCap:
+    """Token bucket shared by all workers: at most `per_minute` sends per minute (None = no cap)."""
+
+    def __init__(self, per_minute=None):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class WorkItem:
+    def __init__(self, index, number, message):
+        self.index = index
+        self.number = number
+        self.message = message
+        self.attempts = 0
+        self.failed_workers = set()
+        self.error = None
+        self.error_class = None
+        self.latency = None  # Seconds taken by the last send attempt
+
+
+class SenderPool:
+    """
+    Sends work items through `workers` transports created by transport_factory(worker_index)
+    (see campaign/transports.py).
+    on_result(item, status, worker_index) is called from worker threads with status "Sent" or
+    "Failed" once per item (after its last attempt). Setting the `abort` event drops the items not
+    being sent yet; they get no result.
+    """
+
+    def __init__(self, transport_factory, workers=1, min_delay=1, max_delay=3, max_per_minute=None,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, on_result=None, abort=None, abort_timeout=ABORT_TIMEOUT):
+        self.transport_factory = transport_factory
+        self.workers = max(1, workers)
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.rate_cap = GlobalRateCap(max_per_minute)
+        self.max_attempts = max_attempts
+        self.on_result = on_result or (lambda item, status, worker_index: None)
+        self.abort = abort or threading.Event()
+        self.abort_timeout = abort_timeout
+        self.dropped = []  # Items dropped by an abort, never sent
+        self._queue = queue.Queue()
+        self._live_workers = 0
+        self._starting_workers = 0
+        self._lock = threading.Lock()
+        self._taken = threading.Condition()  # Signalled whenever a worker takes an item off the queue
+        self._outstanding = 0  # Items handed to run() that have no result and were not dropped
+        self._settled = threading.Condition()  # Signalled whenever _outstanding goes down
+
+    def _settle(self):
+        with self._settled:
+            self._outstanding -= 1
+            self._settled.notify_all()
+
+    def _finish(self, item, status, worker_index):
+        self.on_result(item, status, worker_index)
+        self._settle()
+        self._queue.task_done()
+
+    def _drop(self, item):
+        with self._lock:
+            self.dropped.append(item)
+        self._settle()
+        self._queue.task_done()
+
+    def _worker(self, worker_index):
+        transport = self.transport_factory(worker_index)
+        limiter = RateLimiter(self.min_delay, self.max_delay)
+        try:
+            transport.open()
+        except Exception as e:
+            print(f"⚠️ Worker {worker_index + 1} could not open its {transport.name} transport: {e}")
+            transport = None
+
+        with self._lock:
+            self._starting_workers -= 1
+            if transport:
+                self._live_workers += 1
+
+        while True:
+            item = self._queue.get()
+            with self._taken:
+                self._taken.notify()
+            if item is None:
+                self._queue.task_done()
+                break
+            if self.abort.is_set():
+                self._drop(item)
+                continue
+
+            if transport is None:
+                # This worker has no browser; hand the item to the others (or fail it if none are left)
+                with self._lock:
+                    others = self._live_workers + self._starting_workers
+                if others:
+                    self._queue.put(item)
+                    self._queue.task_done()
+                    time.sleep(0.05)
+                else:
+                    if item.error is None:
+                        item.error = "no working sender transport"
+                        item.error_class = "NoTransport"
+                    self._finish(item, "Failed", worker_index)
+                continue
+
+            with self._lock:
+                live = self._live_workers
+            if worker_index in item.failed_workers and len(item.failed_workers) < live:
+                # Retry on a different worker than the one(s) that already failed it
+                self._queue.put(item)
+                self._queue.task_done()
+                time.sleep(0.05)
+                continue
+
+            self.rate_cap.acquire()
+            if self.abort.is_set():
+                self._drop(item)
+                continue
+            item.attempts += 1
+            started = time.perf_counter()
+            try:
+                transport.send(item.number, item.message)
+            except Exception as e:
+                item.latency = time.perf_counter() - started
+                item.error = str(e)
+                item.error_class = type(e).__name__
+                item.failed_workers.add(worker_index)
+                if item.attempts < self.max_attempts:
+                    self._queue.put(item)
+                    self._queue.task_done()
+                else:
+                    self._finish(item, "Failed", worker_index)
+                continue
+
+            item.latency = time.perf_counter() - started
+            self._finish(item, "Sent", worker_index)
+            limiter.wait()
+
+        if transport:
+            with self._lock:
+                self._live_workers -= 1
+            try:
+                transport.close()
+            except Exception:
+                pass
+
+    def run(self, items):
+        """
+        Sends all items and returns when every item has been sent or has failed for good, or, once
+        aborted, when the sends under way have finished or `abort_timeout` has passed.
+        `items` may be a generator (e.g. items claimed from the database); it is consumed only
+        as fast as the workers need new work.
+        """
+        self._starting_workers = self.workers
+        threads = [threading.Thread(target=self._worker, args=(i,), daemon=True) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        backlog = self.workers * 2
+        for item in items:
+            with self._taken:
+                while self._queue.qsize() >= backlog and not self.abort.is_set():
+                    self._taken.wait(0.1)
+            if self.abort.is_set():
+                # Keep consuming, so a generator can end (and clean up) on its own
+                with self._lock:
+                    self.dropped.append(item)
+                continue
+            with self._settled:
+                self._outstanding += 1
+            self._queue.put(item)
+
+        deadline = None
+        with self._settled:
+            while self._outstanding:
+                if self.abort.is_set():
+                    if deadline is None:
+                        print(f"⏹️ Aborted: waiting up to {self.abort_timeout}s for the messages being sent...")
+                        deadline = time.monotonic() + self.abort_timeout
+                    if time.monotonic() >= deadline:
+                        break
+                self._settled.wait(0.1)
+        if deadline is not None:
+            # Workers still busy sending never took these off the queue
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._drop(item)
+        unsettled = self._outstanding
+
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()) if deadline is not None else None)
+        if unsettled:
+            print(f"⚠️ {unsettled} message(s) were still being sent when the pool gave up waiting; "
+                  f"they stay in flight")
+
+def benchmark(worker_counts, count, transport="fake", latency=0.05, failure_rate=0.0, gateway_url=None):
+    """
+    Throughput of the pool without WhatsApp: the fake transport in-process, or the HTTP gateway
+    transport against `gateway_url` (a local FakeGateway is started when no URL is given).
+    """
+    def run(factory, workers):
+        results = {"Sent": 0, "Failed": 0}
+        lock = threading.Lock()
+
+        def on_result(item, status, worker_index):
+            with lock:
+                results[status] += 1
+
+        pool = SenderPool(factory, workers=workers, min_delay=0, max_delay=0, on_result=on_result)
+        items = [WorkItem(i, f"44{i:08d}", "benchmark") for i in range(count)]
+        start = time.perf_counter()
+        pool.run(items)
+        elapsed = time.perf_counter() - start
+        print(f"transport={transport:<6} workers={workers:<3} sent={results['Sent']:<6} "
+              f"failed={results['Failed']:<5} time={elapsed:.2f}s throughput={count / elapsed:.1f} msg/s")
+
+    for workers in worker_counts:
+        if transport == "fake":
+            run(transport_factory("fake", latency=latency, failure_rate=failure_rate), workers)
+        elif transport == "http" and gateway_url:
+            run(transport_factory("http", url=gateway_url), workers)
+        elif transport == "http":
+            with FakeGateway(latency=latency, failure_rate=failure_rate) as gateway:
+                run(transport_factory("http", url=gateway.url), workers)
+        else:
+            raise SystemExit(f"Benchmarking the '{transport}' transport is not supported.")
+
+
+# === MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the sender pool without WhatsApp")
+    parser.add_argument("--transport", choices=[name for name in TRANSPORTS if name != "selenium"], default="fake")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per simulated send")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--gateway-url", help="Existing gateway for --transport http")
+    args = parser.parse_args()
+    benchmark(args.workers, args.count, args.transport, args.latency, args.failure_rate, args.gateway_url)
@@ -0,0 +1,184 @@
+import argparse
+import random
+import re
+import time
+
+from db.contacts import CONTACT_FIELDS
+
+# Message templates.
+# A message is compiled once into a list of literal strings and small render functions, then
+# rendered for every contact of a campaign without re-scanning the text.
+#
+#   {name} {last_club} {birthday} {rating} ...  any contacts column
+#   {first_name}, {Name}                        first word of the name ({Name} is the original syntax)
+#   {last_club|the club}                        default when the field is empty
+#   {Hi|Hello|Hey}                              spintax: one option picked at random per message
+#   {if rating}...{else}...{end}                conditional on a field being non-empty ({else} optional)
+#   {{ and }}                                   literal braces
+#   {Hi there}                                  any other braces that are not a field: kept as written
+
+FIRST_NAME_FIELDS = ("first_name", "Name")
+TEMPLATE_FIELDS = list(CONTACT_FIELDS) + list(FIRST_NAME_FIELDS)
+
+TAG_PATTERN = re.compile(r"\{\{|\}\}|\{([^{}]*)\}")
+
+
+class TemplateError(ValueError):
+    pass
+
+
+def first_name(full_name):
+    return full_name.split()[0] if full_name else ""
+
+
+def field_value(contact, field):
+    """Text of one field of `contact` (a dict of contact columns); empty string when unset."""
+    if field in FIRST_NAME_FIELDS:
+        return first_name(contact.get("name"))
+    value = contact.get(field)
+    return "" if value is None else str(value)
+
+
+def source_field(field):
+    """The contacts column a template field is read from."""
+    return "name" if field in FIRST_NAME_FIELDS else field
+
+
+class Template:
+    def __init__(self, source, parts, fields, literal_tags=()):
+        self.source = source
+        self.parts = parts  # str, or callable(contact, rng) -> str
+        self.fields = fields  # contacts columns the template reads
+        self.literal_tags = list(literal_tags)  # Braced text that is no field, sent as written (maybe a typo)
+        self.static = all(isinstance(part, str) for part in parts)
+        self._text = "".join(parts) if self.static else None
+
+    def render(self, contact, rng=random):
+        if self.static:
+            return self._text
+        return "".join([part if part.__class__ is str else part(contact, rng) for part in self.parts])
+
+    def render_many(self, contacts, rng=random):
+        if self.static:
+            return [self._text] * len(contacts)
+        render = self.render
+        return [render(contact, rng) for contact in contacts]
+
+
+def _field_part(field, default=""):
+    def render(contact, rng):
+        return field_value(contact, field) or default
+    return render
+
+
+def _spin_part(options):
+    def render(contact, rng):
+        return rng.choice(options)
+    return render
+
+
+def _if_part(field, then_parts, else_parts):
+    def render(contact, rng):
+        parts = then_parts if field_value(contact, field) else else_parts
+        return "".join([part if part.__class__ is str else part(contact, rng) for part in parts])
+    return render
+
+
+def _merge_text(parts):
+    """Joins adjacent literal strings so rendering touches as few parts as possible."""
+    merged = []
+    for part in parts:
+        if isinstance(part, str):
+            if not part:
+                continue
+            if merged and isinstance(merged[-1], str):
+                merged[-1] += part
+                continue
+        merged.append(part)
+    return merged
+
+
+def compile_template(source):
+    """
+    Parses `source` into a Template; raises TemplateError for an unknown field in {if ...} or
+    unbalanced blocks. Any other braced text that is not a field is kept as literal text.
+    """
+    fields = set()
+    literal_tags = []
+    # Stack of [parts, else_parts or None, field] for open {if} blocks; the bottom entry is the template
+    stack = [[[], None, None]]
+
+    def current():
+        block = stack[-1]
+        return block[1] if block[1] is not None else block[0]
+
+    position = 0
+    for match in TAG_PATTERN.finditer(source):
+        current().append(source[position:match.start()])
+        position = match.end()
+        token = match.group(0)
+        if token in ("{{", "}}"):
+            current().append(token[0])
+            continue
+
+        tag = match.group(1).strip()
+        if tag.startswith("if "):
+            field = tag[3:].strip()
+            if field not in TEMPLATE_FIELDS:
+                raise TemplateError(f"Unknown field in {{{tag}}}: '{field}'")
+            fields.add(source_field(field))
+            stack.append([[], None, field])
+        elif tag == "else":
+            if len(stack) == 1 or stack[-1][1] is not None:
+                raise TemplateError("{else} without a matching {if ...}")
+            stack[-1][1] = []
+        elif tag == "end":
+            if len(stack) == 1:
+                raise TemplateError("{end} without a matching {if ...}")
+            then_parts, else_parts, field = stack.pop()
+            current().append(_if_part(field, _merge_text(then_parts), _merge_text(else_parts or [])))
+        elif "|" in tag:
+            head, rest = tag.split("|", 1)
+            if head.strip() in TEMPLATE_FIELDS:
+                fields.add(source_field(head.strip()))
+                current().append(_field_part(head.strip(), rest))
+            else:
+                current().append(_spin_part(tag.split("|")))
+        elif tag in TEMPLATE_FIELDS:
+            fields.add(source_field(tag))
+            current().append(_field_part(tag))
+        else:
+            literal_tags.append(token)
+            current().append(token)
+    current().append(source[position:])
+
+    if len(stack) > 1:
+        raise TemplateError(f"{{if {stack[-1][2]}}} is missing its {{end}}")
+    return Template(source, _merge_text(stack[0][0]), fields, literal_tags)
+
+
+def validate_template(source):
+    """Returns None if `source` compiles, else the error message."""
+    try:
+        compile_template(source)
+    except TemplateError as e:
+        return str(e)
+    return None
+
+
+# === MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check a message template and time rendering it")
+    parser.add_argument("template")
+    parser.add_argument("--count", type=int, default=100000, help="Contacts to render for")
+    args = parser.parse_args()
+
+    template = compile_template(args.template)
+    contacts = [{"name": f"Guest {i}", "whatsapp": f"44{i:08d}", "last_club": "Tabu" if i % 2 else None,
+                 "rating": i % 10, "birthday": "1990-01-01"} for i in range(args.count)]
+    start = time.perf_counter()
+    texts = template.render_many(contacts)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Fields used: {', '.join(sorted(template.fields)) or '-'}")
+    print(f"➡️ {texts[0]}")
+    print(f"⏱️ Rendered {len(texts)} messages in {elapsed:.3f}s")
@@ -0,0 +1,202 @@
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Message transports used by the sender pool.
+# Every transport has the same three calls: open() once per worker, send(number, text) per
+# message (raising on failure), close() at the end. The campaign picks one by name.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHROMEDRIVER_PATH = os.path.join(BASE_DIR, "chromedriver.exe")
+WHATSAPP_URL = "https://web.whatsapp.com"
+INPUT_XPATH = "//div[@contenteditable='true' and @role='textbox' and contains(@aria-label, 'Type a message')]"
+DEFAULT_GATEWAY_URL = "http://127.0.0.1:5000"
+
+
+def profile_dir(worker_index):
+    """Chrome profile of a worker: profile1 (the original single profile), profile2, ..."""
+    return os.path.join(BASE_DIR, f"profile{worker_index + 1}")
+
+
+def chrome_options(profile_path):
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument(f"--user-data-dir={profile_path}")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-gpu")
+    return options
+
+
+class Transport:
+    """Base class; one instance per sender worker."""
+
+    name = None
+
+    def __init__(self, worker_index=0):
+        self.worker_index = worker_index
+
+    def open(self):
+        pass
+
+    def send(self, number, text):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SeleniumTransport(Transport):
+    """WhatsApp Web in Chrome, driven through Selenium, with the worker's own profile."""
+
+    name = "selenium"
+
+    def __init__(self, worker_index=0, load_wait=10):
+        super().__init__(worker_index)
+        self.load_wait = load_wait
+        self.driver = None
+
+    def open(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+
+        self.driver = webdriver.Chrome(service=Service(CHROMEDRIVER_PATH),
+                                       options=chrome_options(profile_dir(self.worker_index)))
+        self.driver.get(WHATSAPP_URL)
+        time.sleep(self.load_wait)
+
+    def send(self, number, text):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.common.keys import Keys
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
+        try:
+            self.driver.get(f"{WHATSAPP_URL}/send?phone={number}&text=")
+            WebDriverWait(self.driver, 30).until(EC.presence_of_element_located((By.XPATH, INPUT_XPATH)))
+            msg_box = self.driver.find_element(By.XPATH, INPUT_XPATH)
+            msg_box.click()
+            time.sleep(1)
+
+            # Send line by line with SHIFT+ENTER for formatting
+            lines = text.strip().split("\n")
+            for i, line in enumerate(lines):
+                msg_box.send_keys(line)
+                if i < len(lines) - 1:
+                    msg_box.send_keys(Keys.SHIFT + Keys.ENTER)
+            msg_box.send_keys(Keys.ENTER)
+        except Exception:
+            try:
+                self.driver.save_screenshot(os.path.join(BASE_DIR, f"error_{number}.png"))
+            except Exception:
+                pass
+            raise
+
+    def close(self):
+        if self.driver:
+            self.driver.quit()
+            self.driver = None
+
+
+class HttpGatewayTransport(Transport):
+    """POSTs {"number", "message"} to a gateway's /send-message endpoint (e.g. the local Flask sender)."""
+
+    name = "http"
+
+    def __init__(self, worker_index=0, url=DEFAULT_GATEWAY_URL, timeout=60):
+        super().__init__(worker_index)
+        self.url = url.rstrip("/") + "/send-message"
+        self.timeout = timeout
+        self.session = None
+
+    def open(self):
+        import requests
+
+        self.session = requests.Session()  # Keep-alive connection per worker
+
+    def send(self, number, text):
+        response = self.session.post(self.url, json={"number": number, "message": text}, timeout=self.timeout)
+        if response.status_code != 200:
+            raise RuntimeError(f"gateway returned {response.status_code}: {response.text[:200]}")
+
+    def close(self):
+        if self.session:
+            self.session.close()
+            self.session = None
+
+
+class FakeTransport(Transport):
+    """In-memory transport for load tests: waits `latency` seconds per send and fails at `failure_rate`."""
+
+    name = "fake"
+
+    def __init__(self, worker_index=0, latency=0.0, failure_rate=0.0):
+        super().__init__(worker_index)
+        self.latency = float(latency)
+        self.failure_rate = float(failure_rate)
+        self.sent = 0
+
+    def send(self, number, text):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise RuntimeError(f"fake failure for {number}")
+        self.sent += 1
+
+
+TRANSPORTS = {cls.name: cls for cls in (SeleniumTransport, HttpGatewayTransport, FakeTransport)}
+
+
+def transport_factory(name="selenium", **options):
+    """Returns factory(worker_index) -> Transport for the transport registered under `name`."""
+    if name not in TRANSPORTS:
+        raise ValueError(f"Unknown transport '{name}'. Choose one of: {', '.join(TRANSPORTS)}")
+    cls = TRANSPORTS[name]
+    return lambda worker_index: cls(worker_index, **options)
+
+
+class FakeGateway:
+    """
+    Local HTTP stand-in for the /send-message gateway, for benchmarking HttpGatewayTransport.
+    Answers 200 after `latency` seconds, or 500 at `failure_rate`.
+    """
+
+    def __init__(self, port=0, latency=0.0, failure_rate=0.0):
+        gateway = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                json.loads(body or b"{}")
+                if gateway.latency:
+                    time.sleep(gateway.latency)
+                failed = gateway.failure_rate and random.random() < gateway.failure_rate
+                reply = b"failed" if failed else b"ok"
+                self.send_response(500 if failed else 200)
+                self.send_header("Content-Length", str(len(reply)))
+                self.end_headers()
+                self.wfile.write(reply)
+
+            def log_message(self, *args):
+                pass
+
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -1,23 +1,15 @@
 import sqlite3
-import hashlib
 import os
 import sys
 
-# Assume db/clubbot.db relative to this script for simplicity,
-# if this script is in the root ClubBotPy directory.
-# Adjust db_path if this script is placed elsewhere.
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "db", "clubbot.db")
-
-def hash_password(password):
-    """Hashes a password using SHA256."""
-    return hashlib.sha256(password.encode()).hexdigest()
+from auth.passwords import hash_password, load_hash_params
+from db.connection import DB_PATH, get_connection
 
 def create_admin_user(username, password):
     """Creates an admin user in the database."""
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         cursor = conn.cursor()
 
         # Check if the users table exists (it should after init_db_schema.py runs)
@@ -27,7 +19,7 @@ def create_admin_user(username, password):
             print("Please ensure the database schema is initialized by running 'python main.py' first.")
             return False
 
-        hashed_password = hash_password(password)
+        hashed_password = hash_password(password, load_hash_params(conn))
 
         # Check if username already exists
         cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
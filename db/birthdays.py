@@ -0,0 +1,213 @@
+import argparse
+import calendar
+import re
+from datetime import date, timedelta
+
+from db.connection import get_connection
+
+# Birthday calendar index.
+# `contacts.birthday` is free text. `contacts.birthday_md` holds the same birthday as
+# month * 100 + day (e.g. 1225), indexed (db/indexes.py), so "birthdays in the next N days" is a range scan.
+# Triggers fill it for the common formats (YYYY-MM-DD, DD/MM/YYYY, DD.MM.YYYY, DD-MM-YYYY);
+# backfill_birthdays() parses everything else in Python and reports what it cannot read.
+
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): number for number, name in enumerate(calendar.month_abbr) if name})
+EXCEL_EPOCH = date(1899, 12, 30)  # Spreadsheet exports sometimes carry serial day numbers
+MAX_SQL_VARIABLES = 500  # Per IN (...) lookup
+YEAR_ONLY = (1900, 2100)  # A bare number in this range is a birth year, not a serial
+
+# month * 100 + day of the common formats, NULL for anything else or an impossible month/day
+_RAW_MD_SQL = """
+    CASE
+        WHEN {b} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'
+            THEN CAST(substr({b}, 6, 2) AS INTEGER) * 100 + CAST(substr({b}, 9, 2) AS INTEGER)
+        WHEN {b} GLOB '[0-9][0-9][/.-][0-9][0-9][/.-][0-9][0-9][0-9][0-9]'
+            THEN CAST(substr({b}, 4, 2) AS INTEGER) * 100 + CAST(substr({b}, 1, 2) AS INTEGER)
+    END
+"""
+
+
+def birthday_md_sql(column):
+    return f"""
+        (SELECT CASE WHEN md / 100 BETWEEN 1 AND 12 AND md % 100 BETWEEN 1 AND
+                          CASE md / 100 WHEN 2 THEN 29 WHEN 4 THEN 30 WHEN 6 THEN 30 WHEN 9 THEN 30
+                                        WHEN 11 THEN 30 ELSE 31 END
+                     THEN md END
+         FROM (SELECT {_RAW_MD_SQL.format(b=f'trim({column})')} AS md))
+    """
+
+
+def ensure_birthday_index(conn):
+    """Adds birthday_md with its triggers (indexed in db/indexes.py), then backfills rows that do not have it yet."""
+    existing = {info[1] for info in conn.execute("PRAGMA table_info(contacts)").fetchall()}
+    if "birthday_md" not in existing:
+        conn.execute("ALTER TABLE contacts ADD COLUMN birthday_md INTEGER")
+
+    # Dropped and recreated, so a later migration that runs this again ships changed parsing SQL
+    conn.execute("DROP TRIGGER IF EXISTS contacts_birthday_md_ai")
+    conn.execute("DROP TRIGGER IF EXISTS contacts_birthday_md_au")
+    conn.execute(f"""
+        CREATE TRIGGER contacts_birthday_md_ai AFTER INSERT ON contacts
+        WHEN new.birthday IS NOT NULL BEGIN
+            UPDATE contacts SET birthday_md = {birthday_md_sql('new.birthday')} WHERE rowid = new.rowid;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER contacts_birthday_md_au AFTER UPDATE OF birthday ON contacts BEGIN
+            UPDATE contacts SET birthday_md = {birthday_md_sql('new.birthday')} WHERE rowid = new.rowid;
+        END
+    """)
+    conn.commit()
+
+    updated, unparseable = backfill_birthdays(conn)
+    if updated:
+        print(f"✅ Indexed {updated} birthdays.")
+    if unparseable:
+        print(f"⚠️ {len(unparseable)} birthdays could not be read; list them with: python -m db.birthdays")
+
+
+def clear_year_only_birthdays(conn):
+    """Unindexes bare birth years ("1990") that earlier versions read as spreadsheet serials (June 12)."""
+    cursor = conn.execute("""
+        UPDATE contacts SET birthday_md = NULL
+        WHERE birthday_md IS NOT NULL AND trim(birthday) GLOB '[0-9][0-9][0-9][0-9]'
+          AND CAST(trim(birthday) AS INTEGER) BETWEEN ? AND ?
+    """, YEAR_ONLY)
+    conn.commit()
+    if cursor.rowcount:
+        print(f"✅ Removed {cursor.rowcount} year-only birthdays from the birthday calendar.")
+
+
+def _month_day(month, day):
+    try:
+        date(2000, month, day)  # Leap year, so 29 February is accepted
+    except ValueError:
+        return None
+    return month * 100 + day
+
+
+def parse_birthday(text):
+    """Returns month * 100 + day for a birthday written in any format we have seen, or None."""
+    text = (text or "").strip()
+    if not text:
+        return None
+    numbers = re.findall(r"\d+", text)
+    words = [w.lower() for w in re.findall(r"[A-Za-z]+", text)]
+
+    month_words = [MONTHS[w] for w in words if w in MONTHS]
+    if month_words:
+        # "12 May 1990", "May 12", "12th of May"
+        days = [int(n) for n in numbers if len(n) <= 2]
+        return _month_day(month_words[0], days[0]) if days else None
+
+    if words:
+        return None
+    if text.startswith("--") and len(numbers) == 2:
+        return _month_day(int(numbers[0]), int(numbers[1]))  # ISO without year: --MM-DD
+    if len(numbers) == 1 and len(numbers[0]) == 8:
+        n = numbers[0]  # YYYYMMDD
+        return _month_day(int(n[4:6]), int(n[6:8]))
+    if len(numbers) == 1 and YEAR_ONLY[0] <= int(numbers[0]) <= YEAR_ONLY[1]:
+        return None  # "1990": a year without month and day
+    if len(numbers) == 1 and 1000 <= int(numbers[0]) < 80000:
+        serial = EXCEL_EPOCH + timedelta(days=int(numbers[0]))
+        return _month_day(serial.month, serial.day)
+    if len(numbers) in (2, 3):
+        if len(numbers[0]) == 4:
+            if len(numbers) != 3:
+                return None
+            month, day = int(numbers[1]), int(numbers[2])  # YYYY-MM-DD, YYYY/MM/DD
+        else:
+            day, month = int(numbers[0]), int(numbers[1])  # Day first (UK), unless that is impossible
+            if month > 12 >= day:
+                day, month = month, day
+        return _month_day(month, day)
+    return None
+
+
+def backfill_birthdays(conn, batch_size=1000, rowids=None):
+    """
+    Fills birthday_md for rows with a birthday the triggers could not read; only for `rowids`
+    when given (e.g. the contacts an import wrote), otherwise for the whole table.
+    Returns (updated count, [(rowid, name, birthday)] still unparseable).
+    """
+    sql = """
+        SELECT rowid, name, birthday FROM contacts
+        WHERE birthday_md IS NULL AND birthday IS NOT NULL AND trim(birthday) != ''
+    """
+    if rowids is None:
+        rows = conn.execute(sql).fetchall()
+    else:
+        rowids, rows = list(rowids), []
+        for start in range(0, len(rowids), MAX_SQL_VARIABLES):
+            chunk = rowids[start:start + MAX_SQL_VARIABLES]
+            rows += conn.execute(f"{sql} AND rowid IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+    updates, unparseable = [], []
+    for rowid, name, birthday in rows:
+        md = parse_birthday(birthday)
+        if md is None:
+            unparseable.append((rowid, name, birthday))
+        else:
+            updates.append((md, rowid))
+    with conn:
+        for start in range(0, len(updates), batch_size):
+            conn.executemany("UPDATE contacts SET birthday_md = ? WHERE rowid = ?", updates[start:start + batch_size])
+    return len(updates), unparseable
+
+
+def index_birthday(conn, rowid):
+    """Fills birthday_md of one contact whose birthday the triggers could not read (caller commits)."""
+    row = conn.execute("SELECT birthday FROM contacts WHERE rowid = ? AND birthday_md IS NULL", (rowid,)).fetchone()
+    if row and row[0]:
+        conn.execute("UPDATE contacts SET birthday_md = ? WHERE rowid = ?", (parse_birthday(row[0]), rowid))
+
+
+def month_day(day):
+    return day.month * 100 + day.day
+
+
+def birthday_window(days, today=None, column="c.birthday_md"):
+    """
+    SQL condition and params for birthdays from today up to `days` days ahead.
+    One BETWEEN on the index, or two ranges of it when the window crosses new year.
+    """
+    if days >= 365:
+        return f"{column} IS NOT NULL", []
+    today = today or date.today()
+    start, end = month_day(today), month_day(today + timedelta(days=days))
+    if start <= end:
+        return f"{column} BETWEEN ? AND ?", [start, end]
+    return f"({column} >= ? OR {column} <= ?)", [start, end]
+
+
+def upcoming_birthdays(conn, days, today=None, columns=("rowid", "name", "whatsapp", "birthday")):
+    """Contacts with a birthday in the next `days` days, soonest first (December before January)."""
+    today = today or date.today()
+    where, params = birthday_window(days, today)
+    select = ", ".join(f"c.{col}" for col in columns)
+    return conn.execute(f"""
+        SELECT {select} FROM contacts c
+        WHERE {where}
+        ORDER BY c.birthday_md < ?, c.birthday_md
+    """, params + [month_day(today)]).fetchall()
+
+
+# === MAIN ===
+if __name__ == "__main__":
+    # Run from the project root: python -m db.birthdays
+    parser = argparse.ArgumentParser(description="Backfill the birthday index and list unreadable birthdays")
+    parser.add_argument("--upcoming", type=int, metavar="DAYS", help="List birthdays in the next DAYS days")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    if args.upcoming is not None:
+        for rowid, name, number, birthday in upcoming_birthdays(conn, args.upcoming):
+            print(f"🎂 {birthday:<12} {name} ({number})")
+    else:
+        updated, unparseable = backfill_birthdays(conn)
+        print(f"✅ Indexed {updated} birthdays.")
+        for rowid, name, birthday in unparseable:
+            print(f"⚠️ #{rowid} {name}: {birthday!r}")
+        if unparseable:
+            print(f"⚠️ {len(unparseable)} birthdays could not be read.")
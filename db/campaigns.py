@@ -0,0 +1,385 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import uuid
+
+from db.connection import get_connection, release_thread_connection
+
+# Persistent campaign runs.
+# A campaign and every message it has to send are stored before the sender starts. The sender
+# claims pending items in small transactions (pending -> in_flight) and the delivery log writer
+# records the outcome (sent / failed), so a run that stops halfway can be resumed from the
+# database instead of being sent again from the start.
+# Each run owns its campaign: start_run() records the sender's pid and a run token, and a
+# heartbeat thread refreshes campaigns.heartbeat_at and the claimed_at of the run's in-flight items
+# every HEARTBEAT_SECONDS. Those claims are leases: a resume only returns items whose lease has
+# expired to pending, and is refused while the owner is alive.
+
+STATE_PENDING = "pending"
+STATE_IN_FLIGHT = "in_flight"
+STATE_SENT = "sent"
+STATE_FAILED = "failed"
+ITEM_STATES = (STATE_PENDING, STATE_IN_FLIGHT, STATE_SENT, STATE_FAILED)
+
+CAMPAIGN_CREATED = "created"
+CAMPAIGN_RUNNING = "running"
+CAMPAIGN_COMPLETED = "completed"
+CAMPAIGN_STOPPED = "stopped"  # The run ended with items left; resume sends them
+CAMPAIGN_FAILED = "failed"  # The run ended with an error and items left
+
+CLAIM_BATCH = 20  # Items moved to in_flight per claim transaction
+HEARTBEAT_SECONDS = 10
+LEASE_SECONDS = 60  # A run (and its claims) without a heartbeat for this long is considered gone
+
+# Columns added to campaigns / campaign_items for run ownership
+CAMPAIGN_OWNER_COLUMNS = [
+    ("campaigns", "owner_pid", "INTEGER"),
+    ("campaigns", "owner_token", "TEXT"),
+    ("campaigns", "heartbeat_at", "TEXT"),
+    ("campaign_items", "owner_token", "TEXT"),
+]
+
+
+class CampaignBusyError(RuntimeError):
+    """The campaign is being sent by another process that is still alive."""
+
+
+def ensure_campaign_schema(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS campaigns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            mode TEXT,
+            status TEXT NOT NULL DEFAULT 'created',
+            min_delay INTEGER NOT NULL DEFAULT 1,
+            max_delay INTEGER NOT NULL DEFAULT 3,
+            workers INTEGER NOT NULL DEFAULT 1,
+            max_per_minute INTEGER,
+            transport TEXT NOT NULL DEFAULT 'selenium',
+            transport_options TEXT,
+            created_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT
+        );
+    """)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS campaign_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            campaign_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            contact_id INTEGER,
+            message_id INTEGER,
+            number TEXT NOT NULL,
+            message TEXT NOT NULL,
+            state TEXT NOT NULL DEFAULT 'pending' CHECK (state IN {ITEM_STATES}),
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            claimed_at TEXT,
+            finished_at TEXT,
+            FOREIGN KEY (campaign_id) REFERENCES campaigns(id)
+        );
+    """)
+    conn.commit()
+
+
+def ensure_campaign_owner_schema(conn):
+    for table, name, decl in CAMPAIGN_OWNER_COLUMNS:
+        existing = {info[1] for info in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+    conn.commit()
+
+
+def create_campaign(conn, plan_items, name=None, mode=None, min_delay=1, max_delay=3, workers=1,
+                    max_per_minute=None, transport="selenium", transport_options=None):
+    """Stores a campaign and one pending item per PlanItem (see campaign/planner.py). Returns its id."""
+    with conn:
+        cursor = conn.execute("""
+            INSERT INTO campaigns (name, mode, min_delay, max_delay, workers, max_per_minute,
+                                   transport, transport_options, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+        """, (name, mode, min_delay, max_delay, workers, max_per_minute, transport,
+              json.dumps(transport_options or {})))
+        campaign_id = cursor.lastrowid
+        conn.executemany("""
+            INSERT INTO campaign_items (campaign_id, position, contact_id, message_id, number, message)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [(campaign_id, position, item.contact_id, item.message_id, item.number, item.text)
+              for position, item in enumerate(plan_items)])
+    return campaign_id
+
+
+def get_campaign(conn, campaign_id):
+    """Returns the campaign row as a dict (transport_options decoded), or None."""
+    cursor = conn.execute("SELECT * FROM campaigns WHERE id = ?", (campaign_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    campaign = dict(zip([d[0] for d in cursor.description], row))
+    campaign["transport_options"] = json.loads(campaign["transport_options"] or "{}")
+    return campaign
+
+
+def set_campaign_status(conn, campaign_id, status):
+    column = {CAMPAIGN_RUNNING: "started_at", CAMPAIGN_COMPLETED: "finished_at"}.get(status)
+    with conn:
+        if column:
+            conn.execute(f"UPDATE campaigns SET status = ?, {column} = datetime('now') WHERE id = ?",
+                         (status, campaign_id))
+        else:
+            conn.execute("UPDATE campaigns SET status = ? WHERE id = ?", (status, campaign_id))
+
+
+def _process_alive(pid):
+    if os.name == "nt":
+        # os.kill(pid, 0) would send CTRL_C_EVENT on Windows; ask for the exit code instead
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        try:
+            code = ctypes.c_ulong()
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(code))) and code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _lease_cutoff(lease_seconds=LEASE_SECONDS):
+    return f"-{int(lease_seconds)} seconds"
+
+
+def campaign_owner(conn, campaign_id):
+    """Pid of the process sending the campaign right now (alive, heartbeat within the lease), or None."""
+    row = conn.execute("""
+        SELECT owner_pid FROM campaigns
+        WHERE id = ? AND owner_pid IS NOT NULL AND heartbeat_at > datetime('now', ?)
+    """, (campaign_id, _lease_cutoff())).fetchone()
+    if row and _process_alive(row[0]):
+        return row[0]
+    return None
+
+
+def start_run(conn, campaign_id):
+    """
+    Makes this process the owner of the campaign and marks it running; returns the run token.
+    Raises CampaignBusyError while another owner is alive. The claims of an owner whose process
+    has exited end with it.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")  # Two resumes at once: the second one sees the first as the owner
+    try:
+        owner = campaign_owner(conn, campaign_id)
+        if owner is not None:
+            raise CampaignBusyError(f"Campaign #{campaign_id} is still being sent by process {owner}")
+        pid, previous = conn.execute("SELECT owner_pid, owner_token FROM campaigns WHERE id = ?",
+                                     (campaign_id,)).fetchone()
+        if previous is not None and (pid is None or not _process_alive(pid)):
+            conn.execute("""
+                UPDATE campaign_items SET claimed_at = NULL
+                WHERE campaign_id = ? AND state = ? AND owner_token = ?
+            """, (campaign_id, STATE_IN_FLIGHT, previous))
+        token = uuid.uuid4().hex
+        conn.execute("""
+            UPDATE campaigns
+            SET status = ?, owner_pid = ?, owner_token = ?, heartbeat_at = datetime('now'), started_at = datetime('now')
+            WHERE id = ?
+        """, (CAMPAIGN_RUNNING, os.getpid(), token, campaign_id))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return token
+
+
+def heartbeat(conn, campaign_id, token):
+    """Renews the run's lease and its items' claims; returns False when another run has taken the campaign over."""
+    with conn:
+        cursor = conn.execute("UPDATE campaigns SET heartbeat_at = datetime('now') WHERE id = ? AND owner_token = ?",
+                              (campaign_id, token))
+        conn.execute("""
+            UPDATE campaign_items SET claimed_at = datetime('now')
+            WHERE campaign_id = ? AND state = ? AND owner_token = ?
+        """, (campaign_id, STATE_IN_FLIGHT, token))
+    return cursor.rowcount == 1
+
+
+def finish_run(conn, campaign_id, token, error=False):
+    """
+    Gives up ownership and sets the final status: completed when nothing is left to send,
+    otherwise failed (`error`) or stopped. Items still in flight lose their claim, so a resume
+    can send them at once. Returns the status.
+    """
+    with conn:
+        conn.execute("""
+            UPDATE campaign_items SET claimed_at = NULL
+            WHERE campaign_id = ? AND state = ? AND owner_token = ?
+        """, (campaign_id, STATE_IN_FLIGHT, token))
+        left = conn.execute("SELECT COUNT(*) FROM campaign_items WHERE campaign_id = ? AND state IN (?, ?)",
+                            (campaign_id, STATE_PENDING, STATE_IN_FLIGHT)).fetchone()[0]
+        status = CAMPAIGN_COMPLETED if not left else CAMPAIGN_FAILED if error else CAMPAIGN_STOPPED
+        conn.execute("""
+            UPDATE campaigns
+            SET status = ?, finished_at = datetime('now'), owner_pid = NULL, owner_token = NULL, heartbeat_at = NULL
+            WHERE id = ? AND owner_token = ?
+        """, (status, campaign_id, token))
+    return status
+
+
+def release_expired(conn, campaign_id, lease_seconds=LEASE_SECONDS):
+    """
+    Puts in-flight items whose claim has expired (no heartbeat for `lease_seconds`, or their run
+    ended) back to pending. Returns how many. An item whose send finished but whose outcome was
+    not written yet is sent again; that window is one delivery log flush (see db/delivery_log.py).
+    """
+    with conn:
+        cursor = conn.execute("""
+            UPDATE campaign_items SET state = ?, claimed_at = NULL, owner_token = NULL
+            WHERE campaign_id = ? AND state = ? AND (claimed_at IS NULL OR claimed_at <= datetime('now', ?))
+        """, (STATE_PENDING, campaign_id, STATE_IN_FLIGHT, _lease_cutoff(lease_seconds)))
+    return cursor.rowcount
+
+
+class RunHeartbeat:
+    """Calls heartbeat() every HEARTBEAT_SECONDS from its own thread and connection until stop()."""
+
+    def __init__(self, campaign_id, token, interval=HEARTBEAT_SECONDS):
+        self.campaign_id = campaign_id
+        self.token = token
+        self.interval = interval
+        self.lost = False  # Set when another run took the campaign over
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stopped.wait(self.interval):
+                try:
+                    if not heartbeat(get_connection(), self.campaign_id, self.token):
+                        print(f"⚠️ Campaign #{self.campaign_id} was taken over by another run; no new items are claimed")
+                        self.lost = True
+                        return
+                except sqlite3.OperationalError as e:
+                    print(f"⚠️ Heartbeat failed ({e}), retrying...")
+        finally:
+            release_thread_connection()
+
+
+def claim_items(conn, campaign_id, limit=CLAIM_BATCH, token=None):
+    """
+    Atomically moves the next `limit` pending items to in_flight for the run `token` and returns
+    them as (id, number, message, contact_id, message_id) rows, in campaign order.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")  # Take the write lock before reading, so two runs never claim the same rows
+    try:
+        rows = conn.execute("""
+            SELECT id, number, message, contact_id, message_id FROM campaign_items
+            WHERE campaign_id = ? AND state = ?
+            ORDER BY position LIMIT ?
+        """, (campaign_id, STATE_PENDING, limit)).fetchall()
+        conn.executemany("UPDATE campaign_items SET state = ?, claimed_at = datetime('now'), owner_token = ? "
+                         "WHERE id = ?", [(STATE_IN_FLIGHT, token, row[0]) for row in rows])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return rows
+
+
+def iter_claimed_items(conn, campaign_id, batch=CLAIM_BATCH, token=None, lost=lambda: False):
+    """
+    Yields every pending item of the campaign, claiming them `batch` at a time for the run `token`
+    as they are consumed. Stops early once `lost()` is true (run taken over, or asked to stop).
+    """
+    while not lost():
+        rows = claim_items(conn, campaign_id, batch, token)
+        if not rows:
+            return
+        for position, row in enumerate(rows):
+            if lost():
+                # Never handed to a sender, so they can go straight back to pending
+                unclaim_items(conn, [rest[0] for rest in rows[position:]], token)
+                return
+            yield row
+
+
+def unclaim_items(conn, item_ids, token):
+    """Puts items the run `token` claimed but never sent back to pending."""
+    with conn:
+        conn.executemany("""
+            UPDATE campaign_items SET state = ?, claimed_at = NULL, owner_token = NULL
+            WHERE id = ? AND state = ? AND owner_token IS ?
+        """, [(STATE_PENDING, item_id, STATE_IN_FLIGHT, token) for item_id in item_ids])
+
+
+def record_item_outcomes(conn, outcomes, token):
+    """
+    Stores (state, attempts, error, item_id) outcomes of sent or failed items claimed by the run
+    `token`; `attempts` is added to the item's earlier attempts. Items no longer in flight for this
+    run (released after its lease expired, and claimed by another) are left alone.
+    Returns how many outcomes were skipped. The caller commits, together with the delivery reports.
+    """
+    cursor = conn.executemany("""
+        UPDATE campaign_items
+        SET state = ?, attempts = attempts + ?, error = ?, finished_at = datetime('now')
+        WHERE id = ? AND state = ? AND owner_token = ?
+    """, [outcome + (STATE_IN_FLIGHT, token) for outcome in outcomes])
+    return len(outcomes) - cursor.rowcount
+
+
+def campaign_progress(conn, campaign_id):
+    """Returns {state: count} for all ITEM_STATES."""
+    progress = {state: 0 for state in ITEM_STATES}
+    progress.update(conn.execute(
+        "SELECT state, COUNT(*) FROM campaign_items WHERE campaign_id = ? GROUP BY state", (campaign_id,)
+    ).fetchall())
+    return progress
+
+
+def latest_unfinished_campaign(conn):
+    """Id of the most recent campaign that still has pending or in-flight items, or None."""
+    row = conn.execute("""
+        SELECT MAX(campaign_id) FROM campaign_items WHERE state IN (?, ?)
+    """, (STATE_PENDING, STATE_IN_FLIGHT)).fetchone()
+    return row[0]
+
+
+def list_campaigns(conn, limit=20):
+    return conn.execute("""
+        SELECT id, name, status, created_at FROM campaigns ORDER BY id DESC LIMIT ?
+    """, (limit,)).fetchall()
+
+
+# === MAIN ===
+if __name__ == "__main__":
+    # Run from the project root: python -m db.campaigns
+    parser = argparse.ArgumentParser(description="Show stored campaigns and their progress")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    conn = get_connection()
+    for campaign_id, name, status, created_at in list_campaigns(conn, args.limit):
+        progress = campaign_progress(conn, campaign_id)
+        counts = ", ".join(f"{state}={count}" for state, count in progress.items())
+        print(f"#{campaign_id} {name or '-'} [{status}] created {created_at}: {counts}")
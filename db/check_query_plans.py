@@ -0,0 +1,267 @@
+import argparse
+import random
+import re
+import sys
+from collections import namedtuple
+from datetime import date, timedelta
+
+from campaign.planner import load_contact_fields, load_sent_pairs
+from db.birthdays import upcoming_birthdays
+from db.campaigns import (STATE_FAILED, STATE_IN_FLIGHT, STATE_PENDING, STATE_SENT, campaign_progress,
+                          latest_unfinished_campaign, list_campaigns, record_item_outcomes)
+from db.club_visits import club_ids, load_visits
+from db.connection import DB_PATH, get_connection
+from db.contacts import fetch_contacts_page, get_contact
+from db.db_init import init_db
+from db.delivery_stats import fetch_daily_stats, fetch_message_type_stats, refresh_delivery_stats
+from db.groups import filtered_contacts
+from db.reports import ReportFilter, default_filter, fetch_report_page, fetch_rollup, report_totals
+from db.segments import count_segment, segment_contacts
+
+# Query plan regression check.
+# Runs EXPLAIN QUERY PLAN on the queries the views issue and fails when one of them reads a whole
+# table bigger than --threshold rows (a `SCAN` step). Queries built by db/ functions are run and
+# captured with a trace callback, so the check follows the real SQL; SQL still written inline in a
+# view is repeated below and only explained, never executed. Add new view queries to QUERY_CHECKS.
+#
+#   CLUBBOT_DB_PATH=/tmp/plans.db python -m db.check_query_plans --seed 50000
+#
+# --seed fills an empty database with synthetic rows first, so the check can run anywhere.
+
+DEFAULT_THRESHOLD = 1000
+
+# view: where the query comes from; sql/params: inline SQL to explain; run: callable(conn) issuing
+# the queries through db/ functions; full_read: the query lists every row on purpose
+QueryCheck = namedtuple("QueryCheck", "view name sql params run full_read", defaults=(None, (), None, False))
+
+SEGMENT_FILTERS = [  # Built-in filters of views/campaign_view.py plus the other filter kinds
+    {"birthday_within": 21},
+    {"birthday_within": 40},
+    {"rating_min": 6},
+    {"group": 1},
+    {"visited_within": 30},
+    {"club_visits": {"club": "tabu", "min": 3, "day": "fri"}},
+    {"all": [{"rating_min": 6}, {"group": 1}]},
+]
+
+
+def _segments(conn):
+    for definition in SEGMENT_FILTERS:
+        count_segment(conn, definition)
+        segment_contacts(conn, definition, limit=50)
+
+
+def _new_year_birthdays(conn):
+    upcoming_birthdays(conn, 21, today=date(date.today().year, 12, 20))
+
+
+def _planner(conn):
+    contact_ids = [row[0] for row in segment_contacts(conn, {"rating_min": 6})]
+    load_contact_fields(conn, contact_ids, ["name", "last_club"])
+    load_sent_pairs(conn, contact_ids, [1, 2])
+
+
+def _record_outcome(conn):
+    # Traced through the sender's own function, then undone: the check never changes the database
+    try:
+        record_item_outcomes(conn, [(STATE_SENT, 1, None, 1)], "check")
+    finally:
+        conn.rollback()
+
+
+def _campaign_state(conn):
+    campaign_id = latest_unfinished_campaign(conn) or 1
+    campaign_progress(conn, campaign_id)
+    list_campaigns(conn)
+
+
+QUERY_CHECKS = [
+    # ContactsTab (views/contacts_model.py) and ProfileView
+    QueryCheck("contacts", "first page", run=lambda conn: fetch_contacts_page(conn)),
+    QueryCheck("contacts", "deep page", run=lambda conn: fetch_contacts_page(conn, after_rowid=10 ** 6)),
+    QueryCheck("contacts", "search", run=lambda conn: fetch_contacts_page(conn, search_term="Guest 12")),
+    QueryCheck("contacts", "delete", "DELETE FROM contacts WHERE rowid = ?", (1,)),
+    QueryCheck("profile", "load contact", run=lambda conn: (get_contact(conn, 1), load_visits(conn, 1))),
+    # CampaignsTab and CampaignWorker
+    QueryCheck("campaigns", "messages", "SELECT id, type, content FROM messages"),
+    QueryCheck("campaigns", "segment count and preview", run=_segments),
+    QueryCheck("campaigns", "birthdays across new year", run=_new_year_birthdays),
+    QueryCheck("campaigns", "plan fields and sent history", run=_planner),
+    QueryCheck("campaigns", "campaign state", run=_campaign_state),
+    QueryCheck("campaigns", "all contacts", run=lambda conn: segment_contacts(conn, {}), full_read=True),
+    # Sender (db/campaigns.py, db/delivery_log.py); statements that commit are only explained
+    QueryCheck("sender", "claim", """
+        SELECT id, number, message, contact_id, message_id FROM campaign_items
+        WHERE campaign_id = ? AND state = ?
+        ORDER BY position LIMIT ?
+    """, (1, STATE_PENDING, 20)),
+    QueryCheck("sender", "release expired", """
+        UPDATE campaign_items SET state = ?, claimed_at = NULL, owner_token = NULL
+        WHERE campaign_id = ? AND state = ? AND (claimed_at IS NULL OR claimed_at <= datetime('now', ?))
+    """, (STATE_PENDING, 1, STATE_IN_FLIGHT, "-60 seconds")),
+    QueryCheck("sender", "record outcome", run=_record_outcome),
+    # GroupManagerDialog (views/group_manager.py)
+    QueryCheck("groups", "summary", """
+        SELECT g.id, g.name, g.status, COALESCE(s.member_count, 0)
+        FROM groups g
+        LEFT JOIN group_stats s ON s.group_id = g.id
+        ORDER BY g.id
+    """),
+    QueryCheck("groups", "members", "SELECT contact_id FROM contact_group_map WHERE group_id = ?", (1,)),
+    QueryCheck("groups", "remove member", "DELETE FROM contact_group_map WHERE contact_id = ? AND group_id = ?",
+               (1, 1)),
+    QueryCheck("groups", "contact list", run=lambda conn: filtered_contacts(conn), full_read=True),
+    QueryCheck("groups", "contacts by rating", run=lambda conn: filtered_contacts(conn, rating=7)),
+    QueryCheck("groups", "add matching", """
+        INSERT OR IGNORE INTO contact_group_map (contact_id, group_id)
+        SELECT c.rowid, ? FROM contacts c WHERE c.rating = ?
+    """, (1, 7)),
+    QueryCheck("groups", "remove all", "DELETE FROM contact_group_map WHERE group_id = ?", (1,)),
+    # MessagesTab
+    QueryCheck("messages", "types", "SELECT DISTINCT type FROM messages"),
+    QueryCheck("messages", "by type", "SELECT id, type, content FROM messages WHERE type = ?", ("birthday",)),
+    # ReportsTab (views/reports_view.py)
+    QueryCheck("reports", "first page", run=lambda conn: fetch_report_page(conn, default_filter())),
+    QueryCheck("reports", "next page", run=lambda conn: fetch_report_page(conn, after=(date.today().isoformat(), 5000))),
+    # A first page sorted by number walks idx_delivery_report_whatsapp from its end up to the LIMIT,
+    # which EXPLAIN shows as a SCAN; the pages after it are range searches
+    QueryCheck("reports", "by number, campaign",
+               run=lambda conn: fetch_report_page(conn, ReportFilter(campaign_id=1, status="Failed"), "number",
+                                                  after=("44000005000", 5000))),
+    QueryCheck("reports", "totals", run=lambda conn: report_totals(conn, default_filter())),
+    QueryCheck("reports", "rollup by day", run=lambda conn: fetch_rollup(conn, default_filter(), "day")),
+    QueryCheck("reports", "rollup by campaign", run=lambda conn: fetch_rollup(conn, default_filter(), "campaign")),
+    QueryCheck("reports", "rollup by message", run=lambda conn: fetch_rollup(conn, default_filter(), "message")),
+    QueryCheck("reports", "refresh statistics", run=refresh_delivery_stats),
+    QueryCheck("reports", "message type statistics",
+               run=lambda conn: fetch_message_type_stats(conn, default_filter().date_from)),
+    QueryCheck("reports", "daily statistics", run=lambda conn: fetch_daily_stats(conn, default_filter().date_from)),
+    # LoginDialog and UserManagementTab
+    QueryCheck("users", "login", "SELECT id, username, password_hash, role, status FROM users WHERE username = ?",
+               ("admin",)),
+    QueryCheck("users", "list", "SELECT id, username, role, status FROM users ORDER BY username ASC"),
+]
+
+TABLE_REF = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+([\w.]+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+SQL_WORDS = {"where", "join", "left", "inner", "on", "order", "group", "limit", "set", "values", "using"}
+
+
+def table_aliases(sql):
+    """Maps the names a plan can refer to (table names and aliases) to table names."""
+    aliases = {}
+    for table, alias in TABLE_REF.findall(sql):
+        aliases[table] = table
+        if alias and alias.lower() not in SQL_WORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def table_sizes(conn):
+    tables = [name for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+    return {table: conn.execute(f"SELECT COUNT(*) FROM \"{table}\"").fetchone()[0] for table in tables}
+
+
+def captured_queries(conn, run):
+    """Runs `run(conn)` and returns the statements it issued, with their parameters inlined."""
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        run(conn)
+    finally:
+        conn.set_trace_callback(None)
+    return [sql for sql in statements if sql.lstrip().split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE")]
+
+
+def full_scans(conn, sql, params, sizes, threshold):
+    """Returns [(table, rows, plan detail)] for every SCAN of a table larger than `threshold`."""
+    aliases = table_aliases(sql)
+    scans = []
+    for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params):
+        detail = row[-1]
+        if not detail.startswith("SCAN ") or "VIRTUAL TABLE" in detail:
+            continue
+        table = aliases.get(detail.split()[1], detail.split()[1])
+        if table.startswith("temp."):
+            continue  # Per-connection scratch tables (campaign/planner.py)
+        rows = sizes.get(table, 0)
+        if rows > threshold:
+            scans.append((table, rows, detail))
+    return scans
+
+
+def check_query_plans(conn, threshold=DEFAULT_THRESHOLD, checks=QUERY_CHECKS):
+    """Returns [(check, sql, scans)] for the checks that scan a large table."""
+    sizes = table_sizes(conn)
+    failures = []
+    for check in checks:
+        statements = [(check.sql, check.params)] if check.sql else [
+            (sql, ()) for sql in captured_queries(conn, check.run)]
+        for sql, params in statements:
+            scans = full_scans(conn, sql, params, sizes, threshold)
+            if scans and not check.full_read:
+                failures.append((check, sql, scans))
+    return failures
+
+
+def seed_database(conn, count):
+    """Fills an empty database with `count` synthetic contacts and matching history."""
+    if conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]:
+        raise SystemExit("❌ Refusing to seed a database that already has contacts; "
+                         "point CLUBBOT_DB_PATH at a scratch file.")
+    rng = random.Random(1)
+    today = date.today()
+    clubs = list(club_ids(conn).values())
+    with conn:
+        conn.executemany("INSERT INTO contacts (name, whatsapp, birthday, rating, recent_visit) VALUES (?, ?, ?, ?, ?)", [
+            (f"Guest {i}", f"44{i:09d}", f"{1980 + i % 25}-{1 + i % 12:02d}-{1 + i % 28:02d}", i % 10,
+             (today - timedelta(days=i % 365)).isoformat()) for i in range(count)])
+        conn.executemany("INSERT INTO groups (name) VALUES (?)", [(f"Group {g}",) for g in range(20)])
+        conn.executemany("INSERT INTO messages (type, content) VALUES (?, ?)",
+                         [(kind, f"{kind} message for {{Name}}") for kind in ("birthday", "weekly", "event")] * 3)
+        conn.executemany("INSERT INTO contact_group_map (contact_id, group_id) VALUES (?, ?)",
+                         [(i, 1 + i % 20) for i in range(1, count + 1)])
+        conn.executemany("INSERT INTO contact_club_visits (contact_id, club_id, weekday, count) VALUES (?, ?, ?, ?)",
+                         [(i, rng.choice(clubs), i % 7, 1 + i % 5) for i in range(1, count + 1)])
+        conn.executemany("INSERT INTO contact_message_log (contact_id, message_id, sent_at) VALUES (?, ?, ?)",
+                         [(i, 1 + i % 9, today.isoformat()) for i in range(1, count + 1)])
+        conn.executemany("INSERT INTO campaign_reports (contact_id, message, status, sent_date) VALUES (?, ?, ?, ?)",
+                         [(i, "Hello", "Sent", today.isoformat()) for i in range(1, count + 1)])
+        conn.execute("INSERT INTO campaigns (name, created_at) VALUES ('Seed', datetime('now'))")
+        conn.executemany("""
+            INSERT INTO campaign_items (campaign_id, position, contact_id, number, message, state)
+            VALUES (1, ?, ?, ?, 'Hello', ?)
+        """, [(i, i, f"44{i:09d}", STATE_PENDING if i % 2 else STATE_SENT) for i in range(1, count + 1)])
+        conn.executemany("""
+            INSERT INTO delivery_report (whatsapp, status, logged_at, contact_id, campaign_id, item_id)
+            VALUES (?, ?, ?, ?, 1, ?)
+        """, [(f"44{i:09d}", "Failed" if i % 10 == 1 else "Sent", today.isoformat(), i, i)
+              for i in range(1, count + 1, 2)])
+    conn.execute("ANALYZE")
+    print(f"✅ Seeded {count} contacts.")
+
+
+# === MAIN ===
+if __name__ == "__main__":
+    # Run from the project root: python -m db.check_query_plans
+    parser = argparse.ArgumentParser(description="Fail when a view query scans a large table")
+    parser.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD,
+                        help="Tables with more rows than this must not be scanned")
+    parser.add_argument("--seed", type=int, metavar="N", help="Fill an empty database with N synthetic contacts first")
+    args = parser.parse_args()
+
+    init_db()
+    conn = get_connection()
+    if args.seed:
+        seed_database(conn, args.seed)
+
+    print(f"📋 Checking {len(QUERY_CHECKS)} view queries against {DB_PATH}")
+    failures = check_query_plans(conn, args.threshold)
+    for check, sql, scans in failures:
+        print(f"❌ {check.view}: {check.name}")
+        for table, rows, detail in scans:
+            print(f"   {detail}  ({table}: {rows} rows)")
+        print("   " + " ".join(sql.split()))
+    if failures:
+        sys.exit(1)
+    print("✅ No view query scans a large table.")
@@ -0,0 +1,160 @@
+from db.contacts import CONTACT_COLUMNS, DERIVED_COLUMNS, rebuild_contacts_table
+
+# Club visit frequency store.
+# Visits used to live in 91 `{club}_{day}` INTEGER columns on `contacts`. They are now kept
+# sparsely in contact_club_visits (one row per non-zero count), and every read/write goes
+# through the accessors below. Adding a club is a new entry in CLUB_NAMES, not an ALTER TABLE.
+
+CLUB_NAMES = sorted([
+    "Cirque Le Soir", "Madox", "Tabu", "Leo", "Reign", "Tape",
+    "Dear Darling", "The Box", "Lio", "Dolce", "Gallery", "Rex Rooms", "Selene"
+])
+
+WEEK_DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+# Older schemas used a shortened column prefix for some clubs.
+LEGACY_COLUMN_KEYS = {"dear_darling": ["dear_d"]}
+
+
+def club_key(club_name):
+    """'Dear Darling' -> 'dear_darling'; used as the stable identifier of a club."""
+    return club_name.lower().replace(' ', '_').replace('.', '')
+
+
+def ensure_club_visits_schema(conn):
+    """Creates the clubs/contact_club_visits tables, seeds the club list and migrates wide columns."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS clubs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL
+        );
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS contact_club_visits (
+            contact_id INTEGER NOT NULL,
+            club_id INTEGER NOT NULL,
+            weekday INTEGER NOT NULL CHECK (weekday BETWEEN 0 AND 6),
+            count INTEGER NOT NULL,
+            PRIMARY KEY (contact_id, club_id, weekday),
+            FOREIGN KEY (contact_id) REFERENCES contacts(rowid),
+            FOREIGN KEY (club_id) REFERENCES clubs(id)
+        ) WITHOUT ROWID;
+    """)
+    cursor.executemany("INSERT OR IGNORE INTO clubs (key, name) VALUES (?, ?)",
+                       [(club_key(name), name) for name in CLUB_NAMES])
+    conn.commit()
+
+    migrate_wide_visit_columns(conn)
+
+    # Created after the migration, which may rebuild (drop and rename) the contacts table
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS contacts_visits_ad AFTER DELETE ON contacts BEGIN
+            DELETE FROM contact_club_visits WHERE contact_id = old.rowid;
+        END
+    """)
+    conn.commit()
+
+
+def club_ids(conn):
+    """Returns {club_key: club_id}."""
+    return dict(conn.execute("SELECT key, id FROM clubs").fetchall())
+
+
+def load_visits(conn, contact_id):
+    """Returns {club_key: {day: count}} with only the non-zero counts present."""
+    visits = {}
+    rows = conn.execute("""
+        SELECT cl.key, v.weekday, v.count
+        FROM contact_club_visits v
+        JOIN clubs cl ON cl.id = v.club_id
+        WHERE v.contact_id = ?
+    """, (contact_id,)).fetchall()
+    for key, weekday, count in rows:
+        visits.setdefault(key, {})[WEEK_DAYS[weekday]] = count
+    return visits
+
+
+def save_visits(conn, contact_id, visits, ids=None):
+    """
+    Replaces the visit counts of one contact with `visits` ({club_key: {day: count}}).
+    Runs inside the caller's transaction; the caller commits.
+    """
+    ids = ids or club_ids(conn)
+    conn.execute("DELETE FROM contact_club_visits WHERE contact_id = ?", (contact_id,))
+    conn.executemany(
+        "INSERT INTO contact_club_visits (contact_id, club_id, weekday, count) VALUES (?, ?, ?, ?)",
+        visit_rows(contact_id, visits, ids)
+    )
+
+
+def visit_rows(contact_id, visits, ids):
+    """Flattens {club_key: {day: count}} into contact_club_visits rows, skipping zeros and unknown clubs."""
+    rows = []
+    for key, days in visits.items():
+        club_id = ids.get(key)
+        if club_id is None:
+            continue
+        for day, count in days.items():
+            if count:
+                rows.append((contact_id, club_id, WEEK_DAYS.index(day), int(count)))
+    return rows
+
+
+def visits_from_wide_row(row):
+    """
+    Extracts visit counts from a flat mapping with `{club}_{day}` keys (CSV exports, old rows).
+    Returns {club_key: {day: count}}.
+    """
+    visits = {}
+    for name in CLUB_NAMES:
+        key = club_key(name)
+        for prefix in [key] + LEGACY_COLUMN_KEYS.get(key, []):
+            for day in WEEK_DAYS:
+                value = row.get(f"{prefix}_{day}")
+                try:
+                    count = int(float(value)) if value not in (None, "") else 0
+                except (ValueError, TypeError):
+                    count = 0
+                if count:
+                    visits.setdefault(key, {})[day] = count
+    return visits
+
+
+def migrate_wide_visit_columns(conn):
+    """
+    One-off migration from the wide `{club}_{day}` columns: copies non-zero counts into
+    contact_club_visits and rebuilds `contacts` without those columns, in one transaction.
+    Does nothing once the wide columns are gone.
+    """
+    existing = {info[1] for info in conn.execute("PRAGMA table_info(contacts)").fetchall()}
+    ids = club_ids(conn)
+    wide_columns = []
+    for name in CLUB_NAMES:
+        key = club_key(name)
+        for prefix in [key] + LEGACY_COLUMN_KEYS.get(key, []):
+            for weekday, day in enumerate(WEEK_DAYS):
+                column = f"{prefix}_{day}"
+                if column in existing:
+                    wide_columns.append((column, ids[key], weekday))
+    if not wide_columns:
+        return
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN")
+        for column, club_id, weekday in wide_columns:
+            cursor.execute(f"""
+                INSERT INTO contact_club_visits (contact_id, club_id, weekday, count)
+                SELECT rowid, ?, ?, CAST({column} AS INTEGER) FROM contacts
+                WHERE CAST({column} AS INTEGER) > 0
+                ON CONFLICT (contact_id, club_id, weekday) DO UPDATE SET count = count + excluded.count
+            """, (club_id, weekday))
+        rebuild_contacts_table(conn, {name: name for name, _ in CONTACT_COLUMNS + DERIVED_COLUMNS
+                                      if name in existing})
+        conn.commit()
+        print(f"✅ Migrated {len(wide_columns)} club visit columns into contact_club_visits.")
+    except Exception:
+        conn.rollback()
+        raise
@@ -0,0 +1,107 @@
+import atexit
+import os
+import sqlite3
+import threading
+
+# Single resolved location of the application database. Every view, script and the
+# sender subprocess goes through this module instead of building its own path.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.environ.get("CLUBBOT_DB_PATH") or os.path.join(BASE_DIR, "clubbot.db")
+
+BUSY_TIMEOUT_SECONDS = 10
+STATEMENT_CACHE_SIZE = 256  # Prepared statements kept per connection
+
+# Applied once when a pooled connection is opened, never per operation.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",  # Readers (GUI) never block the writer (sender)
+    "PRAGMA synchronous=NORMAL",  # Safe with WAL, avoids an fsync per commit
+    "PRAGMA mmap_size=268435456",  # 256 MB memory-mapped reads
+    "PRAGMA cache_size=-65536",  # 64 MB page cache (negative value = KiB)
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3 connection owned by the pool.
+    close() only releases it back to the pool (rolling back anything left uncommitted),
+    so existing `conn.close()` calls in the views keep working without reconnecting.
+    """
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def really_close(self):
+        super().close()
+
+
+class ConnectionPool:
+    """Hands out one long-lived connection per thread for a given database file."""
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_SECONDS,
+            check_same_thread=False,  # Only the owning thread uses it; close_all() may run elsewhere
+            factory=PooledConnection,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def get(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        return conn
+
+    def release_thread(self):
+        """Closes the calling thread's connection (call from worker threads before they exit)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            with self._lock:
+                if conn in self._connections:
+                    self._connections.remove(conn)
+            conn.really_close()
+
+    def close_all(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.really_close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+_pool = ConnectionPool()
+
+
+def get_connection():
+    """Returns the calling thread's pooled connection to the application database."""
+    return _pool.get()
+
+
+def release_thread_connection():
+    _pool.release_thread()
+
+
+def close_all_connections():
+    _pool.close_all()
+
+
+atexit.register(close_all_connections)
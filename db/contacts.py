@@ -0,0 +1,200 @@
+import re
+import sqlite3
+import weakref
+
+# Contact queries shared by the contacts views.
+
+# Canonical `contacts` columns (the table is keyed by its implicit rowid).
+# Club visit counts are not columns any more, see db/club_visits.py.
+CONTACT_COLUMNS = [
+    ("name", "TEXT"),
+    ("whatsapp", "TEXT UNIQUE"),
+    ("birthday", "TEXT"),
+    ("instagram", "TEXT"),
+    ("rating", "INTEGER"),
+    ("last_club", "TEXT"),
+    ("visit_date", "TEXT"),
+    ("category", "TEXT"),
+    ("recent_visit", "TEXT"),
+    ("club_visits", "INTEGER"),
+]
+CONTACT_FIELDS = [name for name, _ in CONTACT_COLUMNS]
+
+# Columns computed from other columns by triggers (see db/birthdays.py); never edited directly.
+DERIVED_COLUMNS = [
+    ("birthday_md", "INTEGER"),  # Birthday as month * 100 + day, for indexed birthday windows
+]
+
+# Columns shown in the contacts list; rowid first so pages can be continued by key.
+LIST_COLUMNS = ("rowid", "name", "whatsapp", "birthday", "rating")
+
+PAGE_SIZE = 200
+
+REBUILD_BATCH = 5000  # Rows copied per statement when the table is rebuilt
+
+# Columns covered by the full-text search index.
+SEARCH_COLUMNS = ("name", "whatsapp", "instagram", "last_club", "category")
+
+
+def contacts_table_sql(table_name="contacts"):
+    columns = ",\n                ".join(f"{name} {decl}" for name, decl in CONTACT_COLUMNS + DERIVED_COLUMNS)
+    return f"""
+            CREATE TABLE IF NOT EXISTS {table_name} (
+                {columns}
+            );
+        """
+
+
+def rebuild_contacts_table(conn, columns, batch_size=REBUILD_BATCH):
+    """
+    Recreates `contacts` with the canonical columns, keeping rowids (other tables reference
+    contacts by rowid). `columns` maps each new column to the expression it is copied from.
+    Rows are copied in rowid batches and the indexes and triggers of the old table are recreated
+    on the new one. Must run inside the caller's transaction, so a failed rebuild leaves nothing behind.
+    """
+    attached = [sql for (sql,) in conn.execute("""
+        SELECT sql FROM sqlite_master
+        WHERE tbl_name = 'contacts' AND type IN ('index', 'trigger') AND sql IS NOT NULL
+    """)]
+    conn.execute("DROP TABLE IF EXISTS contacts_rebuild")
+    conn.execute(contacts_table_sql("contacts_rebuild"))
+    targets = ", ".join(columns)
+    sources = ", ".join(columns.values())
+    last_rowid = -2 ** 63
+    while True:
+        cursor = conn.execute(f"""
+            INSERT INTO contacts_rebuild (rowid, {targets})
+            SELECT rowid, {sources} FROM contacts WHERE rowid > ? ORDER BY rowid LIMIT ?
+        """, (last_rowid, batch_size))
+        if cursor.rowcount < batch_size:
+            break
+        last_rowid = conn.execute("SELECT MAX(rowid) FROM contacts_rebuild").fetchone()[0]
+    conn.execute("DROP TABLE contacts")
+    conn.execute("ALTER TABLE contacts_rebuild RENAME TO contacts")
+    for sql in attached:
+        conn.execute(sql)
+
+
+def get_contact(conn, rowid):
+    """Returns one contact as a dict of CONTACT_FIELDS plus 'rowid', or None."""
+    row = conn.execute(f"SELECT {', '.join(CONTACT_FIELDS)} FROM contacts WHERE rowid = ?", (rowid,)).fetchone()
+    if row is None:
+        return None
+    contact = dict(zip(CONTACT_FIELDS, row))
+    contact["rowid"] = rowid
+    return contact
+
+
+def ensure_search_index(conn):
+    """
+    Creates the contacts_fts FTS5 index (external content over `contacts`) and the triggers
+    that keep it in sync. Builds the index from existing rows the first time it is created.
+    Returns False if this SQLite build has no FTS5, in which case searches fall back to LIKE.
+    """
+    columns = ", ".join(SEARCH_COLUMNS)
+    new_values = ", ".join(f"new.{col}" for col in SEARCH_COLUMNS)
+    old_values = ", ".join(f"old.{col}" for col in SEARCH_COLUMNS)
+
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'contacts_fts'"
+    ).fetchone()
+    try:
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+                {columns},
+                content='contacts', content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ Full-text search unavailable ({e}); contact search will scan the table.")
+        return False
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS contacts_fts_ai AFTER INSERT ON contacts BEGIN
+            INSERT INTO contacts_fts (rowid, {columns}) VALUES (new.rowid, {new_values});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS contacts_fts_ad AFTER DELETE ON contacts BEGIN
+            INSERT INTO contacts_fts (contacts_fts, rowid, {columns}) VALUES ('delete', old.rowid, {old_values});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS contacts_fts_au AFTER UPDATE OF {columns} ON contacts BEGIN
+            INSERT INTO contacts_fts (contacts_fts, rowid, {columns}) VALUES ('delete', old.rowid, {old_values});
+            INSERT INTO contacts_fts (rowid, {columns}) VALUES (new.rowid, {new_values});
+        END
+    """)
+    if not exists:
+        conn.execute("INSERT INTO contacts_fts (contacts_fts) VALUES ('rebuild')")
+    conn.commit()
+    return True
+
+
+# Connections that have seen contacts_fts (see has_search_index)
+_search_index_connections = weakref.WeakKeyDictionary()
+
+
+def has_search_index(conn):
+    """
+    Whether contacts_fts exists. The index is never dropped once migration 4 has created it, so a
+    positive answer is remembered per connection instead of asking sqlite_master on every page.
+    """
+    if conn in _search_index_connections:
+        return True
+    found = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'contacts_fts'"
+    ).fetchone() is not None
+    if found:
+        try:
+            _search_index_connections[conn] = True
+        except TypeError:
+            pass  # A plain sqlite3.Connection cannot be weakly referenced; it just asks every time
+    return found
+
+
+def build_match_query(search_term):
+    """
+    Turns what the user typed into an FTS5 MATCH expression.
+    Every word becomes a prefix term ("jo" finds "John"); a phone-like input is collapsed into
+    one digit prefix on the whatsapp column so "+44 7700" finds "447700900123".
+    Returns None when nothing searchable is left.
+    """
+    if re.fullmatch(r"[\d\s+\-().]+", search_term):
+        digits = re.sub(r"\D", "", search_term)
+        return f'whatsapp : "{digits}"*' if digits else None
+    words = re.findall(r"\w+", search_term)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def fetch_contacts_page(conn, after_rowid=0, limit=PAGE_SIZE, search_term=""):
+    """
+    Returns up to `limit` contacts with rowid > after_rowid, ordered by rowid.
+    Keyset pagination: each page is an index range scan on rowid, no matter how deep the user scrolls.
+    A search term is resolved through the contacts_fts index in the same query.
+    """
+    columns = ", ".join(f"c.{col}" for col in LIST_COLUMNS)
+    if search_term and has_search_index(conn):
+        match = build_match_query(search_term)
+        if match is None:
+            return []
+        sql = f"""
+            SELECT {columns} FROM contacts_fts f
+            JOIN contacts c ON c.rowid = f.rowid
+            WHERE contacts_fts MATCH ? AND f.rowid > ?
+            ORDER BY f.rowid LIMIT ?
+        """
+        return conn.execute(sql, (match, after_rowid, limit)).fetchall()
+
+    sql = f"SELECT {columns} FROM contacts c WHERE c.rowid > ?"
+    params = [after_rowid]
+    if search_term:
+        pattern = f"%{search_term}%"
+        sql += " AND (" + " OR ".join(f"c.{col} LIKE ?" for col in SEARCH_COLUMNS) + ")"
+        params += [pattern] * len(SEARCH_COLUMNS)
+    sql += " ORDER BY c.rowid LIMIT ?"
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
@@ -0,0 +1,268 @@
+import csv
+import os
+import sqlite3
+
+from db.birthdays import backfill_birthdays
+from db.club_visits import CLUB_NAMES, WEEK_DAYS, LEGACY_COLUMN_KEYS, club_key, club_ids
+
+# Bulk contact import from CSV exports (club POS, spreadsheets).
+# The column map is resolved once from the header, rows are streamed through a generator and
+# written with executemany in batches, all inside one transaction (cancel = rollback).
+
+BATCH_SIZE = 1000
+MAX_SQL_VARIABLES = 500  # Per IN (...) lookup, well under SQLite's limit
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0  # Inserted or updated contacts
+        self.rejects = []  # (line number, whatsapp or "", reason)
+        self.cancelled = False
+        self.unreadable_birthdays = 0  # Imported rows whose birthday could not be parsed
+
+    def reject_report(self):
+        return "\n".join(f"Line {line}: {number or '-'} - {reason}" for line, number, reason in self.rejects)
+
+
+def normalize_header(name):
+    return (name or "").strip().lower().replace(' ', '_').replace('.', '')
+
+
+def clean_text(value):
+    if value is None:
+        return None
+    value = value.strip()
+    return value if value and value.lower() != "none" else None
+
+
+def parse_int(value):
+    """Returns (int or None, error message or None)."""
+    value = clean_text(value)
+    if value is None:
+        return None, None
+    try:
+        return int(float(value)), None
+    except ValueError:
+        return None, f"not a number: {value!r}"
+
+
+class ContactCsvImporter:
+    def __init__(self, conn, file_path, batch_size=BATCH_SIZE, progress_callback=None, should_cancel=None):
+        self.conn = conn
+        self.file_path = file_path
+        self.batch_size = batch_size
+        self.progress_callback = progress_callback
+        self.should_cancel = should_cancel or (lambda: False)
+        self.result = ImportResult()
+        self._chars_read = 0
+        self._file_size = max(os.path.getsize(file_path), 1)
+
+    # --- Column map (resolved once per import) ---
+    def _resolve_columns(self, header):
+        """
+        Maps CSV header positions to contact columns and visit counts.
+        Returns (contact_fields, visit_fields) as lists of (csv_name, column, is_integer) and
+        (csv_name, club_key, day).
+        """
+        table_info = self.conn.execute("PRAGMA table_info(contacts)").fetchall()
+        column_types = {info[1]: (info[2] or "").upper() for info in table_info}
+
+        visit_columns = {}
+        for name in CLUB_NAMES:
+            key = club_key(name)
+            for prefix in [key] + LEGACY_COLUMN_KEYS.get(key, []):
+                for day in WEEK_DAYS:
+                    visit_columns[f"{prefix}_{day}"] = (key, day)
+
+        contact_fields, visit_fields = [], []
+        for csv_name in header:
+            normalized = normalize_header(csv_name)
+            if normalized in column_types:
+                contact_fields.append((csv_name, normalized, "INT" in column_types[normalized]))
+            elif normalized in visit_columns:
+                visit_fields.append((csv_name,) + visit_columns[normalized])
+        return contact_fields, visit_fields
+
+    # --- Streaming ---
+    def _lines(self, csvfile):
+        for line in csvfile:
+            self._chars_read += len(line)
+            yield line
+
+    def _rows(self, reader, contact_fields, visit_fields):
+        """Yields (line number, contact values, visits) for valid rows; records rejects for the rest."""
+        for row in reader:
+            line = reader.line_num
+            number = clean_text(row.get(self._whatsapp_field)) or ""
+            if None in row:
+                self.result.rejects.append((line, number, "more fields than the header"))
+                continue
+
+            values, error = [], None
+            for csv_name, column, is_integer in contact_fields:
+                if is_integer:
+                    value, error = parse_int(row.get(csv_name))
+                    if error:
+                        error = f"{column}: {error}"
+                        break
+                else:
+                    value = clean_text(row.get(csv_name))
+                values.append(value)
+            if error is None and not number:
+                error = "missing WhatsApp number"
+            if error:
+                self.result.rejects.append((line, number, error))
+                continue
+
+            visits = {}  # Only the cells that hold a count; a blank cell keeps the stored count, 0 clears it
+            for csv_name, key, day in visit_fields:
+                count, _ = parse_int(row.get(csv_name))
+                if count is not None:
+                    visits.setdefault(key, {})[day] = count
+            yield line, values, visits
+
+    def _batches(self, rows):
+        batch = []
+        for item in rows:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    # --- Writing ---
+    def _upsert_sql(self, columns):
+        placeholders = ", ".join("?" for _ in columns)
+        updates = ", ".join(f"{col} = COALESCE(excluded.{col}, contacts.{col})"
+                            for col in columns if col != "whatsapp")
+        sql = f"INSERT INTO contacts ({', '.join(columns)}) VALUES ({placeholders})"
+        if updates:
+            sql += f" ON CONFLICT(whatsapp) DO UPDATE SET {updates}"
+        else:
+            sql += " ON CONFLICT(whatsapp) DO NOTHING"
+        return sql
+
+    def _write_batch(self, sql, batch):
+        cursor = self.conn.cursor()
+        cursor.execute("SAVEPOINT import_batch")
+        try:
+            cursor.executemany(sql, [values for _, values, _ in batch])
+            written = batch
+        except sqlite3.Error:
+            # Find the offending rows one by one; the rest of the batch still goes in
+            cursor.execute("ROLLBACK TO import_batch")
+            written = []
+            for line, values, visits in batch:
+                try:
+                    cursor.execute(sql, values)
+                    written.append((line, values, visits))
+                except sqlite3.Error as e:
+                    self.result.rejects.append((line, values[self._whatsapp_index], str(e)))
+        cursor.execute("RELEASE import_batch")
+        self.result.imported += len(written)
+        return written
+
+    def _rowids(self, numbers):
+        """Returns {whatsapp: rowid} of the given numbers."""
+        rowids = {}
+        keys = list(numbers)
+        for start in range(0, len(keys), MAX_SQL_VARIABLES):
+            chunk = keys[start:start + MAX_SQL_VARIABLES]
+            qmarks = ",".join("?" * len(chunk))
+            rowids.update(self.conn.execute(
+                f"SELECT whatsapp, rowid FROM contacts WHERE whatsapp IN ({qmarks})", chunk).fetchall())
+        return rowids
+
+    def _write_visits(self, batch):
+        """
+        Writes the visit counts present in `batch`, cell by cell: like the contact columns, a blank
+        cell leaves the stored count alone. Rows of the same number are merged in file order.
+        """
+        numbers = {}
+        for _, values, visits in batch:
+            merged = numbers.setdefault(values[self._whatsapp_index], {})
+            for key, days in visits.items():
+                merged.setdefault(key, {}).update(days)
+        numbers = {number: visits for number, visits in numbers.items() if visits}
+        if not numbers:
+            return
+
+        rowids = self._rowids(numbers)
+        counts, cleared = [], []
+        for number, visits in numbers.items():
+            if number not in rowids:
+                continue
+            for key, days in visits.items():
+                club_id = self._club_ids.get(key)
+                if club_id is None:
+                    continue
+                for day, count in days.items():
+                    cell = (rowids[number], club_id, WEEK_DAYS.index(day))
+                    if count:
+                        counts.append(cell + (count,))
+                    else:
+                        cleared.append(cell)  # The table only holds non-zero counts
+        self.conn.executemany("""
+            INSERT INTO contact_club_visits (contact_id, club_id, weekday, count) VALUES (?, ?, ?, ?)
+            ON CONFLICT(contact_id, club_id, weekday) DO UPDATE SET count = excluded.count
+        """, counts)
+        self.conn.executemany("DELETE FROM contact_club_visits WHERE contact_id = ? AND club_id = ? AND weekday = ?",
+                              cleared)
+
+    def _report_progress(self):
+        if self.progress_callback:
+            percent = min(99, int(self._chars_read * 100 / self._file_size))
+            self.progress_callback(self.result.imported, percent)
+
+    def run(self):
+        with open(self.file_path, newline='', encoding='utf-8-sig') as csvfile:
+            reader = csv.DictReader(self._lines(csvfile))
+            contact_fields, visit_fields = self._resolve_columns(reader.fieldnames or [])
+            columns = [column for _, column, _ in contact_fields]
+            if "whatsapp" not in columns:
+                raise ValueError("The CSV file has no WhatsApp column.")
+            self._whatsapp_index = columns.index("whatsapp")
+            self._whatsapp_field = contact_fields[self._whatsapp_index][0]
+            self._club_ids = club_ids(self.conn)
+            sql = self._upsert_sql(columns)
+
+            if self.conn.in_transaction:
+                self.conn.commit()
+            self.conn.execute("BEGIN")
+            birthday_index = columns.index("birthday") if "birthday" in columns else None
+            birthday_rowids = set()  # Contacts whose birthday this import wrote
+            try:
+                for batch in self._batches(self._rows(reader, contact_fields, visit_fields)):
+                    if self.should_cancel():
+                        raise ImportCancelled()
+                    written = self._write_batch(sql, batch)
+                    if visit_fields and written:
+                        self._write_visits(written)
+                    if birthday_index is not None and written:
+                        birthday_rowids.update(self._rowids({values[self._whatsapp_index] for _, values, _ in written
+                                                             if values[birthday_index] is not None}).values())
+                    self._report_progress()
+                self.conn.commit()
+                # Birthdays of this import in formats the triggers cannot read are indexed from Python
+                if birthday_rowids:
+                    self.result.unreadable_birthdays = len(backfill_birthdays(self.conn, rowids=birthday_rowids)[1])
+            except ImportCancelled:
+                self.conn.rollback()
+                self.result.cancelled = True
+                self.result.imported = 0
+            except Exception:
+                self.conn.rollback()
+                raise
+
+        if self.progress_callback and not self.result.cancelled:
+            self.progress_callback(self.result.imported, 100)
+        return self.result
+
+
+def import_contacts_csv(conn, file_path, **kwargs):
+    return ContactCsvImporter(conn, file_path, **kwargs).run()
@@ -0,0 +1,151 @@
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+
+from db.campaigns import STATE_FAILED, STATE_SENT, record_item_outcomes
+from db.connection import get_connection, release_thread_connection
+
+# Delivery logging for the sender.
+# One writer thread owns all delivery_report / contact_message_log / campaign_items writes of a
+# campaign and commits them in batches, instead of a connection + insert + commit per message.
+# The GUI only displays sender events and never writes these tables itself.
+
+FLUSH_EVERY = 50  # Events per transaction
+FLUSH_INTERVAL_MS = 500  # Longest time an event waits in the queue
+MAX_FLUSH_ATTEMPTS = 5
+
+# Columns added to the original delivery_report(id, whatsapp, status, logged_at)
+DELIVERY_REPORT_COLUMNS = [
+    ("contact_id", "INTEGER"),
+    ("message_id", "INTEGER"),
+    ("latency_ms", "INTEGER"),
+    ("error", "TEXT"),
+    ("campaign_id", "INTEGER"),
+    ("item_id", "INTEGER"),
+]
+
+
+def ensure_delivery_log_schema(conn):
+    existing = {info[1] for info in conn.execute("PRAGMA table_info(delivery_report)").fetchall()}
+    for name, decl in DELIVERY_REPORT_COLUMNS:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE delivery_report ADD COLUMN {name} {decl}")
+    conn.commit()
+
+
+class DeliveryEvent:
+    """Outcome of one campaign item (campaign_items.id); status is "Sent" or "Failed"."""
+
+    def __init__(self, item_id, number, status, campaign_id=None, contact_id=None, message_id=None,
+                 attempts=1, latency_ms=None, error=None):
+        self.item_id = item_id
+        self.number = number
+        self.status = status
+        self.campaign_id = campaign_id
+        self.contact_id = contact_id
+        self.message_id = message_id
+        self.attempts = attempts
+        self.latency_ms = latency_ms
+        self.error = error
+
+
+class DeliveryLogWriter:
+    """
+    Queues delivery events from any thread and writes them from a single background thread,
+    one transaction per `flush_every` events or `flush_interval_ms`, whichever comes first.
+    Each item id is recorded once. close() (also run at exit) flushes whatever is still queued.
+    """
+
+    def __init__(self, token, flush_every=FLUSH_EVERY, flush_interval_ms=FLUSH_INTERVAL_MS):
+        self.token = token  # Run that claimed the items (db/campaigns.py start_run)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.written = 0
+        self._queue = queue.Queue()
+        self._seen = set()
+        self._seen_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._closed = False
+
+    def start(self):
+        self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def record(self, event):
+        """Queues one delivery event; returns False if this item was already recorded."""
+        with self._seen_lock:
+            if event.item_id in self._seen:
+                return False
+            self._seen.add(event.item_id)
+        self._queue.put(event)
+        return True
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    event = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    event = False  # Interval elapsed
+
+                if event is None:
+                    break
+                if event:
+                    batch.append(event)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+                if batch and (len(batch) >= self.flush_every or time.monotonic() >= deadline):
+                    batch = self._flush(batch)
+                    deadline = time.monotonic() + self.flush_interval if batch else None
+
+            if batch and self._flush(batch):
+                print(f"❌ Could not write {len(batch)} delivery report(s) before exit")
+        finally:
+            release_thread_connection()
+
+    def _flush(self, batch):
+        """Writes `batch` in one transaction; returns what is left to retry (empty on success)."""
+        reports = [(e.number, e.status, e.contact_id, e.message_id, e.latency_ms, e.error, e.campaign_id, e.item_id)
+                   for e in batch]
+        sent = [(e.contact_id, e.message_id) for e in batch
+                if e.status == "Sent" and e.contact_id is not None and e.message_id is not None]
+        states = [(STATE_SENT if e.status == "Sent" else STATE_FAILED, e.attempts, e.error, e.item_id)
+                  for e in batch]
+        for attempt in range(MAX_FLUSH_ATTEMPTS):
+            try:
+                conn = get_connection()
+                with conn:
+                    conn.executemany("""
+                        INSERT INTO delivery_report (whatsapp, status, logged_at, contact_id, message_id,
+                                                     latency_ms, error, campaign_id, item_id)
+                        VALUES (?, ?, datetime('now'), ?, ?, ?, ?, ?, ?)
+                    """, reports)
+                    conn.executemany("""
+                        INSERT OR IGNORE INTO contact_message_log (contact_id, message_id, sent_at)
+                        VALUES (?, ?, datetime('now'))
+                    """, sent)
+                    # Checkpoint: the item's outcome is committed together with its report
+                    skipped = record_item_outcomes(conn, states, self.token)
+                self.written += len(batch)
+                print(f"📋 Logged {len(batch)} delivery report(s)")
+                if skipped:
+                    print(f"⚠️ {skipped} item(s) were taken over by another run; their state was left to it")
+                return []
+            except sqlite3.OperationalError as e:
+                # Usually "database is locked" from another writer; back off and retry the whole batch
+                print(f"⚠️ Delivery log write failed ({e}), retrying...")
+                time.sleep(0.2 * (attempt + 1))
+        return batch
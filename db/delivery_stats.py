@@ -0,0 +1,242 @@
+import argparse
+import sqlite3
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from db.connection import get_connection
+from db.indexes import ensure_meta_table
+
+# Delivery performance statistics per day and message type.
+# Sent and failed counts have one source, delivery_daily (db/reports.py), kept exact by triggers on
+# delivery_report; delivery_daily_stats is a view that adds it up per day and message type. What the
+# rollup cannot hold is the latency of sent messages: that is kept as a histogram per (day, message)
+# in delivery_latency_buckets, so a median over any set of days is found by adding up a few bucket
+# counts. The histogram is refreshed from the delivery_report rows after a high-water mark (the last
+# id already counted, stored in schema_meta), so a refresh reads only what the sender logged since
+# the previous one; deleting a report that was already counted takes it back out through a trigger,
+# the same way delivery_daily's own delete trigger does.
+#
+#   python -m db.delivery_stats --from 2026-10-01 [--daily]
+
+LAST_ID_KEY = "delivery_stats_last_id"  # schema_meta key of the high-water mark
+REFRESH_BATCH = 10000  # Reports counted per transaction
+UNKNOWN_TYPE = "(unknown)"  # Reports without a message, or whose message was deleted
+
+# Upper bounds (ms) of the latency histogram buckets; one more bucket holds everything slower.
+# A median read from the histogram is interpolated within its bucket. The delete trigger has the
+# bounds built in: changing them needs the trigger recreated and --rebuild.
+LATENCY_BUCKETS_MS = [100, 200, 300, 400, 500, 600, 800, 1000, 1250, 1500, 2000, 2500, 3000, 4000, 5000,
+                      7500, 10000, 15000, 20000, 30000, 60000]
+
+
+def _bucket_sql(latency):
+    # SQL form of latency_bucket(): the number of bounds below the latency
+    return " + ".join(f"({latency} > {bound})" for bound in LATENCY_BUCKETS_MS)
+
+
+def ensure_delivery_stats_schema(conn):
+    """Creates the latency histogram, its delete trigger and the delivery_daily_stats view (needs delivery_daily)."""
+    ensure_meta_table(conn)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS delivery_latency_buckets (
+            day TEXT NOT NULL,
+            message_id INTEGER NOT NULL DEFAULT 0,  -- 0: unknown message, as in delivery_daily
+            bucket INTEGER NOT NULL,  -- Index into LATENCY_BUCKETS_MS
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, message_id, bucket)
+        ) WITHOUT ROWID;
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS delivery_latency_ad AFTER DELETE ON delivery_report
+        WHEN old.status = 'Sent' AND old.latency_ms IS NOT NULL
+         AND old.id <= (SELECT CAST(value AS INTEGER) FROM schema_meta WHERE key = '{LAST_ID_KEY}')
+        BEGIN
+            UPDATE delivery_latency_buckets SET count = count - 1
+            WHERE day = substr(old.logged_at, 1, 10) AND message_id = COALESCE(old.message_id, 0)
+              AND bucket = {_bucket_sql("old.latency_ms")};
+        END
+    """)
+    conn.execute(f"""
+        CREATE VIEW IF NOT EXISTS delivery_daily_stats AS
+        SELECT d.day AS day, COALESCE(m.type, '{UNKNOWN_TYPE}') AS message_type,
+               SUM(d.sent) AS sent, SUM(d.failed) AS failed
+        FROM delivery_daily d
+        LEFT JOIN messages m ON m.id = d.message_id
+        GROUP BY d.day, 2
+    """)
+    conn.commit()
+
+
+def latency_bucket(latency_ms):
+    return bisect_left(LATENCY_BUCKETS_MS, latency_ms)
+
+
+def histogram_median(counts):
+    """Median latency (ms) of a {bucket: count} histogram, interpolated within its bucket; None when empty."""
+    total = sum(counts.values())
+    if not total:
+        return None
+    half = total / 2
+    seen = 0
+    for bucket in sorted(counts):
+        if seen + counts[bucket] >= half:
+            low = LATENCY_BUCKETS_MS[bucket - 1] if bucket > 0 else 0
+            high = LATENCY_BUCKETS_MS[bucket] if bucket < len(LATENCY_BUCKETS_MS) else low * 2
+            return round(low + (high - low) * (half - seen) / counts[bucket])
+        seen += counts[bucket]
+
+
+def last_counted_id(conn):
+    ensure_meta_table(conn)
+    row = conn.execute("SELECT value FROM schema_meta WHERE key = ?", (LAST_ID_KEY,)).fetchone()
+    return int(row[0]) if row else 0
+
+
+def _count_batch(conn, rows):
+    """Adds one batch of (id, day, message_id, status, latency_ms) to the histogram; the caller commits."""
+    buckets = defaultdict(int)
+    for _, day, message_id, status, latency_ms in rows:
+        if status == "Sent" and latency_ms is not None:
+            buckets[(day, message_id, latency_bucket(latency_ms))] += 1
+    conn.executemany("""
+        INSERT INTO delivery_latency_buckets (day, message_id, bucket, count) VALUES (?, ?, ?, ?)
+        ON CONFLICT(day, message_id, bucket) DO UPDATE SET count = count + excluded.count
+    """, [key + (count,) for key, count in buckets.items()])
+    conn.execute("""
+        INSERT INTO schema_meta (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    """, (LAST_ID_KEY, str(rows[-1][0])))
+
+
+def refresh_delivery_stats(conn, batch_size=REFRESH_BATCH):
+    """
+    Counts the delivery reports logged since the last refresh; returns how many there were.
+    Each batch is read and counted under one write lock, together with moving the high-water mark,
+    so a report is counted exactly once even when two refreshes run at the same time.
+    Without new reports it only reads, and never waits for the lock.
+    """
+    latest = conn.execute("SELECT MAX(id) FROM delivery_report").fetchone()[0]
+    if latest is None or latest <= last_counted_id(conn):
+        return 0
+    if conn.in_transaction:
+        conn.commit()
+    counted = 0
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("""
+                SELECT r.id, substr(r.logged_at, 1, 10), COALESCE(r.message_id, 0), r.status, r.latency_ms
+                FROM delivery_report r
+                WHERE r.id > ?
+                ORDER BY r.id
+                LIMIT ?
+            """, (last_counted_id(conn), batch_size)).fetchall()
+            if rows:
+                _count_batch(conn, rows)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        counted += len(rows)
+        if len(rows) < batch_size:
+            return counted
+
+
+def rebuild_delivery_stats(conn):
+    """Forgets the latency histogram and counts every delivery report again."""
+    with conn:
+        conn.execute("DELETE FROM delivery_latency_buckets")
+        conn.execute("DELETE FROM schema_meta WHERE key = ?", (LAST_ID_KEY,))
+    return refresh_delivery_stats(conn)
+
+
+def _range_where(date_from, date_to, alias):
+    clauses, params = [], []
+    if date_from:
+        clauses.append(f"{alias}.day >= ?")
+        params.append(date_from)
+    if date_to:
+        clauses.append(f"{alias}.day <= ?")
+        params.append(date_to)
+    return " AND ".join(clauses) or "1", params
+
+
+def _latency_histograms(conn, date_from, date_to, by_day):
+    """{(day or None, message_type): {bucket: count}} over the range."""
+    where, params = _range_where(date_from, date_to, "b")
+    day = "b.day" if by_day else "NULL"
+    histograms = defaultdict(dict)
+    for day_value, message_type, bucket, count in conn.execute(f"""
+        SELECT {day}, COALESCE(m.type, ?), b.bucket, SUM(b.count)
+        FROM delivery_latency_buckets b
+        LEFT JOIN messages m ON m.id = b.message_id
+        WHERE {where}
+        GROUP BY 1, 2, 3
+    """, [UNKNOWN_TYPE] + params):
+        histograms[(day_value, message_type)][bucket] = count
+    return histograms
+
+
+def fetch_daily_stats(conn, date_from=None, date_to=None):
+    """Returns [(day, message_type, sent, failed, failure_rate, median_latency_ms)], newest day first."""
+    where, params = _range_where(date_from, date_to, "s")
+    rows = conn.execute(f"""
+        SELECT s.day, s.message_type, s.sent, s.failed
+        FROM delivery_daily_stats s
+        WHERE {where}
+        ORDER BY s.day DESC, s.message_type
+    """, params).fetchall()
+    histograms = _latency_histograms(conn, date_from, date_to, by_day=True)
+    return [(day, message_type, sent, failed, failed / (sent + failed) if sent + failed else None,
+             histogram_median(histograms.get((day, message_type), {})))
+            for day, message_type, sent, failed in rows]
+
+
+def fetch_message_type_stats(conn, date_from=None, date_to=None):
+    """
+    Returns [(message_type, sent, failed, failure_rate, median_latency_ms)] over the whole range,
+    most sent first. The median comes from the day histograms added together.
+    """
+    where, params = _range_where(date_from, date_to, "s")
+    totals = conn.execute(f"""
+        SELECT s.message_type, SUM(s.sent), SUM(s.failed)
+        FROM delivery_daily_stats s
+        WHERE {where}
+        GROUP BY s.message_type
+        ORDER BY 2 DESC
+    """, params).fetchall()
+    histograms = _latency_histograms(conn, date_from, date_to, by_day=False)
+    return [(message_type, sent, failed, failed / (sent + failed) if sent + failed else None,
+             histogram_median(histograms.get((None, message_type), {})))
+            for message_type, sent, failed in totals]
+
+
+def _format_rate(rate):
+    return f"{rate * 100:.1f}%" if rate is not None else "-"
+
+
+# === MAIN ===
+if __name__ == "__main__":
+    # Run from the project root: python -m db.delivery_stats
+    parser = argparse.ArgumentParser(description="Delivery failure rates and latency per day and message type")
+    parser.add_argument("--from", dest="date_from", help="First day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", help="Last day (YYYY-MM-DD)")
+    parser.add_argument("--daily", action="store_true", help="One line per day and message type")
+    parser.add_argument("--rebuild", action="store_true", help="Count every report again instead of only new ones")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    start = time.perf_counter()
+    counted = rebuild_delivery_stats(conn) if args.rebuild else refresh_delivery_stats(conn)
+    print(f"✅ Counted the latency of {counted} new delivery reports in "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms (up to id {last_counted_id(conn)})")
+
+    if args.daily:
+        for day, message_type, sent, failed, rate, median in fetch_daily_stats(conn, args.date_from, args.date_to):
+            print(f"   {day}  {message_type:<20} {sent:>8} sent {failed:>6} failed {_format_rate(rate):>7}  "
+                  f"median {median if median is not None else '-'} ms")
+    else:
+        for message_type, sent, failed, rate, median in fetch_message_type_stats(conn, args.date_from, args.date_to):
+            print(f"📊 {message_type:<20} {sent:>8} sent {failed:>6} failed {_format_rate(rate):>7}  "
+                  f"median {median if median is not None else '-'} ms")
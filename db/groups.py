@@ -0,0 +1,188 @@
+import argparse
+import weakref
+
+from db.connection import get_connection
+
+# Contact groups and their membership (contact_group_map).
+# The group manager stages checkbox changes in memory and writes them here in one transaction;
+# "add all matching" and "remove all" are single INSERT ... SELECT / DELETE statements, so no
+# per-contact round trips are made no matter how many contacts they touch.
+# Member counts live in group_stats, kept current by triggers on contact_group_map, and the group
+# list is cached in-process: every write below calls groups_changed(), which drops the cache and
+# notifies the views registered with on_groups_changed().
+
+
+def ensure_group_stats_schema(conn):
+    """Creates group_stats and its triggers, and (re)counts the members of every group."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS group_stats (
+            group_id INTEGER PRIMARY KEY,
+            member_count INTEGER NOT NULL DEFAULT 0
+        );
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS group_stats_group_ai AFTER INSERT ON groups BEGIN
+            INSERT OR IGNORE INTO group_stats (group_id, member_count) VALUES (new.id, 0);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS group_stats_group_ad AFTER DELETE ON groups BEGIN
+            DELETE FROM group_stats WHERE group_id = old.id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS group_stats_map_ai AFTER INSERT ON contact_group_map BEGIN
+            INSERT INTO group_stats (group_id, member_count) VALUES (new.group_id, 1)
+            ON CONFLICT(group_id) DO UPDATE SET member_count = member_count + 1;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS group_stats_map_ad AFTER DELETE ON contact_group_map BEGIN
+            UPDATE group_stats SET member_count = member_count - 1 WHERE group_id = old.group_id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS group_stats_map_au AFTER UPDATE OF group_id ON contact_group_map BEGIN
+            UPDATE group_stats SET member_count = member_count - 1 WHERE group_id = old.group_id;
+            INSERT INTO group_stats (group_id, member_count) VALUES (new.group_id, 1)
+            ON CONFLICT(group_id) DO UPDATE SET member_count = member_count + 1;
+        END
+    """)
+    conn.execute("DELETE FROM group_stats")
+    conn.execute("""
+        INSERT INTO group_stats (group_id, member_count)
+        SELECT g.id, (SELECT COUNT(*) FROM contact_group_map m WHERE m.group_id = g.id) FROM groups g
+    """)
+    conn.commit()
+
+
+# --- Cached group list ---
+_groups = None
+_listeners = []
+
+
+def list_groups(conn):
+    """Returns [(id, name, status, member_count)] ordered by id; cached until the next change."""
+    global _groups
+    if _groups is None:
+        _groups = conn.execute("""
+            SELECT g.id, g.name, g.status, COALESCE(s.member_count, 0)
+            FROM groups g
+            LEFT JOIN group_stats s ON s.group_id = g.id
+            ORDER BY g.id
+        """).fetchall()
+    return _groups
+
+
+def on_groups_changed(callback):
+    """Calls `callback()` after every group change. Bound methods are held weakly, so a closed view drops out."""
+    _listeners.append(weakref.WeakMethod(callback) if hasattr(callback, "__self__") else lambda: callback)
+
+
+def groups_changed():
+    """Drops the cached group list and notifies the listeners; called after every committed change."""
+    global _groups
+    _groups = None
+    for ref in list(_listeners):
+        callback = ref()
+        if callback is None:
+            _listeners.remove(ref)
+            continue
+        try:
+            callback()
+        except RuntimeError:  # The widget behind it was deleted by Qt
+            _listeners.remove(ref)
+
+
+def create_group(conn, name):
+    """Raises sqlite3.IntegrityError when the name is taken."""
+    with conn:
+        conn.execute("INSERT INTO groups (name) VALUES (?)", (name,))
+    groups_changed()
+
+
+def rename_group(conn, group_id, name):
+    with conn:
+        conn.execute("UPDATE groups SET name = ? WHERE id = ?", (name, group_id))
+    groups_changed()
+
+
+def set_group_status(conn, group_id, status):
+    with conn:
+        conn.execute("UPDATE groups SET status = ? WHERE id = ?", (status, group_id))
+    groups_changed()
+
+
+def contact_filter(search="", rating=None):
+    """(where_sql, params) over `contacts c` for the group manager's search box and rating filter."""
+    clauses, params = [], []
+    if search:
+        clauses.append("(c.name LIKE ? OR c.whatsapp LIKE ?)")
+        params += [f"%{search}%"] * 2
+    if rating is not None:
+        clauses.append("c.rating = ?")
+        params.append(rating)
+    return " AND ".join(clauses) or "1", params
+
+
+def filtered_contacts(conn, search="", rating=None):
+    """Returns [(rowid, name, whatsapp, rating)] matching the filter, in rowid order."""
+    where, params = contact_filter(search, rating)
+    return conn.execute(f"SELECT c.rowid, c.name, c.whatsapp, c.rating FROM contacts c WHERE {where} "
+                        f"ORDER BY {'+c.rowid' if params else 'c.rowid'}", params).fetchall()
+
+
+def group_members(conn, group_id):
+    return {row[0] for row in conn.execute("SELECT contact_id FROM contact_group_map WHERE group_id = ?",
+                                           (group_id,))}
+
+
+def apply_membership_changes(conn, group_id, added, removed):
+    """Writes a staged diff (contact ids to add and to remove) in one transaction."""
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO contact_group_map (contact_id, group_id) VALUES (?, ?)",
+                         [(contact_id, group_id) for contact_id in added])
+        conn.executemany("DELETE FROM contact_group_map WHERE contact_id = ? AND group_id = ?",
+                         [(contact_id, group_id) for contact_id in removed])
+    groups_changed()
+
+
+def add_matching_to_group(conn, group_id, search="", rating=None):
+    """Adds every contact matching the filter to the group; returns the number newly added."""
+    where, params = contact_filter(search, rating)
+    with conn:
+        cursor = conn.execute(f"""
+            INSERT OR IGNORE INTO contact_group_map (contact_id, group_id)
+            SELECT c.rowid, ? FROM contacts c WHERE {where}
+        """, [group_id] + params)
+    groups_changed()
+    return cursor.rowcount
+
+
+def remove_all_from_group(conn, group_id):
+    """Empties the group; returns the number of contacts removed."""
+    with conn:
+        cursor = conn.execute("DELETE FROM contact_group_map WHERE group_id = ?", (group_id,))
+    groups_changed()
+    return cursor.rowcount
+
+
+# === MAIN ===
+if __name__ == "__main__":
+    # Run from the project root: python -m db.groups 3 --add-matching --rating 7
+    parser = argparse.ArgumentParser(description="Show or bulk-edit the members of a contact group")
+    parser.add_argument("group_id", type=int)
+    parser.add_argument("--search", default="", help="Name or WhatsApp substring")
+    parser.add_argument("--rating", type=int, help="Only contacts with this rating")
+    parser.add_argument("--add-matching", action="store_true", help="Add every contact matching the filter")
+    parser.add_argument("--remove-all", action="store_true", help="Remove every member")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    if args.remove_all:
+        print(f"🗑️ Removed {remove_all_from_group(conn, args.group_id)} contacts from group {args.group_id}")
+    if args.add_matching:
+        added = add_matching_to_group(conn, args.group_id, args.search, args.rating)
+        print(f"✅ Added {added} contacts to group {args.group_id}")
+    counts = {group_id: count for group_id, _, _, count in list_groups(conn)}
+    print(f"📋 Group {args.group_id}: {counts.get(args.group_id, 0)} members")
@@ -0,0 +1,93 @@
+import argparse
+
+from db.connection import get_connection
+
+# Secondary indexes of the application database.
+# Every index lives in INDEXES and is created by ensure_indexes() from the schema initializer,
+# so the full set can be read in one place. Changing the list means bumping INDEX_SET_VERSION and
+# appending a migration that runs ensure_indexes() again (db/migrations.py); it then drops the
+# indexes that left the set and refreshes the planner statistics.
+# Queries the views issue are checked against this set by `python -m db.check_query_plans`.
+
+INDEX_SET_VERSION = 1
+
+# (name, table, columns)
+INDEXES = [
+    # Segment filters (db/segments.py, db/birthdays.py)
+    ("idx_contacts_rating", "contacts", "rating"),
+    ("idx_contacts_recent_visit", "contacts", "recent_visit"),
+    ("idx_contacts_birthday_md", "contacts", "birthday_md"),
+    ("idx_group_map_group", "contact_group_map", "group_id, contact_id"),
+    ("idx_club_visits_club", "contact_club_visits", "club_id, weekday, contact_id, count"),
+    # Delivery history; contact_message_log(contact_id, ...) is already covered by its UNIQUE constraint
+    ("idx_message_log_message", "contact_message_log", "message_id"),
+    ("idx_delivery_report_whatsapp", "delivery_report", "whatsapp"),
+    ("idx_delivery_report_campaign", "delivery_report", "campaign_id"),
+    ("idx_delivery_report_logged_at", "delivery_report", "logged_at"),
+    ("idx_campaign_reports_sent_date", "campaign_reports", "sent_date"),
+    # Claims read the next pending items of one campaign in order
+    ("idx_campaign_items_state", "campaign_items", "campaign_id, state, position"),
+]
+
+INDEX_PREFIX = "idx_"  # Indexes with this prefix are owned by INDEXES; others (FTS, autoindexes) are left alone
+
+
+def ensure_meta_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """)
+
+
+def installed_index_version(conn):
+    ensure_meta_table(conn)
+    row = conn.execute("SELECT value FROM schema_meta WHERE key = 'index_set_version'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def ensure_indexes(conn):
+    """Creates missing indexes of INDEXES; on a version change also drops stale ones and runs ANALYZE."""
+    version = installed_index_version(conn)
+    with conn:
+        for name, table, columns in INDEXES:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+        if version == INDEX_SET_VERSION:
+            return
+
+        wanted = {name for name, _, _ in INDEXES}
+        stale = [name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE ? ESCAPE '\\'",
+            (INDEX_PREFIX.replace("_", "\\_") + "%",)) if name not in wanted]
+        for name in stale:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        conn.execute("""
+            INSERT INTO schema_meta (key, value) VALUES ('index_set_version', ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        """, (str(INDEX_SET_VERSION),))
+    conn.execute("ANALYZE")
+    print(f"✅ Index set v{INDEX_SET_VERSION} installed ({len(INDEXES)} indexes, {len(stale)} dropped).")
+
+
+def list_indexes(conn):
+    """Returns [(name, table, sql)] of the indexes present in the database."""
+    return conn.execute("""
+        SELECT name, tbl_name, sql FROM sqlite_master
+        WHERE type = 'index' ORDER BY tbl_name, name
+    """).fetchall()
+
+
+# === MAIN ===
+if __name__ == "__main__":
+    # Run from the project root: python -m db.indexes
+    parser = argparse.ArgumentParser(description="Show or install the index set")
+    parser.add_argument("--install", action="store_true", help="Create missing indexes now")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    if args.install:
+        ensure_indexes(conn)
+    print(f"📋 Installed index set: v{installed_index_version(conn)} (current: v{INDEX_SET_VERSION})")
+    for name, table, sql in list_indexes(conn):
+        print(f"   {table:<22} {name}{'' if sql else '  (automatic)'}")
@@ -0,0 +1,194 @@
+import argparse
+import sqlite3
+
+from auth.access import ensure_access_cache_schema
+from db.birthdays import clear_year_only_birthdays, ensure_birthday_index
+from db.campaigns import ensure_campaign_owner_schema, ensure_campaign_schema
+from db.club_visits import ensure_club_visits_schema
+from db.connection import DB_PATH, get_connection
+from db.contacts import CONTACT_FIELDS, DERIVED_COLUMNS, contacts_table_sql, ensure_search_index, rebuild_contacts_table
+from db.delivery_log import ensure_delivery_log_schema
+from db.delivery_stats import ensure_delivery_stats_schema
+from db.groups import ensure_group_stats_schema
+from db.indexes import ensure_indexes
+from db.reports import ensure_delivery_rollup_schema
+from db.segments import ensure_segments_schema
+
+# Schema migrations.
+# The database records the last migration it received in PRAGMA user_version. On startup
+# run_migrations() compares that one number with SCHEMA_VERSION and only runs the steps that are
+# missing, in order. Every step is idempotent, so a step interrupted before its version was
+# recorded is simply run again. A schema change is a new step appended to MIGRATIONS; existing
+# steps are never edited once released.
+
+
+def table_columns(conn, table):
+    return {info[1] for info in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+
+
+def create_base_tables(conn):
+    """Tables of the first release (users, contacts, messages, groups, reports, delivery logs)."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL CHECK (role IN ('admin', 'user')),
+            status TEXT NOT NULL DEFAULT 'active' CHECK (status IN ('active', 'inactive'))
+        );
+    """)
+    # Keyed by its implicit rowid; club visit counts live in contact_club_visits (db/club_visits.py)
+    cursor.execute(contacts_table_sql())
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            type TEXT NOT NULL,
+            content TEXT NOT NULL
+        );
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS campaign_reports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            contact_id INTEGER,
+            message TEXT NOT NULL,
+            status TEXT,
+            sent_date TEXT,
+            FOREIGN KEY(contact_id) REFERENCES contacts(rowid)
+        );
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS groups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            status TEXT DEFAULT 'active' CHECK (status IN ('active', 'inactive'))
+        );
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS contact_group_map (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            contact_id INTEGER NOT NULL,
+            group_id INTEGER NOT NULL,
+            FOREIGN KEY (contact_id) REFERENCES contacts(rowid),
+            FOREIGN KEY (group_id) REFERENCES groups(id),
+            UNIQUE(contact_id, group_id)
+        );
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS delivery_report (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            whatsapp TEXT NOT NULL,
+            status TEXT NOT NULL,
+            logged_at TEXT NOT NULL
+        );
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS contact_message_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            contact_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            sent_at TEXT NOT NULL,
+            FOREIGN KEY (contact_id) REFERENCES contacts(rowid),
+            FOREIGN KEY (message_id) REFERENCES messages(id),
+            UNIQUE(contact_id, message_id) -- Ensures a specific message is logged once per contact
+        );
+    """)
+    conn.commit()
+
+
+def rebuild_legacy_contacts(conn):
+    """
+    The very first schema keyed contacts by an `id` column and called recent_visit `last_visit`
+    (rating was TEXT). Rebuilds such a table into the canonical one, keeping id as the rowid that
+    campaign_reports and the maps already point at. Does nothing for any other layout.
+    """
+    existing = table_columns(conn, "contacts")
+    if "id" not in existing and "last_visit" not in existing:
+        return
+    columns = {name: name for name in CONTACT_FIELDS + [name for name, _ in DERIVED_COLUMNS] if name in existing}
+    if "last_visit" in existing and "recent_visit" not in existing:
+        columns["recent_visit"] = "last_visit"
+    if "rating" in columns:
+        columns["rating"] = "CAST(NULLIF(trim(rating), '') AS INTEGER)"
+
+    count = conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+    try:
+        conn.execute("BEGIN")
+        rebuild_contacts_table(conn, columns)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    print(f"✅ Rebuilt {count} contacts from the original id/last_visit layout.")
+
+
+# (version, description, step); append only
+MIGRATIONS = [
+    (1, "base tables", create_base_tables),
+    (2, "rebuild legacy id/last_visit contacts", rebuild_legacy_contacts),
+    (3, "club visits table", ensure_club_visits_schema),
+    (4, "contact search index", ensure_search_index),
+    (5, "birthday calendar index", ensure_birthday_index),
+    (6, "saved segments", ensure_segments_schema),
+    (7, "delivery report columns", ensure_delivery_log_schema),
+    (8, "campaigns and campaign items", ensure_campaign_schema),
+    (9, "index set", ensure_indexes),
+    (10, "remote access cache", ensure_access_cache_schema),
+    (11, "group member counts", ensure_group_stats_schema),
+    (12, "daily delivery rollup", ensure_delivery_rollup_schema),
+    (13, "delivery statistics per message type", ensure_delivery_stats_schema),
+    (14, "campaign run owners and heartbeats", ensure_campaign_owner_schema),
+    (15, "year-only birthdays out of the calendar", clear_year_only_birthdays),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending_migrations(conn):
+    current = schema_version(conn)
+    return [migration for migration in MIGRATIONS if migration[0] > current]
+
+
+def run_migrations(conn):
+    """Brings the database up to SCHEMA_VERSION; a database already there costs one PRAGMA read."""
+    current = schema_version(conn)
+    if current == SCHEMA_VERSION:
+        return current
+    if current > SCHEMA_VERSION:
+        print(f"⚠️ Database schema v{current} is newer than this version of ClubBot (v{SCHEMA_VERSION}).")
+        return current
+
+    for version, description, step in pending_migrations(conn):
+        try:
+            step(conn)
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"❌ Migration {version} ({description}) failed: {e}")
+            raise
+        conn.execute(f"PRAGMA user_version = {version}")
+        print(f"✅ Migration {version}: {description}")
+    return SCHEMA_VERSION
+
+
+# === MAIN ===
+if __name__ == "__main__":
+    # Run from the project root: python -m db.migrations
+    parser = argparse.ArgumentParser(description="Show or apply pending schema migrations")
+    parser.add_argument("--status", action="store_true", help="Only list pending migrations")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    print(f"📋 {DB_PATH}: schema v{schema_version(conn)} (current: v{SCHEMA_VERSION})")
+    pending = pending_migrations(conn)
+    if args.status:
+        for version, description, _ in pending:
+            print(f"   pending {version}: {description}")
+    else:
+        run_migrations(conn)
+        if not pending:
+            print("✅ Database schema is up to date.")
@@ -0,0 +1,214 @@
+import argparse
+from collections import namedtuple
+from datetime import date, timedelta
+
+from db.connection import get_connection
+
+# Delivery reports.
+# The sender records every send in delivery_report (db/delivery_log.py). The reports tab pages
+# through it by key, so the page number never matters, and reads its totals from delivery_daily: one
+# row per (day, campaign, message) kept current by a trigger on delivery_report. That makes the
+# summary cost depend on the number of days and campaigns, not on how many messages were sent.
+
+REPORT_PAGE_SIZE = 100
+SMALL_RANGE_ROWS = 20000  # A date range with at most this many reports is read by date and sorted per page
+
+# Sort keys of the detail list -> column; both are NOT NULL and indexed (see db/indexes.py), and
+# rowid breaks ties, so every page is an index range scan continuing from the previous page's last row
+SORT_COLUMNS = {
+    "date": "r.logged_at",
+    "number": "r.whatsapp",
+}
+
+# Summary groupings -> (key column of delivery_daily, label expression)
+ROLLUP_GROUPS = {
+    "day": ("d.day", "d.day"),
+    "campaign": ("d.campaign_id", "COALESCE(k.name, 'Campaign #' || k.id, '(no campaign)')"),
+    "message": ("d.message_id", "COALESCE(m.type || ': ' || substr(m.content, 1, 40), '(unknown message)')"),
+}
+
+ReportFilter = namedtuple("ReportFilter", ["date_from", "date_to", "campaign_id", "status"],
+                          defaults=(None, None, None, None))  # Dates as 'YYYY-MM-DD', both inclusive
+
+
+def ensure_delivery_rollup_schema(conn):
+    """Creates delivery_daily and its triggers, and builds it from the existing reports."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS delivery_daily (
+            day TEXT NOT NULL,
+            campaign_id INTEGER NOT NULL DEFAULT 0,  -- 0: not sent by a stored campaign
+            message_id INTEGER NOT NULL DEFAULT 0,   -- 0: unknown message
+            sent INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, campaign_id, message_id)
+        ) WITHOUT ROWID;
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS delivery_daily_ai AFTER INSERT ON delivery_report BEGIN
+            INSERT INTO delivery_daily (day, campaign_id, message_id, sent, failed)
+            VALUES (substr(new.logged_at, 1, 10), COALESCE(new.campaign_id, 0), COALESCE(new.message_id, 0),
+                    new.status = 'Sent', new.status <> 'Sent')
+            ON CONFLICT(day, campaign_id, message_id) DO UPDATE
+            SET sent = sent + excluded.sent, failed = failed + excluded.failed;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS delivery_daily_ad AFTER DELETE ON delivery_report BEGIN
+            UPDATE delivery_daily
+            SET sent = sent - (old.status = 'Sent'), failed = failed - (old.status <> 'Sent')
+            WHERE day = substr(old.logged_at, 1, 10) AND campaign_id = COALESCE(old.campaign_id, 0)
+              AND message_id = COALESCE(old.message_id, 0);
+        END
+    """)
+    rebuild_delivery_rollup(conn)
+    conn.commit()
+
+
+def rebuild_delivery_rollup(conn):
+    """Recomputes delivery_daily from delivery_report (one full scan); the triggers keep it current after that."""
+    conn.execute("DELETE FROM delivery_daily")
+    conn.execute("""
+        INSERT INTO delivery_daily (day, campaign_id, message_id, sent, failed)
+        SELECT substr(logged_at, 1, 10), COALESCE(campaign_id, 0), COALESCE(message_id, 0),
+               SUM(status = 'Sent'), SUM(status <> 'Sent')
+        FROM delivery_report
+        GROUP BY 1, 2, 3
+    """)
+
+
+def default_filter(days=30):
+    """The last `days` days, today included."""
+    today = date.today()
+    return ReportFilter((today - timedelta(days=days - 1)).isoformat(), today.isoformat())
+
+
+def _report_where(filters, date_indexed):
+    # "+" keeps SQLite from using an index for that filter, so the index of the sort column drives
+    # the page instead of SQLite reading and sorting every matching row for each page
+    date_column = "r.logged_at" if date_indexed else "+r.logged_at"
+    clauses, params = [], []
+    if filters.date_from:
+        clauses.append(f"{date_column} >= ?")
+        params.append(filters.date_from)
+    if filters.date_to:
+        clauses.append(f"{date_column} < date(?, '+1 day')")
+        params.append(filters.date_to)
+    if filters.campaign_id is not None:
+        clauses.append("+r.campaign_id = ?")
+        params.append(filters.campaign_id)
+    if filters.status:
+        clauses.append("r.status = ?")
+        params.append(filters.status)
+    return " AND ".join(clauses) or "1", params
+
+
+def fetch_report_page(conn, filters=ReportFilter(), sort="date", descending=True, after=None,
+                      limit=REPORT_PAGE_SIZE):
+    """
+    Returns up to `limit` rows of
+    (sort_value, id, logged_at, contact name, number, campaign, message type, status, latency_ms, error).
+    `after` is (sort_value, id) of the last row of the previous page, None for the first page.
+    """
+    column = SORT_COLUMNS[sort]
+    # Sorting by another column, a narrow date range is cheaper to read by date and sort than to
+    # find by walking the sort index; the rollup tells how many rows the range holds
+    date_indexed = column == "r.logged_at" or (
+        (filters.date_from or filters.date_to)
+        and sum(report_totals(conn, filters._replace(campaign_id=None, status=None))) <= SMALL_RANGE_ROWS)
+    where, params = _report_where(filters, date_indexed)
+    if after is not None:
+        where += f" AND ({column}, r.id) {'<' if descending else '>'} (?, ?)"
+        params += list(after)
+    direction = "DESC" if descending else "ASC"
+    return conn.execute(f"""
+        SELECT {column}, r.id, r.logged_at, c.name, r.whatsapp,
+               COALESCE(k.name, 'Campaign #' || k.id), m.type, r.status, r.latency_ms, r.error
+        FROM delivery_report r
+        LEFT JOIN contacts c ON c.rowid = r.contact_id
+        LEFT JOIN campaigns k ON k.id = r.campaign_id
+        LEFT JOIN messages m ON m.id = r.message_id
+        WHERE {where}
+        ORDER BY {column} {direction}, r.id {direction}
+        LIMIT ?
+    """, params + [limit]).fetchall()
+
+
+def _rollup_where(filters):
+    clauses, params = [], []
+    if filters.date_from:
+        clauses.append("d.day >= ?")
+        params.append(filters.date_from)
+    if filters.date_to:
+        clauses.append("d.day <= ?")
+        params.append(filters.date_to)
+    if filters.campaign_id is not None:
+        clauses.append("d.campaign_id = ?")
+        params.append(filters.campaign_id)
+    return " AND ".join(clauses) or "1", params
+
+
+def report_totals(conn, filters=ReportFilter()):
+    """(sent, failed) for the filter, from the rollup; the status filter zeroes the other count."""
+    where, params = _rollup_where(filters)
+    sent, failed = conn.execute(f"SELECT COALESCE(SUM(d.sent), 0), COALESCE(SUM(d.failed), 0) "
+                                f"FROM delivery_daily d WHERE {where}", params).fetchone()
+    if filters.status == "Sent":
+        return sent, 0
+    if filters.status == "Failed":
+        return 0, failed
+    return sent, failed
+
+
+def fetch_rollup(conn, filters=ReportFilter(), group_by="day"):
+    """
+    Returns [(label, sent, failed)] for each day, campaign or message of the filter, newest day / most sent first.
+    A status filter zeroes the other count and leaves out the rows without that status, as in report_totals().
+    """
+    key, label = ROLLUP_GROUPS[group_by]
+    where, params = _rollup_where(filters)
+    sent = "0" if filters.status == "Failed" else "SUM(d.sent)"
+    failed = "0" if filters.status == "Sent" else "SUM(d.failed)"
+    having = {"Sent": "HAVING SUM(d.sent) > 0", "Failed": "HAVING SUM(d.failed) > 0"}.get(filters.status, "")
+    order = "d.day DESC" if group_by == "day" else "2 DESC"
+    return conn.execute(f"""
+        SELECT {label}, {sent}, {failed}
+        FROM delivery_daily d
+        LEFT JOIN campaigns k ON k.id = d.campaign_id
+        LEFT JOIN messages m ON m.id = d.message_id
+        WHERE {where}
+        GROUP BY {key}
+        {having}
+        ORDER BY {order}
+    """, params).fetchall()
+
+
+def list_report_campaigns(conn):
+    """[(id, label)] of the stored campaigns, newest first, for the campaign filter."""
+    return conn.execute("""
+        SELECT id, COALESCE(name, 'Campaign #' || id) || ' (' || substr(created_at, 1, 10) || ')'
+        FROM campaigns ORDER BY id DESC
+    """).fetchall()
+
+
+# === MAIN ===
+if __name__ == "__main__":
+    # Run from the project root: python -m db.reports --by campaign --from 2026-01-01
+    parser = argparse.ArgumentParser(description="Summarize delivery reports from the daily rollup")
+    parser.add_argument("--from", dest="date_from", help="First day (YYYY-MM-DD), default 30 days ago")
+    parser.add_argument("--to", dest="date_to", help="Last day (YYYY-MM-DD), default today")
+    parser.add_argument("--campaign", type=int, help="Only this campaign id")
+    parser.add_argument("--by", choices=sorted(ROLLUP_GROUPS), default="day")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the rollup from delivery_report first")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    if args.rebuild:
+        with conn:
+            rebuild_delivery_rollup(conn)
+        print("✅ Rebuilt the daily delivery rollup.")
+    defaults = default_filter()
+    filters = ReportFilter(args.date_from or defaults.date_from, args.date_to or defaults.date_to, args.campaign)
+    sent, failed = report_totals(conn, filters)
+    print(f"📊 {filters.date_from} .. {filters.date_to}: {sent} sent, {failed} failed")
+    for label, day_sent, day_failed in fetch_rollup(conn, filters, args.by):
+        print(f"   {label:<50} {day_sent:>8} sent {day_failed:>6} failed")
@@ -0,0 +1,167 @@
+import argparse
+import json
+
+from db.birthdays import birthday_window
+from db.club_visits import WEEK_DAYS, club_ids
+from db.connection import get_connection
+
+# Contact segments.
+# A segment is a small filter tree stored as JSON, compiled into one SQL WHERE clause over
+# `contacts c` so filtering, counting and listing all run in SQLite on indexed columns:
+#
+#   {"birthday_within": 21}                        birthday in the next 21 days (wraps Dec -> Jan)
+#   {"rating_min": 6}, {"rating_max": 3}           rating range (inclusive)
+#   {"group": 4}                                   member of group id 4
+#   {"visited_within": 30}                         recent_visit in the last 30 days
+#   {"not_visited_within": 90}                     no recent_visit in the last 90 days
+#   {"club_visits": {"club": "tabu", "min": 3, "day": "fri"}}   visit count threshold ("day" optional)
+#   {"all": [...]}, {"any": [...]}, {"not": {...}} AND / OR / NOT combinations
+
+SEGMENT_KEYS = ("birthday_within", "rating_min", "rating_max", "group", "visited_within",
+                "not_visited_within", "club_visits", "all", "any", "not")
+
+
+class SegmentError(ValueError):
+    pass
+
+
+def ensure_segments_schema(conn):
+    """Saved segments table; the indexes the filters rely on are part of db/indexes.py."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS segments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            definition TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+    """)
+    conn.commit()
+
+
+def _int(definition, key):
+    try:
+        return int(definition[key])
+    except (TypeError, ValueError):
+        raise SegmentError(f"'{key}' needs a number, got {definition[key]!r}")
+
+
+def _compile(conn, definition):
+    if not isinstance(definition, dict) or len(definition) != 1:
+        raise SegmentError(f"Each filter must be an object with one key, got {definition!r}")
+    key = next(iter(definition))
+    value = definition[key]
+
+    if key in ("all", "any"):
+        if not isinstance(value, list) or not value:
+            raise SegmentError(f"'{key}' needs a non-empty list of filters")
+        parts = [_compile(conn, child) for child in value]
+        joiner = " AND " if key == "all" else " OR "
+        return "(" + joiner.join(sql for sql, _ in parts) + ")", [p for _, params in parts for p in params]
+    if key == "not":
+        sql, params = _compile(conn, value)
+        return f"NOT {sql}", params
+    if key == "birthday_within":
+        return birthday_window(_int(definition, key))
+    if key == "rating_min":
+        return "c.rating >= ?", [_int(definition, key)]
+    if key == "rating_max":
+        return "c.rating <= ?", [_int(definition, key)]
+    if key == "group":
+        return "c.rowid IN (SELECT contact_id FROM contact_group_map WHERE group_id = ?)", [_int(definition, key)]
+    if key == "visited_within":
+        return "c.recent_visit >= date('now', ?)", [f"-{_int(definition, key)} days"]
+    if key == "not_visited_within":
+        return "(c.recent_visit IS NULL OR c.recent_visit < date('now', ?))", [f"-{_int(definition, key)} days"]
+    if key == "club_visits":
+        if not isinstance(value, dict) or "club" not in value:
+            raise SegmentError("'club_visits' needs at least a 'club'")
+        club_id = club_ids(conn).get(value["club"])
+        if club_id is None:
+            raise SegmentError(f"Unknown club: {value['club']!r}")
+        sql = "SELECT contact_id FROM contact_club_visits WHERE club_id = ?"
+        params = [club_id]
+        if value.get("day"):
+            if value["day"] not in WEEK_DAYS:
+                raise SegmentError(f"Unknown day: {value['day']!r}")
+            sql += " AND weekday = ?"
+            params.append(WEEK_DAYS.index(value["day"]))
+        sql += " GROUP BY contact_id HAVING SUM(count) >= ?"
+        params.append(_int(value, "min") if "min" in value else 1)
+        return f"c.rowid IN ({sql})", params
+    raise SegmentError(f"Unknown filter '{key}'. Available: {', '.join(SEGMENT_KEYS)}")
+
+
+def compile_segment(conn, definition):
+    """Returns (where_sql, params) over `contacts c`; an empty definition selects everyone."""
+    if not definition:
+        return "1", []
+    return _compile(conn, definition)
+
+
+def count_segment(conn, definition):
+    where, params = compile_segment(conn, definition)
+    return conn.execute(f"SELECT COUNT(*) FROM contacts c WHERE {where}", params).fetchone()[0]
+
+
+def segment_contacts(conn, definition, columns=("rowid", "name", "whatsapp"), limit=None):
+    """Contacts of the segment as rows of `columns`, in rowid order."""
+    where, params = compile_segment(conn, definition)
+    # "+c.rowid" keeps SQLite from scanning the whole table in rowid order to skip the sort;
+    # a filtered segment is read through its index and the (smaller) result sorted instead
+    order = "+c.rowid" if definition else "c.rowid"
+    sql = f"SELECT {', '.join(f'c.{col}' for col in columns)} FROM contacts c WHERE {where} ORDER BY {order}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params = params + [limit]
+    return conn.execute(sql, params).fetchall()
+
+
+# --- Saved segments ---
+def save_segment(conn, name, definition):
+    compile_segment(conn, definition)  # Refuse to store a filter that does not compile
+    with conn:
+        conn.execute("""
+            INSERT INTO segments (name, definition, created_at, updated_at)
+            VALUES (?, ?, datetime('now'), datetime('now'))
+            ON CONFLICT(name) DO UPDATE SET definition = excluded.definition, updated_at = excluded.updated_at
+        """, (name, json.dumps(definition)))
+
+
+def load_segments(conn):
+    """Returns [(id, name, definition)] ordered by name."""
+    rows = conn.execute("SELECT id, name, definition FROM segments ORDER BY name").fetchall()
+    return [(segment_id, name, json.loads(definition)) for segment_id, name, definition in rows]
+
+
+def delete_segment(conn, name):
+    with conn:
+        conn.execute("DELETE FROM segments WHERE name = ?", (name,))
+
+
+# === MAIN ===
+if __name__ == "__main__":
+    # Run from the project root: python -m db.segments
+    parser = argparse.ArgumentParser(description="Count, preview and save contact segments")
+    parser.add_argument("definition", nargs="?", help='Filter as JSON, e.g. \'{"all": [{"rating_min": 6}, {"group": 2}]}\'')
+    parser.add_argument("--save", metavar="NAME", help="Store the filter as a named segment")
+    parser.add_argument("--delete", metavar="NAME", help="Delete a saved segment")
+    parser.add_argument("--show", type=int, default=5, help="Number of matching contacts to print")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    if args.delete:
+        delete_segment(conn, args.delete)
+        print(f"🗑️ Deleted segment '{args.delete}'")
+    elif args.definition:
+        definition = json.loads(args.definition)
+        print(f"📋 {count_segment(conn, definition)} contacts match")
+        for rowid, name, number in segment_contacts(conn, definition, limit=args.show):
+            print(f"   #{rowid} {name} {number}")
+        if args.save:
+            save_segment(conn, args.save, definition)
+            print(f"✅ Saved segment '{args.save}'")
+    else:
+        for segment_id, name, definition in load_segments(conn):
+            print(f"#{segment_id} {name}: {count_segment(conn, definition)} contacts  {json.dumps(definition)}")
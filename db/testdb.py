@@ -1,6 +1,7 @@
-import sqlite3
+# Run from the project root: python -m db.testdb
+from db.connection import get_connection
 
-conn = sqlite3.connect("clubbot.db")
+conn = get_connection()
 cursor = conn.cursor()
 
 cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
@@ -1,17 +1,29 @@
+from startup_timing import startup_timer  # First import, so the timer also covers the imports below
+
 import sys
 from PyQt5.QtWidgets import QApplication, QMainWindow, QTabWidget, QMessageBox, QDialog # Added QDialog
 from PyQt5.QtGui import QIcon
 from db.db_init import init_db
 
-# Import your view tabs
-from views.contacts_view2 import ContactsTab
-from views.messages_view import MessagesTab
-from views.campaign_view import CampaignsTab
-from views.reports_view import ReportsTab
+# Tabs are imported and built the first time they are shown (see views/lazy_tab.py)
+from views.lazy_tab import LazyTab
 
 # Import the new login and user management components
 from views.login_dialog import LoginDialog
-from views.user_management_tab import UserManagementTab
+
+# (title, "module:ClassName")
+MAIN_TABS = [
+    ("Campaign", "views.campaign_view:CampaignsTab"),
+    ("Contacts", "views.contacts_view2:ContactsTab"),
+    ("Messages", "views.messages_view:MessagesTab"),
+    ("Reports", "views.reports_view:ReportsTab"),
+]
+ADMIN_TABS = [
+    ("Manage Users", "views.user_management_tab:UserManagementTab"),
+]
+
+startup_timer.mark("imports")
+
 
 class ClubBotApp(QMainWindow):
     def __init__(self):
@@ -20,7 +32,8 @@ class ClubBotApp(QMainWindow):
         self.setGeometry(200, 100, 1000, 600)
         self.setWindowIcon(QIcon("icon.png")) # Assuming you have an icon.png in your root directory
 
-        init_db()  # Initialize database schema (including the 'users' table)
+        init_db()  # Brings the database schema up to date (only reads its version when current)
+        startup_timer.mark("db init")
 
         self.logged_in_user_id = None
         self.logged_in_username = None
@@ -31,7 +44,9 @@ class ClubBotApp(QMainWindow):
     def show_login_and_init_ui(self):
         """Displays the login dialog and initializes the main UI upon successful login."""
         login_dialog = LoginDialog(self)
-        if login_dialog.exec_() == QDialog.Accepted:
+        accepted = login_dialog.exec_() == QDialog.Accepted
+        startup_timer.mark("login")
+        if accepted:
             # Login successful, store user info
             self.logged_in_user_id = login_dialog.logged_in_user_id
             self.logged_in_username = login_dialog.logged_in_username
@@ -45,21 +60,31 @@ class ClubBotApp(QMainWindow):
             QApplication.quit()
 
     def initUI(self):
-        """Initializes the main application tabs based on user role."""
+        """Adds the main tabs based on user role; each one is built when first opened."""
         tabs = QTabWidget()
 
-        # Always add core tabs
-        tabs.addTab(CampaignsTab(), "Campaign")
-        tabs.addTab(ContactsTab(), "Contacts")
-        tabs.addTab(MessagesTab(), "Messages")
-        tabs.addTab(ReportsTab(), "Reports")
-
-        # Conditionally add User Management tab for admins
-        if self.logged_in_role == 'admin':
-            tabs.addTab(UserManagementTab(), "Manage Users")
-            # Removed: QMessageBox.information(self, "Admin Access", "Logged in as Admin. 'Manage Users' tab is available.")
+        tab_list = MAIN_TABS + (ADMIN_TABS if self.logged_in_role == 'admin' else [])
+        for title, target in tab_list:
+            tabs.addTab(LazyTab(target), title)
+        tabs.widget(0).built.connect(lambda widget: startup_timer.finish("first tab", tab=tab_list[0][0]))
 
         self.setCentralWidget(tabs)
+        startup_timer.mark("main window")
+
+    def closeEvent(self, event):
+        # Tabs with work in progress (a running campaign) get to stop it, or to keep the window open
+        tabs = self.centralWidget()
+        for index in range(tabs.count() if tabs is not None else 0):
+            widget = tabs.widget(index).widget  # None for tabs never opened
+            if hasattr(widget, "shutdown") and not widget.shutdown():
+                event.ignore()
+                return
+        super().closeEvent(event)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not startup_timer.finished and "first paint" not in dict(startup_timer.phases):
+            startup_timer.mark("first paint")
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
@@ -1,115 +1,172 @@
-import os
+import sys
 import time
-import json
-import random
+import signal
 import argparse
-import sqlite3
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-# === CONFIGURATION ===
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-CHROME_PROFILE_PATH = os.path.join(BASE_DIR, "profile1")
-CHROMEDRIVER_PATH = os.path.join(BASE_DIR, "chromedriver.exe")
-TEMP_DATA_PATH = os.path.join(BASE_DIR, "campaign_data.json")
-DB_PATH = os.path.join(BASE_DIR, "db", "clubbot.db")
-
-options = webdriver.ChromeOptions()
-options.add_argument(f"--user-data-dir={CHROME_PROFILE_PATH}")
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
-options.add_argument("--disable-extensions")
-options.add_argument("--disable-gpu")
-
-# === DB Logging ===
-def log_delivery(number, status):
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO delivery_report (whatsapp, status, logged_at)
-            VALUES (?, ?, datetime('now'))
-        """, (number, status))
-        conn.commit()
-        conn.close()
-        print(f"📋 Report logged for {number} [{status}]")
-    except Exception as e:
-        print(f"⚠️ Failed to log report for {number}: {str(e)}")
+import threading
+
+from db.campaigns import (
+    CAMPAIGN_COMPLETED, STATE_IN_FLIGHT, STATE_PENDING, CampaignBusyError, RunHeartbeat,
+    campaign_progress, finish_run, get_campaign, iter_claimed_items, release_expired, start_run, unclaim_items
+)
+from db.connection import get_connection
+from db.delivery_log import DeliveryEvent, DeliveryLogWriter
+from campaign.events import EVENT_FINISHED, EVENT_STARTED, EventWriter, LogStream
+from campaign.sender import SenderPool, WorkItem
+from campaign.transports import (
+    TRANSPORTS, CHROMEDRIVER_PATH, WHATSAPP_URL, chrome_options, profile_dir, transport_factory
+)
+
+print_lock = threading.Lock()  # Workers report from their own threads
 
 # === Open WhatsApp Only ===
-def open_whatsapp_only():
-    driver = webdriver.Chrome(service=Service(CHROMEDRIVER_PATH), options=options)
-    driver.get("https://web.whatsapp.com")
-    print("✅ WhatsApp Web opened. Scan QR if needed.")
+def open_whatsapp_only(worker_index=0):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    # Each sender worker has its own profile; open it once to scan the QR code
+    driver = webdriver.Chrome(service=Service(CHROMEDRIVER_PATH), options=chrome_options(profile_dir(worker_index)))
+    driver.get(WHATSAPP_URL)
+    print(f"✅ WhatsApp Web opened with profile {worker_index + 1}. Scan QR if needed.")
     input("⏳ Press Enter here to close the browser when you're done...\n")
     driver.quit()
 
-# === Send Messages ===
-def send_campaign_messages():
-    with open(TEMP_DATA_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
+# === Stop Requests ===
+def watch_for_stop(stream, stop):
+    # The campaign tab writes "stop" on our stdin; end of input means the tab is gone, so stop as well
+    for line in stream:
+        if line.strip() == "stop":
+            break
+    print("⏹️ Stop requested: finishing the messages already handed to the sessions...")
+    stop.set()
 
-    numbers = data["numbers"]
-    messages = data["messages"]
-    min_delay = int(data.get("min_delay", 1))
-    max_delay = int(data.get("max_delay", 3))
-
-    if len(numbers) != len(messages):
-        print("❌ Mismatch: numbers and messages length differ")
+# === Send Messages ===
+def send_campaign_messages(campaign_id, workers=None, max_per_minute=None, transport=None, events=None, resume=False,
+                           stop=None, abort=None):
+    """
+    Sends the pending messages of a stored campaign and returns its final status, or None when it
+    could not be started. Setting the `stop` event ends the run after the messages already claimed;
+    setting `abort` as well also drops the claimed messages no session has started sending.
+    """
+    stop = stop or threading.Event()
+    conn = get_connection()
+    campaign = get_campaign(conn, campaign_id)
+    if campaign is None:
+        print(f"❌ Campaign #{campaign_id} not found")
         return
 
-    driver = webdriver.Chrome(service=Service(CHROMEDRIVER_PATH), options=options)
-    driver.get("https://web.whatsapp.com")
-    print("✅ WhatsApp Web opened. Waiting to load...")
-    time.sleep(10)
-
-    for idx, number in enumerate(numbers):
-        try:
-            message = messages[idx]
-
-            driver.get(f"https://web.whatsapp.com/send?phone={number}&text=")
-            input_xpath = "//div[@contenteditable='true' and @role='textbox' and contains(@aria-label, 'Type a message')]"
-            WebDriverWait(driver, 30).until(EC.presence_of_element_located((By.XPATH, input_xpath)))
-            msg_box = driver.find_element(By.XPATH, input_xpath)
-            msg_box.click()
-            time.sleep(1)
-
-            # Send line by line with SHIFT+ENTER for formatting
-            lines = message.strip().split("\n")
-            for i, line in enumerate(lines):
-                msg_box.send_keys(line)
-                if i < len(lines) - 1:
-                    msg_box.send_keys(Keys.SHIFT + Keys.ENTER)
-            msg_box.send_keys(Keys.ENTER)
-
-            print(f"✅ Sent to {number}")
-            log_delivery(number, "Sent")
-
-            delay = random.randint(min_delay, max_delay)
-            print(f"⏳ Waiting for {delay} seconds...")
-            time.sleep(delay)
-
-        except Exception as e:
-            screenshot_path = os.path.join(BASE_DIR, f"error_{number}.png")
-            driver.save_screenshot(screenshot_path)
-            print(f"❌ Failed to send to {number}: {e} (screenshot saved)")
-            log_delivery(number, "Failed")
-
-    driver.quit()
-    print("🎉 Campaign completed.")
+    try:
+        token = start_run(conn, campaign_id)
+    except CampaignBusyError as e:
+        print(f"❌ {e}")
+        return
+    if resume:
+        released = release_expired(conn, campaign_id)
+        if released:
+            print(f"♻️ {released} message(s) of the interrupted run are pending again")
+
+    # The command line wins over the settings stored with the campaign
+    workers = workers or campaign["workers"]
+    max_per_minute = max_per_minute or campaign["max_per_minute"]
+    transport = transport or campaign["transport"]
+    pending = campaign_progress(conn, campaign_id)[STATE_PENDING]
+
+    results = {"Sent": 0, "Failed": 0}
+    details = {}  # Campaign item id -> (contact_id, message_id) of claimed items
+    delivery_log = DeliveryLogWriter(token).start()  # Batched writes from one thread, flushed on close
+
+    def on_result(item, status, worker_index):
+        with print_lock:
+            results[status] += 1
+            if events:
+                events.item(item, status, worker_index)
+            elif status == "Sent":
+                print(f"✅ Sent to {item.number}", flush=True)
+            else:
+                print(f"❌ Failed to send to {item.number}: {item.error} (after {item.attempts} attempts)", flush=True)
+        contact_id, message_id = details.pop(item.index)
+        delivery_log.record(DeliveryEvent(
+            item.index, item.number, status,
+            campaign_id=campaign_id,
+            contact_id=contact_id,
+            message_id=message_id,
+            attempts=item.attempts,
+            latency_ms=int(item.latency * 1000) if item.latency is not None else None,
+            error=f"{item.error_class}: {item.error}" if status != "Sent" else None,
+        ))
+
+    def claimed_items():
+        # Claimed from the database a few at a time, as the workers need them
+        for item_id, number, message, contact_id, message_id in iter_claimed_items(
+                conn, campaign_id, token=token, lost=lambda: heartbeat.lost or stop.is_set()):
+            details[item_id] = (contact_id, message_id)
+            yield WorkItem(item_id, number, message)
+
+    print(f"✅ Starting {workers} {transport} session(s) for {pending} messages of campaign #{campaign_id}...")
+    if events:
+        events.emit(EVENT_STARTED, campaign_id=campaign_id, items=pending, workers=workers, transport=transport)
+    started = time.perf_counter()
+    heartbeat = RunHeartbeat(campaign_id, token).start()
+    pool = SenderPool(transport_factory(transport, **campaign["transport_options"]), workers=workers,
+                      min_delay=campaign["min_delay"], max_delay=campaign["max_delay"],
+                      max_per_minute=max_per_minute, on_result=on_result, abort=abort)
+    error = False
+    try:
+        pool.run(claimed_items())
+        if pool.dropped:
+            unclaim_items(conn, [item.index for item in pool.dropped], token)
+    except Exception:
+        error = True
+        raise
+    finally:
+        # The pool has drained (or given up waiting, when aborted), so no late results get lost
+        delivery_log.close()
+        heartbeat.stop()
+        # Also when interrupted: completed, or stopped / failed with items left
+        status = finish_run(conn, campaign_id, token, error)
+    if events:
+        events.emit(EVENT_FINISHED, campaign_id=campaign_id, sent=results["Sent"], failed=results["Failed"],
+                    elapsed_ms=int((time.perf_counter() - started) * 1000), status=status)
+    if status == CAMPAIGN_COMPLETED:
+        print("🎉 Campaign completed.")
+    else:
+        progress = campaign_progress(conn, campaign_id)
+        print(f"⏹️ Campaign #{campaign_id} {status} with {progress[STATE_PENDING] + progress[STATE_IN_FLIGHT]} "
+              f"message(s) left; resume it to send them.")
+    return status
 
 # === MAIN ===
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--open", action="store_true", help="Open WhatsApp only")
-    parser.add_argument("--send", action="store_true", help="Send campaign messages")
+    parser.add_argument("--send", action="store_true", help="Send the pending messages of --campaign-id")
+    parser.add_argument("--resume", action="store_true",
+                        help="Like --send, after returning the messages a stopped run left in flight to pending")
+    parser.add_argument("--campaign-id", type=int, help="Campaign stored by the campaign tab (see python -m db.campaigns)")
+    parser.add_argument("--workers", type=int, default=None, help="Number of parallel WhatsApp sessions")
+    parser.add_argument("--profile", type=int, default=1, help="Profile to open with --open (1 = first worker)")
+    parser.add_argument("--max-per-minute", type=int, default=None, help="Global cap across all sessions")
+    parser.add_argument("--transport", choices=list(TRANSPORTS), default=None,
+                        help="How messages are delivered (default: the campaign's transport)")
+    parser.add_argument("--events", action="store_true",
+                        help="Write newline-delimited JSON events on stdout (used by the campaign tab)")
     args = parser.parse_args()
 
     if args.open:
-        open_whatsapp_only()
-    elif args.send:
-        send_campaign_messages()
+        open_whatsapp_only(args.profile - 1)
+    elif args.send or args.resume:
+        if args.campaign_id is None:
+            parser.error("--send and --resume need --campaign-id")
+        events = None
+        stop = threading.Event()
+        abort = threading.Event()
+        if args.events:
+            # Plain prints become "log" events so stdout carries nothing but JSON lines
+            events = EventWriter(sys.stdout)
+            sys.stdout = LogStream(events)
+            threading.Thread(target=watch_for_stop, args=(sys.stdin, stop), daemon=True).start()
+        # terminate() from the campaign tab: stop sending, let the sends under way report their results
+        # (bounded by campaign/sender.py ABORT_TIMEOUT) and exit with the run recorded as stopped
+        signal.signal(signal.SIGTERM, lambda signum, frame: (stop.set(), abort.set()))
+        status = send_campaign_messages(args.campaign_id, args.workers, args.max_per_minute, args.transport, events,
+                                        resume=args.resume, stop=stop, abort=abort)
+        sys.exit(0 if status == CAMPAIGN_COMPLETED else 1)
@@ -0,0 +1,85 @@
+import argparse
+import json
+import os
+import statistics
+import time
+from datetime import datetime
+
+# Startup timing.
+# main.py imports this module first and marks each startup phase; when the first tab is ready
+# the phase durations are printed and appended to logs/startup.log (one JSON object per run),
+# so regressions show up when comparing runs:  python startup_timing.py --last 10
+# Time spent waiting for the user in the login dialog is reported but not counted.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STARTUP_LOG = os.path.join(BASE_DIR, "logs", "startup.log")
+STARTUP_BUDGET_MS = 1000  # Process start to first interactive tab, login excluded
+
+USER_WAIT_PHASES = ("login",)
+
+
+class StartupTimer:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.phases = []  # (name, ms)
+        self.finished = False
+
+    def mark(self, phase):
+        """Ends `phase`: records the time since the previous mark."""
+        now = time.perf_counter()
+        self.phases.append((phase, round((now - self.last) * 1000, 1)))
+        self.last = now
+
+    def total_ms(self):
+        return round(sum(ms for phase, ms in self.phases if phase not in USER_WAIT_PHASES), 1)
+
+    def finish(self, phase, **details):
+        """Marks the last phase, prints the report and appends it to STARTUP_LOG (once per run)."""
+        if self.finished:
+            return
+        self.finished = True
+        self.mark(phase)
+        total = self.total_ms()
+        record = {"ts": datetime.now().isoformat(timespec="seconds"), "total_ms": total,
+                  "phases": dict(self.phases), **details}
+        print("⏱️ Startup: " + ", ".join(f"{phase} {ms:.0f} ms" for phase, ms in self.phases)
+              + f" -> interactive in {total:.0f} ms (login excluded)")
+        if total > STARTUP_BUDGET_MS:
+            print(f"⚠️ Startup took {total:.0f} ms, over the {STARTUP_BUDGET_MS} ms budget.")
+        try:
+            os.makedirs(os.path.dirname(STARTUP_LOG), exist_ok=True)
+            with open(STARTUP_LOG, "a", encoding="utf-8") as log:
+                log.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"⚠️ Could not write {STARTUP_LOG}: {e}")
+
+
+startup_timer = StartupTimer()
+
+
+def load_runs(path=STARTUP_LOG):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as log:
+        return [json.loads(line) for line in log if line.strip()]
+
+
+# === MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize recorded application startups")
+    parser.add_argument("--last", type=int, default=10, help="Number of recent runs to show")
+    args = parser.parse_args()
+
+    runs = load_runs()[-args.last:]
+    if not runs:
+        print(f"📋 No startups recorded yet in {STARTUP_LOG}")
+    for run in runs:
+        phases = ", ".join(f"{phase} {ms:.0f}" for phase, ms in run["phases"].items())
+        print(f"{run['ts']}  {run['total_ms']:>7.0f} ms  ({phases})")
+    if runs:
+        print(f"📊 Median over {len(runs)} runs: {statistics.median(r['total_ms'] for r in runs):.0f} ms "
+              f"(budget {STARTUP_BUDGET_MS} ms)")
+        for phase in runs[-1]["phases"]:
+            values = [r["phases"][phase] for r in runs if phase in r["phases"]]
+            print(f"   {phase:<12} median {statistics.median(values):.0f} ms")
@@ -0,0 +1,14 @@
+import sqlite3
+
+import pytest
+
+from db.migrations import run_migrations
+
+
+@pytest.fixture
+def conn():
+    """A fresh in-memory database at the current schema."""
+    connection = sqlite3.connect(":memory:")
+    run_migrations(connection)
+    yield connection
+    connection.close()
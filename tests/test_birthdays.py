@@ -0,0 +1,46 @@
+import pytest
+
+from db.birthdays import clear_year_only_birthdays, parse_birthday
+from db.csv_import import import_contacts_csv
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1990-05-12", 512),
+    ("12/05/1990", 512),
+    ("05/25/1990", 525),  # Day first unless impossible
+    ("12 May 1990", 512),
+    ("May 12", 512),
+    ("--05-12", 512),
+    ("19900512", 512),
+    ("33005", 512),  # Spreadsheet serial day number
+    ("29/02", 229),
+    ("1990", None),  # Year only
+    ("2005", None),
+    ("31/02/1990", None),
+    ("unknown", None),
+    ("", None),
+])
+def test_parse_birthday(text, expected):
+    assert parse_birthday(text) == expected
+
+
+def test_import_counts_only_its_own_unreadable_birthdays(conn, tmp_path):
+    first = tmp_path / "first.csv"
+    first.write_text("name,whatsapp,birthday\nJohn Smith,447700900123,sometime in spring\n", encoding="utf-8")
+    second = tmp_path / "second.csv"
+    second.write_text("name,whatsapp,birthday\nJane Doe,447700900456,1990\nAl Roe,447700900789,3rd of June\n",
+                      encoding="utf-8")
+
+    assert import_contacts_csv(conn, str(first)).unreadable_birthdays == 1
+    result = import_contacts_csv(conn, str(second))
+
+    assert result.unreadable_birthdays == 1  # "1990"; John's birthday from the first import is not counted again
+    assert conn.execute("SELECT birthday_md FROM contacts WHERE whatsapp = '447700900789'").fetchone()[0] == 603
+
+
+def test_year_only_birthdays_leave_the_calendar(conn):
+    conn.execute("INSERT INTO contacts (name, whatsapp, birthday) VALUES ('John Smith', '447700900123', '1990')")
+    conn.execute("UPDATE contacts SET birthday_md = 612")  # As indexed before year-only values were recognised
+    clear_year_only_birthdays(conn)
+
+    assert conn.execute("SELECT birthday_md FROM contacts").fetchone()[0] is None
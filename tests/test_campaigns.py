@@ -0,0 +1,22 @@
+from campaign.planner import PlanItem
+from db.campaigns import (STATE_IN_FLIGHT, STATE_PENDING, STATE_SENT, claim_items, create_campaign,
+                          record_item_outcomes, release_expired)
+
+
+def item_state(conn, item_id):
+    return conn.execute("SELECT state, attempts, owner_token FROM campaign_items WHERE id = ?",
+                        (item_id,)).fetchone()
+
+
+def test_outcome_of_a_taken_over_item_is_skipped(conn):
+    campaign_id = create_campaign(conn, [PlanItem(None, "447700900123", "Ann", None, "Hi Ann")])
+    (item_id, *_), = claim_items(conn, campaign_id, token="old")
+    release_expired(conn, campaign_id, lease_seconds=0)  # The old run's lease ran out
+    assert item_state(conn, item_id) == (STATE_PENDING, 0, None)
+    claim_items(conn, campaign_id, token="new")
+
+    assert record_item_outcomes(conn, [(STATE_SENT, 1, None, item_id)], "old") == 1
+    assert item_state(conn, item_id) == (STATE_IN_FLIGHT, 0, "new")
+
+    assert record_item_outcomes(conn, [(STATE_SENT, 1, None, item_id)], "new") == 0
+    assert item_state(conn, item_id) == (STATE_SENT, 1, "new")
@@ -0,0 +1,40 @@
+from db.club_visits import load_visits
+from db.csv_import import import_contacts_csv
+
+
+def write_csv(tmp_path, text, name="contacts.csv"):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def contact_rowid(conn, number):
+    return conn.execute("SELECT rowid FROM contacts WHERE whatsapp = ?", (number,)).fetchone()[0]
+
+
+def test_reimport_with_blank_visit_cells_keeps_visits(conn, tmp_path):
+    import_contacts_csv(conn, write_csv(tmp_path, "name,whatsapp,tabu_fri,dear_d_mon\n"
+                                                  "John Smith,447700900123,3,2\n"))
+    result = import_contacts_csv(conn, write_csv(tmp_path, "name,whatsapp,tabu_fri,dear_d_mon\n"
+                                                           "John Smith,447700900123,,\n", "again.csv"))
+
+    assert result.imported == 1
+    assert load_visits(conn, contact_rowid(conn, "447700900123")) == {"tabu": {"fri": 3}, "dear_darling": {"mon": 2}}
+
+
+def test_import_updates_only_the_cells_present(conn, tmp_path):
+    import_contacts_csv(conn, write_csv(tmp_path, "name,whatsapp,tabu_fri,tabu_sat,leo_mon\n"
+                                                  "John Smith,447700900123,3,4,1\n"))
+    import_contacts_csv(conn, write_csv(tmp_path, "whatsapp,tabu_fri,tabu_sat,leo_mon\n"
+                                                  "447700900123,5,0,\n", "again.csv"))
+
+    assert load_visits(conn, contact_rowid(conn, "447700900123")) == {"tabu": {"fri": 5}, "leo": {"mon": 1}}
+
+
+def test_duplicate_numbers_in_a_batch_are_merged(conn, tmp_path):
+    import_contacts_csv(conn, write_csv(tmp_path, "name,whatsapp,tabu_fri,leo_mon\n"
+                                                  "John Smith,447700900123,3,\n"
+                                                  "John Smith,447700900123,,2\n"
+                                                  "John Smith,447700900123,,\n"))
+
+    assert load_visits(conn, contact_rowid(conn, "447700900123")) == {"tabu": {"fri": 3}, "leo": {"mon": 2}}
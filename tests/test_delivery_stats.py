@@ -0,0 +1,14 @@
+from db.delivery_stats import fetch_message_type_stats, refresh_delivery_stats
+
+
+def log_report(conn, status, latency_ms, logged_at="2026-10-01 12:00:00"):
+    conn.execute("INSERT INTO delivery_report (whatsapp, status, logged_at, latency_ms) VALUES (?, ?, ?, ?)",
+                 ("447700900123", status, logged_at, latency_ms))
+
+
+def test_refresh_with_an_open_transaction(conn):
+    log_report(conn, "Sent", 300)
+    assert conn.in_transaction  # Uncommitted insert on the same connection
+
+    assert refresh_delivery_stats(conn) == 1
+    assert fetch_message_type_stats(conn) == [("(unknown)", 1, 0, 0.0, 250)]
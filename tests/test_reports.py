@@ -0,0 +1,24 @@
+from db.reports import ReportFilter, fetch_rollup, report_totals
+
+
+def log_reports(conn, day, sent, failed):
+    conn.executemany("INSERT INTO delivery_report (whatsapp, status, logged_at) VALUES (?, ?, ?)",
+                     [("447700900123", "Sent", f"{day} 12:00:00")] * sent +
+                     [("447700900123", "Failed", f"{day} 12:00:00")] * failed)
+
+
+def test_rollup_follows_the_status_filter(conn):
+    log_reports(conn, "2026-10-01", sent=5, failed=2)
+    log_reports(conn, "2026-10-02", sent=3, failed=0)
+    days = ReportFilter("2026-10-01", "2026-10-02")
+
+    assert fetch_rollup(conn, days) == [("2026-10-02", 3, 0), ("2026-10-01", 5, 2)]
+    assert fetch_rollup(conn, days._replace(status="Failed")) == [("2026-10-01", 0, 2)]
+    assert fetch_rollup(conn, days._replace(status="Sent")) == [("2026-10-02", 3, 0), ("2026-10-01", 5, 0)]
+    assert report_totals(conn, days._replace(status="Failed")) == (0, 2)
+
+
+def test_rollup_by_campaign_with_status_filter(conn):
+    log_reports(conn, "2026-10-01", sent=4, failed=1)
+
+    assert fetch_rollup(conn, ReportFilter(status="Failed"), "campaign") == [("(no campaign)", 0, 1)]
@@ -0,0 +1,20 @@
+from campaign.planner import CampaignPlan
+from campaign.templates import compile_template
+
+
+def test_braces_that_are_no_field_are_kept_as_written():
+    template = compile_template("{Hi there} {first_name}, {{VIP}} night at {last_club|the club}")
+
+    assert template.render({"name": "Ann Smith"}) == "{Hi there} Ann, {VIP} night at the club"
+    assert template.literal_tags == ["{Hi there}"]
+
+
+def test_invalid_template_is_left_out_of_the_plan(conn):
+    conn.execute("INSERT INTO contacts (name, whatsapp) VALUES ('Ann Smith', '447700900123')")
+    conn.executemany("INSERT INTO messages (id, type, content) VALUES (?, 'promo', ?)",
+                     [(1, "{if nickname}Hey{end}"), (2, "{Hi there} {first_name}")])
+
+    plan = CampaignPlan.build(conn, [(1, "Ann Smith", "447700900123")], [1, 2])
+
+    assert [item.text for item in plan] == ["{Hi there} Ann"]
+    assert list(plan.invalid_messages) == [1]
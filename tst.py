@@ -1,6 +1,6 @@
-import sqlite3
+from db.connection import get_connection
 
-conn = sqlite3.connect("clubbot.db")  # adjust path if needed
+conn = get_connection()
 cursor = conn.cursor()
 
 cursor.execute("DELETE FROM messages;")
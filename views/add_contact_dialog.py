@@ -5,6 +5,9 @@ from PyQt5.QtWidgets import (
     QSpinBox, QMessageBox, QGridLayout, QWidget
 )
 from PyQt5.QtCore import Qt
+from db.connection import get_connection
+from db.birthdays import index_birthday
+from db.club_visits import CLUB_NAMES, WEEK_DAYS, club_key, load_visits, save_visits
 
 class AddContactDialog(QDialog):
     def __init__(self, parent=None, contact_data=None):
@@ -52,12 +55,16 @@ class AddContactDialog(QDialog):
 
         self.layout.addLayout(form_layout)
 
-        self.week_days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-        self.club_names = [
-            "Cirque Le Soir", "Madox", "Tabu", "Leo", "Reign", "Tape",
-            "Dear Darling", "The Box", "Lio", "Dolce", "Gallery", "Rex Rooms", "Selene"
-        ]
-        self.club_names.sort()
+        self.week_days = [day.capitalize() for day in WEEK_DAYS]
+        self.club_names = CLUB_NAMES
+
+        # Visit counts come from contact_club_visits, not from contact_data columns
+        visits = {}
+        if "rowid" in self.contact_data:
+            try:
+                visits = load_visits(self.db_connection(), self.contact_data["rowid"])
+            except sqlite3.Error as e:
+                QMessageBox.warning(self, "Database Error", f"Failed to load club visits: {str(e)}")
 
         self.layout.addWidget(QLabel("Club Visit Frequency:"))
         self.club_visit_grid = QGridLayout()
@@ -69,11 +76,9 @@ class AddContactDialog(QDialog):
 
         self.club_day_inputs = {}
         for row, club in enumerate(self.club_names):
-            # NO special handling for "Dear Darling" here.
-            # This will consistently convert all club names like "Dear Darling" -> "dear_darling"
-            club_key = club.lower().replace(' ', '_').replace('.', '')
+            key = club_key(club)
 
-            self.club_day_inputs[club_key] = {}
+            self.club_day_inputs[key] = {}
 
             club_label = QLabel(club)
             self.club_visit_grid.addWidget(club_label, row + 1, 0)
@@ -83,17 +88,9 @@ class AddContactDialog(QDialog):
                 spin_box = QSpinBox()
                 spin_box.setMinimum(0)
                 spin_box.setMaximum(99)
-                spin_box.setValue(0)
-
-                column_name = f"{club_key}_{day_key}"
-
-                if column_name in self.contact_data and self.contact_data[column_name] is not None:
-                    try:
-                        spin_box.setValue(int(self.contact_data[column_name]))
-                    except (ValueError, TypeError):
-                        spin_box.setValue(0)
+                spin_box.setValue(visits.get(key, {}).get(day_key, 0))
 
-                self.club_day_inputs[club_key][day_key] = spin_box
+                self.club_day_inputs[key][day_key] = spin_box
                 self.club_visit_grid.addWidget(spin_box, row + 1, col + 1)
 
         self.layout.addLayout(self.club_visit_grid)
@@ -103,18 +100,14 @@ class AddContactDialog(QDialog):
         self.layout.addWidget(save_btn)
 
     def db_connection(self):
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        db_path = os.path.join(base_dir, "..", "db", "clubbot.db")
-        return sqlite3.connect(db_path)
+        return get_connection()
 
     def save_contact(self):
         data = {key: inp.text() if isinstance(inp, QLineEdit) else inp.value()
                 for key, inp in self.inputs.items()}
 
-        for club_key, day_inputs in self.club_day_inputs.items():
-            for day_key, spin_box in day_inputs.items():
-                column_name = f"{club_key}_{day_key}"
-                data[column_name] = spin_box.value()
+        visits = {key: {day_key: spin_box.value() for day_key, spin_box in day_inputs.items()}
+                  for key, day_inputs in self.club_day_inputs.items()}
 
         conn = None
         try:
@@ -126,12 +119,16 @@ class AddContactDialog(QDialog):
                 values = list(data.values())
                 values.append(self.contact_data["rowid"])
                 cursor.execute(f"UPDATE contacts SET {set_clause} WHERE rowid = ?", values)
+                contact_id = self.contact_data["rowid"]
             else:
                 columns = ', '.join(data.keys())
                 placeholders = ', '.join(['?'] * len(data))
                 values = list(data.values())
                 cursor.execute(f"INSERT INTO contacts ({columns}) VALUES ({placeholders})", values)
+                contact_id = cursor.lastrowid
 
+            save_visits(conn, contact_id, visits)  # Same transaction as the contact row
+            index_birthday(conn, contact_id)
             conn.commit()
             QMessageBox.information(self, "Success", "Contact saved successfully!")
             self.accept()
@@ -2,42 +2,54 @@ import os
 import json
 import sqlite3
 import subprocess
-import threading
 
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QComboBox, QTextEdit, QPushButton,
-    QLineEdit, QTableWidget, QTableWidgetItem, QCheckBox, QHBoxLayout, QMessageBox, QScrollArea, QFrame
+    QLineEdit, QTableWidget, QTableWidgetItem, QCheckBox, QHBoxLayout, QMessageBox, QScrollArea, QFrame,
+    QSpinBox, QProgressBar
 )
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
 from functools import partial
 import requests
 
+from db.connection import get_connection
+from db.campaigns import campaign_owner, latest_unfinished_campaign
+from db.groups import list_groups, on_groups_changed
+from db.segments import count_segment, load_segments, segment_contacts
+from campaign.planner import MODE_RANDOM, MODE_SAME
+from views.campaign_worker import CampaignWorker
+from views.console_widget import ConsoleWidget
+
+# Filters offered next to the groups and saved segments
+BUILTIN_FILTERS = [
+    ("Upcoming Birthdays", {"birthday_within": 21}),
+    ("Rating 6+ (Artist Night)", {"rating_min": 6}),
+]
+FILTER_PREVIEW = 50  # Names shown in the numbers box
+
 class CampaignsTab(QWidget):
     def __init__(self):
         super().__init__()
-        self.selected_contacts = []
-        self.selected_numbers = []
-        self.contacts = []
+        self.selected_segment = {}  # Segment definition of the current contact filter (db/segments.py)
+        self.selected_count = 0
         self.groups = []
         self.messages = []
+        self.campaign_worker = None
         self.setup_ui()
         self.refresh_all()
+        on_groups_changed(self.load_filters)  # Groups created or renamed in the group manager
 
     def db_connection(self):
-        conn = sqlite3.connect(os.path.join(os.path.dirname(__file__), "../db/clubbot.db"), timeout=10)
-        conn.execute("PRAGMA journal_mode=WAL")  # Enable write-ahead logging
-        return conn
+        # Pooled per-thread connection; WAL and the other pragmas are applied by db.connection
+        return get_connection()
 
     def setup_ui(self):
         layout = QVBoxLayout()
 
         # Contact Filter
         contact_filter_layout = QHBoxLayout()
-        self.contact_filter = QComboBox()
-        self.contact_filter.addItem("-- No Filter --")
-        self.contact_filter.addItem("Upcoming Birthdays")
-        self.contact_filter.addItem("Rating 6+ (Artist Night)")
+        self.contact_filter = QComboBox()  # Filled by load_filters()
         self.contact_filter.currentIndexChanged.connect(self.filter_contacts)
         contact_filter_layout.addWidget(QLabel("Contact Filter"))
         contact_filter_layout.addWidget(self.contact_filter)
@@ -83,12 +95,16 @@ class CampaignsTab(QWidget):
         layout.addWidget(self.message_list)
 
         # Console Output Area
-        self.console_output = QTextEdit()
-        self.console_output.setReadOnly(True)
-        self.console_output.setStyleSheet("background-color: black; color: lime; font-family: Consolas;")
+        # Bounded console (ring buffer + rotating logs/campaign.log)
+        self.console_output = ConsoleWidget()
         self.console_output.setPlaceholderText("📜 Message logs will appear here...")
         layout.addWidget(self.console_output)
 
+        self.campaign_progress = QProgressBar()
+        self.campaign_progress.setValue(0)
+        self.campaign_progress.setFormat("No campaign running")
+        layout.addWidget(self.campaign_progress)
+
         # Buttons & Delay Inputs in One Row
         self.open_btn = QPushButton("Open WhatsApp in Chrome")
         self.send_btn = QPushButton("Send WhatsApp Messages")
@@ -100,40 +116,57 @@ class CampaignsTab(QWidget):
         self.max_delay_input = QLineEdit()
         self.max_delay_input.setPlaceholderText("Max delay (sec)")
 
+        # Parallel WhatsApp sessions (each uses its own Chrome profile: profile1, profile2, ...)
+        self.sessions_input = QSpinBox()
+        self.sessions_input.setRange(1, 8)
+        self.sessions_input.setValue(1)
+
         bottom_row = QHBoxLayout()
         bottom_row.addWidget(self.open_btn)
         bottom_row.addWidget(QLabel("Delay Range:"))
         bottom_row.addWidget(self.min_delay_input)
         bottom_row.addWidget(QLabel("to"))
         bottom_row.addWidget(self.max_delay_input)
+        bottom_row.addWidget(QLabel("Sessions:"))
+        bottom_row.addWidget(self.sessions_input)
         bottom_row.addWidget(self.send_btn)
         layout.addLayout(bottom_row)
         self.setLayout(layout)
         self.monthly_btn = QPushButton("📆 Start Monthly Campaign")
         self.monthly_btn.clicked.connect(self.start_monthly_campaign)
         bottom_row.addWidget(self.monthly_btn)
+        self.resume_btn = QPushButton("♻️ Resume Campaign")
+        self.resume_btn.clicked.connect(self.resume_campaign)
+        bottom_row.addWidget(self.resume_btn)
+        self.stop_btn = QPushButton("⏹️ Stop Campaign")
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(self.stop_campaign)
+        bottom_row.addWidget(self.stop_btn)
 
     def refresh_all(self):
-        self.load_contacts()
-        self.load_groups()
+        self.load_filters()
         self.load_messages()
         self.filter_contacts()
 
-    def load_contacts(self):
+    def load_filters(self):
+        # Every filter is a segment definition, evaluated in SQLite by db.segments
         conn = self.db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT rowid, name, whatsapp, birthday, rating FROM contacts")
-        self.contacts = cursor.fetchall()
-        conn.close()
-
-    def load_groups(self):
-        conn = self.db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, name FROM groups")
-        self.groups = cursor.fetchall()
-        for gid, gname in self.groups:
-            self.contact_filter.addItem(f"Group: {gname}", gid)
-        conn.close()
+        self.groups = list_groups(conn)  # Cached; on_groups_changed() reloads the filters after edits
+        saved = load_segments(conn)
+
+        current = self.contact_filter.currentText()
+        self.contact_filter.blockSignals(True)
+        self.contact_filter.clear()
+        self.contact_filter.addItem("-- No Filter --", json.dumps({}))
+        for label, definition in BUILTIN_FILTERS:
+            self.contact_filter.addItem(label, json.dumps(definition))
+        for gid, gname, _, _ in self.groups:
+            self.contact_filter.addItem(f"Group: {gname}", json.dumps({"group": gid}))
+        for _, name, definition in saved:
+            self.contact_filter.addItem(f"Segment: {name}", json.dumps(definition))
+        index = self.contact_filter.findText(current)
+        self.contact_filter.setCurrentIndex(max(index, 0))
+        self.contact_filter.blockSignals(False)
 
     def load_messages(self):
         self.message_type_filter.blockSignals(True)
@@ -182,40 +215,13 @@ class CampaignsTab(QWidget):
                 checkbox.setChecked(state == Qt.Checked)
 
     def filter_contacts(self):
-        selected = self.contact_filter.currentText()
-        from datetime import datetime
-        today = datetime.now()
-        filtered = []
-
-        if selected == "Upcoming Birthdays":
-            for c in self.contacts:
-                if not c[3]: continue
-                try:
-                    bday = datetime.strptime(c[3], "%Y-%m-%d")
-                    bday_this_year = bday.replace(year=today.year)
-                    days = (bday_this_year - today).days
-                    if 0 <= days <= 21:
-                        filtered.append(c)
-                except:
-                    continue
-        elif selected == "Rating 6+ (Artist Night)":
-            filtered = [c for c in self.contacts if c[4] and int(c[4]) >= 6]
-        elif selected.startswith("Group: "):
-            group_name = selected[7:]
-            group_id = next((gid for gid, gname in self.groups if gname == group_name), None)
-            if group_id:
-                conn = self.db_connection()
-                cursor = conn.cursor()
-                cursor.execute("SELECT contact_id FROM contact_group_map WHERE group_id = ?", (group_id,))
-                contact_ids = {row[0] for row in cursor.fetchall()}
-                filtered = [c for c in self.contacts if c[0] in contact_ids]
-                conn.close()
-        else:
-            filtered = self.contacts[:]
-
-        self.selected_contacts = filtered
-        self.selected_numbers = [c[2] for c in filtered if c[2]]
-        self.numbers_display.setText(", ".join([c[1] for c in filtered]))
+        # Only the count and a short preview are loaded here; the worker materializes the recipients
+        self.selected_segment = json.loads(self.contact_filter.currentData() or "{}")
+        conn = self.db_connection()
+        self.selected_count = count_segment(conn, self.selected_segment)
+        preview = [row[1] or row[2] for row in segment_contacts(conn, self.selected_segment, limit=FILTER_PREVIEW)]
+        more = f", ... (+{self.selected_count - len(preview)})" if self.selected_count > len(preview) else ""
+        self.numbers_display.setText(f"{self.selected_count} contacts: " + ", ".join(preview) + more)
 
     def filter_messages(self):
         try:
@@ -227,20 +233,6 @@ class CampaignsTab(QWidget):
         finally:
             self.message_type_filter.blockSignals(False)
 
-    def log_delivery_report(self, number, status):
-        try:
-            conn = self.db_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO delivery_report (whatsapp, status, logged_at)
-                VALUES (?, ?, datetime('now'))
-            """, (number, status))
-            conn.commit()
-            conn.close()
-            self.console_output.append(f"📋 Report logged for {number} [{status}]")
-        except Exception as e:
-            self.console_output.append(f"⚠️ Failed to log report for {number}: {str(e)}")
-
     def open_whatsapp_browser(self):
         try:
             script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../sendswhatsapp.py'))
@@ -258,112 +250,94 @@ class CampaignsTab(QWidget):
                     if item:
                         selected_message_ids.append(item.data(Qt.UserRole))
 
-            if not self.selected_numbers or not selected_message_ids:
+            if not self.selected_count or not selected_message_ids:
                 QMessageBox.warning(self, "Warning", "Please select contacts and messages first.")
                 return
 
-            # Fetch messages
-            conn = self.db_connection()
-            cursor = conn.cursor()
-            qmarks = ",".join("?" * len(selected_message_ids))
-            cursor.execute(f"SELECT id, content FROM messages WHERE id IN ({qmarks})", selected_message_ids)
-            id_to_message = {row[0]: row[1] for row in cursor.fetchall()}
-
-            # Build message list
-            numbers, names, messages, log_items = [], [], [], []
-            for i, contact in enumerate(self.selected_contacts):
-                contact_id = contact[0]
-                number = self.selected_numbers[i]
-                name = contact[1].split()[0] if contact[1] else ""
-
-                cursor.execute("SELECT message_id FROM contact_message_log WHERE contact_id = ?", (contact_id,))
-                sent_ids = {row[0] for row in cursor.fetchall()}
-                available_ids = [mid for mid in selected_message_ids if mid not in sent_ids]
-                if not available_ids:
-                    available_ids = selected_message_ids
-
-                if self.send_mode.currentText() == "Random Rotation":
-                    import random
-                    chosen_id = random.choice(available_ids)
-                else:
-                    chosen_id = available_ids[0]
-
-                chosen_msg = id_to_message[chosen_id]
-                personalized = chosen_msg.replace("{Name}", name)
-
-                numbers.append(number)
-                names.append(name)
-                messages.append(personalized)
-                log_items.append((contact_id, number, chosen_id))
-
-                self.console_output.append(f"➡️ Prepared for {number}: {personalized[:60]}...")
-
-            conn.close()
-
-            # Save all to campaign_data.json
-            temp_data = {
-                "numbers": numbers,
-                "names": names,
-                "messages": messages,
-                "mode": "Same",
+            # Planning, storing and sending all run on the worker thread
+            mode = MODE_RANDOM if self.send_mode.currentText() == "Random Rotation" else MODE_SAME
+            settings = {
+                "name": self.message_type_filter.currentText(),
                 "min_delay": int(self.min_delay_input.text() or 1),
-                "max_delay": int(self.max_delay_input.text() or 3)
+                "max_delay": int(self.max_delay_input.text() or 3),
+                "workers": self.sessions_input.value(),
             }
-            temp_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../campaign_data.json'))
-            with open(temp_path, "w", encoding="utf-8") as f:
-                json.dump(temp_data, f, ensure_ascii=False, indent=2)
-
-            # Launch WhatsApp sender
-            def run_sender():
-                try:
-                    script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../sendswhatsapp.py'))
-                    process = subprocess.Popen(
-                        ['python', script_path, '--send'],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.STDOUT,
-                        text=True,
-                        encoding='utf-8',
-                        errors='replace'
-                    )
-
-                    index = 0
-                    for line in process.stdout:
-                        line = line.strip()
-                        self.console_output.append(line)
-
-                        if "✅ Sent to" in line:
-                            if index < len(log_items):
-                                contact_id, number, message_id = log_items[index]
-                                self.log_message_sent(contact_id, message_id)
-                                self.log_delivery_report(number, "Sent")
-                                index += 1
-                        elif "❌" in line and index < len(log_items):
-                            _, number, _ = log_items[index]
-                            self.log_delivery_report(number, "Failed")
-                            index += 1
-
-                    self.console_output.append("🎉 Campaign completed.")
-                except Exception as e:
-                    self.console_output.append(f"❌ Error in sending thread: {str(e)}")
-
-            threading.Thread(target=run_sender, daemon=True).start()
+            self.start_campaign_worker(CampaignWorker(
+                segment=self.selected_segment, message_ids=selected_message_ids, mode=mode,
+                settings=settings, parent=self))
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Could not send messages: {str(e)}")
 
-    def log_message_sent(self, contact_id, message_id):
+    def resume_campaign(self):
         try:
-            conn = self.db_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR IGNORE INTO contact_message_log (contact_id, message_id, sent_at)
-                VALUES (?, ?, datetime('now'))
-            """, (contact_id, message_id))
-            conn.commit()
-            conn.close()
-            self.console_output.append(f"ℹ️ Logged message ID {message_id} for contact ID {contact_id}")
+            campaign_id = latest_unfinished_campaign(self.db_connection())
+            if campaign_id is None:
+                QMessageBox.information(self, "Resume", "There is no unfinished campaign to resume.")
+                return
+            owner = campaign_owner(self.db_connection(), campaign_id)
+            if owner is not None:
+                QMessageBox.information(self, "Resume",
+                                        f"Campaign #{campaign_id} is still being sent by process {owner}.")
+                return
+            self.console_output.append(f"♻️ Resuming campaign #{campaign_id}")
+            self.start_campaign_worker(CampaignWorker(campaign_id=campaign_id, resume=True, parent=self))
         except Exception as e:
-            self.console_output.append(f"⚠️ Failed to log message for contact ID {contact_id}: {str(e)}")
+            QMessageBox.critical(self, "Error", f"Could not resume campaign: {str(e)}")
+
+    def start_campaign_worker(self, worker):
+        self.campaign_worker = worker
+        worker.log.connect(self.on_campaign_log)
+        worker.progress.connect(self.on_campaign_progress)
+        worker.completed.connect(self.on_campaign_completed)
+        worker.stopped.connect(self.on_campaign_stopped)
+        worker.failed.connect(self.on_campaign_failed)
+        self.set_campaign_running(True)
+        worker.start()
+
+    def stop_campaign(self):
+        if self.campaign_worker is not None and self.campaign_worker.isRunning():
+            self.stop_btn.setEnabled(False)
+            self.console_output.append("⏹️ Stopping: the messages already handed to the sessions are finished first...")
+            self.campaign_worker.stop()
+
+    def shutdown(self):
+        """Called before the main window closes; stops a running campaign. Returns False to keep the window open."""
+        if self.campaign_worker is None or not self.campaign_worker.isRunning():
+            return True
+        reply = QMessageBox.question(self, "Campaign Running",
+                                     "A campaign is still sending. Stop it and quit?\n"
+                                     "The messages left can be sent later with Resume Campaign.",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return False
+        self.campaign_worker.shutdown()
+        return True
+
+    def set_campaign_running(self, running):
+        self.send_btn.setEnabled(not running)
+        self.monthly_btn.setEnabled(not running)
+        self.resume_btn.setEnabled(not running)
+        self.stop_btn.setEnabled(running)
+
+    def on_campaign_log(self, lines):
+        self.console_output.append_lines(lines)
+
+    def on_campaign_progress(self, sent, failed, total):
+        self.campaign_progress.setMaximum(max(total, 1))
+        self.campaign_progress.setValue(sent + failed)
+        self.campaign_progress.setFormat(f"{sent} sent, {failed} failed of {total}")
+
+    def on_campaign_completed(self, campaign_id):
+        self.set_campaign_running(False)
+
+    def on_campaign_stopped(self, campaign_id):
+        self.set_campaign_running(False)
+        self.console_output.append(f"⏹️ Campaign #{campaign_id} stopped; use Resume Campaign to send the rest.")
+
+    def on_campaign_failed(self, error):
+        self.set_campaign_running(False)
+        self.console_output.append(f"❌ Error in sending thread: {error}")
 
     def start_monthly_campaign(self):
         try:
@@ -0,0 +1,204 @@
+import logging
+import os
+import queue
+import subprocess
+import threading
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from campaign.events import EVENT_FINISHED, EVENT_ITEM, EVENT_LOG, EVENT_STARTED, parse_event
+from campaign.planner import CampaignPlan
+from db.campaigns import (
+    CAMPAIGN_COMPLETED, CAMPAIGN_STOPPED, STATE_FAILED, STATE_IN_FLIGHT, STATE_PENDING, STATE_SENT,
+    campaign_progress, create_campaign
+)
+from db.connection import get_connection, release_thread_connection
+from db.segments import segment_contacts
+from views.console_widget import campaign_logger
+
+SENDER_SCRIPT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../sendswhatsapp.py'))
+LOG_INTERVAL_MS = 100  # Console lines and progress are emitted at most this often
+STOP_TIMEOUT_MS = 15000  # How long shutdown() lets the sender finish its claimed messages before terminating it
+
+
+def format_event(event):
+    """Console line for one sender event, or None for events that only update progress."""
+    kind = event.get("event")
+    if kind == EVENT_ITEM:
+        if event.get("status") == "Sent":
+            return f"✅ Sent to {event.get('number')} ({event.get('latency_ms')} ms, session {event.get('worker')})"
+        return (f"❌ Failed to send to {event.get('number')}: {event.get('error_class')}: {event.get('error')} "
+                f"(after {event.get('attempts')} attempts)")
+    if kind == EVENT_STARTED:
+        return (f"🚀 Sending {event.get('items')} messages through {event.get('workers')} "
+                f"{event.get('transport')} session(s)")
+    if kind == EVENT_FINISHED:
+        return f"📊 Sent {event.get('sent')}, failed {event.get('failed')} in {event.get('elapsed_ms', 0) / 1000:.1f}s"
+    if kind == EVENT_LOG:
+        return event.get("message", "")
+    return None
+
+
+class CampaignWorker(QThread):
+    """
+    Plans and stores a campaign (or picks up a stored one), runs the sender process and relays
+    its events. Never touches widgets: console lines and progress are emitted in batches at most
+    every LOG_INTERVAL_MS, so a 20k-message campaign costs the GUI a few signals per second.
+    Ends with exactly one of completed, stopped (items left, resumable) or failed.
+    """
+
+    log = pyqtSignal(list)  # Console lines since the last batch
+    progress = pyqtSignal(int, int, int)  # sent, failed, total
+    completed = pyqtSignal(int)  # campaign id
+    stopped = pyqtSignal(int)  # campaign id
+    failed = pyqtSignal(str)
+
+    def __init__(self, segment=None, message_ids=None, mode=None, settings=None, campaign_id=None,
+                 resume=False, parent=None):
+        super().__init__(parent)
+        self.segment = segment or {}
+        self.message_ids = message_ids
+        self.mode = mode
+        self.settings = settings or {}
+        self.campaign_id = campaign_id
+        self.resume = resume
+        self.process = None
+        self._stop_requested = False
+        self._process_lock = threading.Lock()  # process / _stop_requested are shared with the GUI thread
+        self._lines = []
+        self._last_emit = 0.0
+
+    # --- Stopping (called from the GUI thread) ---
+    def stop(self):
+        """Asks the sender to stop claiming messages; it finishes the ones already handed out and exits."""
+        with self._process_lock:
+            self._stop_requested = True
+            process = self.process
+        if process is not None and process.poll() is None:
+            try:
+                process.stdin.write("stop\n")
+                process.stdin.flush()
+            except OSError:
+                pass  # Already exiting
+
+    def shutdown(self, timeout_ms=STOP_TIMEOUT_MS):
+        """stop(), then terminates the sender if it has not exited after `timeout_ms`; returns once the thread ended."""
+        self.stop()
+        if not self.wait(timeout_ms):
+            with self._process_lock:
+                process = self.process
+            if process is not None and process.poll() is None:
+                process.terminate()
+            self.wait()
+
+    # --- Batched output ---
+    def _log(self, line):
+        self._lines.append(line)
+
+    def _flush(self, sent, failed, total, force=False):
+        now = time.monotonic()
+        if not force and (now - self._last_emit) * 1000 < LOG_INTERVAL_MS:
+            return
+        self._last_emit = now
+        if self._lines:
+            self.log.emit(self._lines)
+            self._lines = []
+        self.progress.emit(sent, failed, total)
+
+    # --- Steps ---
+    def _prepare(self, conn):
+        contacts = segment_contacts(conn, self.segment)
+        plan = CampaignPlan.build(conn, contacts, self.message_ids, self.mode)
+        for message_id, error in plan.invalid_messages.items():
+            self._log(f"⚠️ Message {message_id} left out, its template is invalid: {error}")
+        counts = ", ".join(f"message {mid}: {count}" for mid, count in plan.counts_by_message().items())
+        self._log(f"📋 Prepared {len(plan)} messages ({counts})")
+        # One line per contact would flood the console; they only go to the log file at debug level
+        logger = campaign_logger()
+        if logger.isEnabledFor(logging.DEBUG):
+            for item in plan:
+                logger.debug(f"➡️ Prepared for {item.number}: {item.text[:60]}...")
+        self.campaign_id = create_campaign(conn, plan, mode=self.mode, **self.settings)
+        self._log(f"💾 Saved {len(plan)} messages as campaign #{self.campaign_id}")
+
+    def _read_output(self, process, events):
+        # Plain thread: only parses lines, the QThread decides when to emit them
+        for line in process.stdout:
+            if line.strip():
+                events.put(parse_event(line))
+        process.wait()
+        events.put(None)
+
+    def _run_sender(self, conn):
+        """Runs the sender until it exits; returns CAMPAIGN_COMPLETED or CAMPAIGN_STOPPED, raises when it failed."""
+        progress = campaign_progress(conn, self.campaign_id)
+        total = sum(progress.values())
+        sent, failed = progress[STATE_SENT], progress[STATE_FAILED]
+        if not progress[STATE_PENDING] and not progress[STATE_IN_FLIGHT]:
+            self._log(f"ℹ️ Campaign #{self.campaign_id} has nothing left to send.")
+            self._flush(sent, failed, total, force=True)
+            return CAMPAIGN_COMPLETED
+
+        command = '--resume' if self.resume else '--send'
+        with self._process_lock:
+            if self._stop_requested:
+                self._log(f"⏹️ Campaign #{self.campaign_id} stopped before sending started.")
+                self._flush(sent, failed, total, force=True)
+                return CAMPAIGN_STOPPED
+            process = self.process = subprocess.Popen(
+                ['python', SENDER_SCRIPT, command, '--campaign-id', str(self.campaign_id), '--events'],
+                stdin=subprocess.PIPE,  # stop() writes "stop" here
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                encoding='utf-8',
+                errors='replace'
+            )
+        events = queue.Queue()
+        threading.Thread(target=self._read_output, args=(process, events), daemon=True).start()
+
+        status = None  # From the sender's "finished" event
+        while True:
+            try:
+                event = events.get(timeout=LOG_INTERVAL_MS / 1000)
+            except queue.Empty:
+                self._flush(sent, failed, total)
+                continue
+            if event is None:
+                break
+            if event.get("event") == EVENT_FINISHED:
+                status = event.get("status")
+            if event.get("event") == EVENT_ITEM:
+                if event.get("status") == "Sent":
+                    sent += 1
+                else:
+                    failed += 1
+            line = format_event(event)
+            if line is not None:
+                self._log(line)
+            self._flush(sent, failed, total)
+
+        self._flush(sent, failed, total, force=True)
+        if process.returncode == 0:
+            return CAMPAIGN_COMPLETED
+        if status == CAMPAIGN_STOPPED or self._stop_requested:
+            return CAMPAIGN_STOPPED
+        raise RuntimeError(f"Sender exited with code {process.returncode}")
+
+    def run(self):
+        try:
+            conn = get_connection()  # This thread's own pooled connection
+            if self.campaign_id is None:
+                self._prepare(conn)
+                self._flush(0, 0, 0, force=True)
+            if self._run_sender(conn) == CAMPAIGN_STOPPED:
+                self.stopped.emit(self.campaign_id)
+            else:
+                self.completed.emit(self.campaign_id)
+        except Exception as e:
+            if self._lines:
+                self.log.emit(self._lines)
+            self.failed.emit(str(e))
+        finally:
+            release_thread_connection()
@@ -0,0 +1,108 @@
+import logging
+import os
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPlainTextEdit
+from PyQt5.QtGui import QTextCursor
+
+# Campaign console.
+# Keeps the last MAX_LINES lines in memory (ring buffer) and in the widget (maximum block count),
+# so a long campaign never grows the document without bound. Every line also goes to a rotating
+# log file, which is where the full history of a run lives.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOG_DIR = os.path.join(BASE_DIR, "logs")
+LOG_FILE = os.path.join(LOG_DIR, "campaign.log")
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 5
+
+MAX_LINES = 5000
+
+LEVEL_INFO = "Info"
+LEVEL_SUCCESS = "Success"
+LEVEL_WARNING = "Warning"
+LEVEL_ERROR = "Error"
+LEVELS = [LEVEL_INFO, LEVEL_SUCCESS, LEVEL_WARNING, LEVEL_ERROR]
+ALL_LEVELS = "All"
+
+# Console lines are tagged by their leading emoji, the convention used by every script here
+LEVEL_PREFIXES = [("✅", LEVEL_SUCCESS), ("🎉", LEVEL_SUCCESS), ("⚠️", LEVEL_WARNING), ("❌", LEVEL_ERROR)]
+LOGGING_LEVELS = {LEVEL_INFO: logging.INFO, LEVEL_SUCCESS: logging.INFO,
+                  LEVEL_WARNING: logging.WARNING, LEVEL_ERROR: logging.ERROR}
+
+
+def line_level(line):
+    for prefix, level in LEVEL_PREFIXES:
+        if line.startswith(prefix):
+            return level
+    return LEVEL_INFO
+
+
+def campaign_logger():
+    """Logger writing to logs/campaign.log, rotated every LOG_MAX_BYTES (handler added once)."""
+    logger = logging.getLogger("clubbot.campaign")
+    if not logger.handlers:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        handler = RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+class ConsoleWidget(QWidget):
+    def __init__(self, max_lines=MAX_LINES, parent=None):
+        super().__init__(parent)
+        self.lines = deque(maxlen=max_lines)  # (level, text)
+        self.logger = campaign_logger()
+
+        self.level_filter = QComboBox()
+        self.level_filter.addItems([ALL_LEVELS] + LEVELS)
+        self.level_filter.currentIndexChanged.connect(self.refilter)
+
+        self.output = QPlainTextEdit()
+        self.output.setReadOnly(True)
+        self.output.setMaximumBlockCount(max_lines)
+        self.output.setStyleSheet("background-color: black; color: lime; font-family: Consolas;")
+
+        top_row = QHBoxLayout()
+        top_row.addWidget(QLabel("Show:"))
+        top_row.addWidget(self.level_filter)
+        top_row.addStretch()
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(top_row)
+        layout.addWidget(self.output)
+        self.setLayout(layout)
+
+    def setPlaceholderText(self, text):
+        self.output.setPlaceholderText(text)
+
+    def append(self, text):
+        self.append_lines(text.split("\n"))
+
+    def append_lines(self, lines):
+        """Adds a batch of lines with a single widget update."""
+        selected = self.level_filter.currentText()
+        visible = []
+        for line in lines:
+            level = line_level(line)
+            self.lines.append((level, line))
+            self.logger.log(LOGGING_LEVELS[level], line)
+            if selected in (ALL_LEVELS, level):
+                visible.append(line)
+        if visible:
+            self.output.appendPlainText("\n".join(visible))
+
+    def refilter(self):
+        selected = self.level_filter.currentText()
+        self.output.setPlainText("\n".join(
+            text for level, text in self.lines if selected in (ALL_LEVELS, level)))
+        self.output.moveCursor(QTextCursor.End)
+
+    def clear(self):
+        self.lines.clear()
+        self.output.clear()
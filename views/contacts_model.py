@@ -0,0 +1,124 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QEvent, pyqtSignal
+from PyQt5.QtGui import QBrush, QColor
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyleOptionButton, QStyle, QApplication
+
+from db.connection import get_connection
+from db.contacts import fetch_contacts_page, PAGE_SIZE
+
+
+class ContactsTableModel(QAbstractTableModel):
+    """
+    Contacts list backed by SQLite and loaded lazily in pages.
+    The view asks for more rows through canFetchMore()/fetchMore() as the user scrolls,
+    so only the visible window (plus what was already scrolled past) is ever held in memory.
+    """
+
+    HEADERS = ["Name", "WhatsApp", "Birthday", "Rating", "Edit", "Delete"]
+    EDIT_COLUMN = 4
+    DELETE_COLUMN = 5
+
+    def __init__(self, parent=None, page_size=PAGE_SIZE):
+        super().__init__(parent)
+        self.page_size = page_size
+        self.search_term = ""
+        self._rows = []
+        self._last_rowid = 0
+        self._exhausted = False
+
+    # --- Loading ---
+    def set_search(self, search_term):
+        self.search_term = search_term
+        self.refresh()
+
+    def refresh(self):
+        """Drops the loaded rows and reloads the first page for the current search."""
+        self.beginResetModel()
+        self._rows = []
+        self._last_rowid = 0
+        self._exhausted = False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent):
+        if parent.isValid() or self._exhausted:
+            return
+        rows = fetch_contacts_page(get_connection(), self._last_rowid, self.page_size, self.search_term)
+        if len(rows) < self.page_size:
+            self._exhausted = True
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self._last_rowid = rows[-1][0]
+        self.endInsertRows()
+
+    def rowid_at(self, row):
+        return self._rows[row][0]
+
+    # --- QAbstractTableModel interface ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        rowid, name, whatsapp, birthday, rating = self._rows[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return name
+            if column == 1:
+                return whatsapp
+            if column == 2:
+                return birthday
+            if column == 3:
+                return str(rating) if rating is not None else ""
+            if column == self.EDIT_COLUMN:
+                return "Edit"
+            if column == self.DELETE_COLUMN:
+                return "Delete"
+        elif role == Qt.UserRole:
+            return rowid
+        elif role == Qt.ForegroundRole and column == 0:
+            return QBrush(QColor("blue"))  # Name is clickable and opens the profile
+        return None
+
+    def flags(self, index):
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """
+    Paints a push button in a cell and emits clicked(rowid) when it is pressed.
+    Replaces one QPushButton widget per row, so memory stays flat however many rows are loaded.
+    """
+
+    clicked = pyqtSignal(int)
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = index.data(Qt.DisplayRole)
+        button.state = QStyle.State_Enabled | QStyle.State_Raised
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            if option.rect.contains(event.pos()):
+                self.clicked.emit(index.data(Qt.UserRole))
+                return True
+        return False
@@ -1,18 +1,23 @@
 import sqlite3
-import csv
 import os
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLineEdit, QPushButton, QHBoxLayout,
-    QTableWidget, QTableWidgetItem, QMessageBox, QHeaderView,
-    QAbstractItemView, QLabel, QScrollArea, QFileDialog
+    QTableView, QMessageBox, QHeaderView,
+    QAbstractItemView, QLabel, QFileDialog, QProgressDialog
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
+from db.connection import get_connection
+from db.contacts import get_contact
 from views.add_contact_dialog import AddContactDialog
 from views.profile_view import ContactProfileDialog
 from views.group_manager import GroupManagerDialog
+from views.contacts_model import ContactsTableModel, ButtonDelegate
+from views.import_worker import CsvImportWorker
 
 
 class ContactsTab(QWidget):
+    SEARCH_DEBOUNCE_MS = 250
+
     def __init__(self):
         super().__init__()
         self.layout = QVBoxLayout()
@@ -21,16 +26,18 @@ class ContactsTab(QWidget):
 
     # Helper method for consistent database connection
     def db_connection(self):
-        # Assumes clubbot.db is in a 'db' directory one level up from where this script is located
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        db_path = os.path.join(base_dir, "..", "db", "clubbot.db")
-        return sqlite3.connect(db_path)
+        return get_connection()
 
     def setup_ui(self):
         search_layout = QHBoxLayout()
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search by Name, WhatsApp or Club...")
-        self.search_input.textChanged.connect(self.load_contacts)
+        # Debounced: typing restarts the timer, and only the pause runs one indexed query
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.load_contacts)
+        self.search_input.textChanged.connect(self.search_timer.start)
         search_layout.addWidget(QLabel("Search:"))
         search_layout.addWidget(self.search_input)
         self.layout.addLayout(search_layout)
@@ -47,18 +54,25 @@ class ContactsTab(QWidget):
         button_layout.addWidget(group_btn)
         self.layout.addLayout(button_layout)
 
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-
-        self.contact_table = QTableWidget()
-        self.contact_table.setColumnCount(6)
-        self.contact_table.setHorizontalHeaderLabels(["Name", "WhatsApp", "Birthday", "Rating", "Edit", "Delete"])
+        # Virtualized table: rows are paged in from SQLite as the user scrolls,
+        # and the Edit/Delete buttons are painted by delegates rather than created per row.
+        self.contact_model = ContactsTableModel(self)
+        self.contact_table = QTableView()
+        self.contact_table.setModel(self.contact_model)
         self.contact_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.contact_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.contact_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        self.contact_table.cellClicked.connect(self.handle_cell_click)
+        self.contact_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.contact_table.clicked.connect(self.handle_cell_click)
+
+        self.edit_delegate = ButtonDelegate(self.contact_table)
+        self.edit_delegate.clicked.connect(self.edit_contact)
+        self.contact_table.setItemDelegateForColumn(ContactsTableModel.EDIT_COLUMN, self.edit_delegate)
+        self.delete_delegate = ButtonDelegate(self.contact_table)
+        self.delete_delegate.clicked.connect(self.delete_contact)
+        self.contact_table.setItemDelegateForColumn(ContactsTableModel.DELETE_COLUMN, self.delete_delegate)
 
-        scroll_area.setWidget(self.contact_table)
-        self.layout.addWidget(scroll_area)
+        self.layout.addWidget(self.contact_table)
 
         self.load_contacts()
 
@@ -81,125 +95,65 @@ class ContactsTab(QWidget):
         if not file_path:
             return
 
-        conn = None
-        try:
-            with open(file_path, newline='', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-
-                def normalize(row):
-                    return {k.lower().replace(' ', '_').replace('.', ''): v for k, v in row.items()}
-
-                def clean(val):
-                    return val.strip() if val and val.strip().lower() != "none" else ""
-
-                def safe_int(value):
-                    try:
-                        return int(float(value)) if isinstance(value, str) and '.' in value else int(value)
-                    except (ValueError, TypeError):
-                        return 0
-
-                conn = self.db_connection()
-                cursor = conn.cursor()
-                count = 0
-
-                # Get all column names from the contacts table dynamically
-                cursor.execute("PRAGMA table_info(contacts);")
-                db_column_names = [info[1] for info in cursor.fetchall()]
-
-                # Filter out 'rowid' if present, as it's not inserted directly
-                db_column_names = [col for col in db_column_names if col != 'rowid']
-
-                for row_data in reader:
-                    normalized_row = normalize(row_data)
-
-                    # Prepare columns and values for insertion
-                    columns = []
-                    values = []
-                    for col_name in db_column_names:
-                        # Use clean for text fields, safe_int for integer fields
-                        if 'int' in cursor.execute(f"PRAGMA table_info(contacts) WHERE name='{col_name}';").fetchone()[
-                            2].lower():
-                            values.append(safe_int(normalized_row.get(col_name, 0)))
-                        else:
-                            values.append(clean(normalized_row.get(col_name)))
-                        columns.append(col_name)
-
-                    # Create placeholders for the SQL query
-                    placeholders = ', '.join(['?'] * len(columns))
-                    columns_str = ', '.join(columns)
-
-                    try:
-                        cursor.execute(f"INSERT INTO contacts ({columns_str}) VALUES ({placeholders})", values)
-                        count += 1
-                    except sqlite3.IntegrityError:
-                        # This typically means a UNIQUE constraint failed (e.g., duplicate whatsapp)
-                        print(f"Skipping duplicate or invalid entry: {normalized_row.get('whatsapp')}")
-                        continue
-                    except Exception as row_error:
-                        print(f"⚠️ Failed to insert row with whatsapp: {normalized_row.get('whatsapp')}: {row_error}")
+        # The import runs in a worker thread; the window stays usable and the dialog can cancel it
+        self.import_progress = QProgressDialog("Importing contacts...", "Cancel", 0, 100, self)
+        self.import_progress.setWindowTitle("Import CSV")
+        self.import_progress.setWindowModality(Qt.WindowModal)
+        self.import_progress.setAutoClose(False)
+        self.import_progress.setMinimumDuration(0)
+
+        self.import_worker = CsvImportWorker(file_path, self)
+        self.import_worker.progress.connect(self.on_import_progress)
+        self.import_worker.completed.connect(self.on_import_completed)
+        self.import_worker.failed.connect(self.on_import_failed)
+        self.import_progress.canceled.connect(self.import_worker.cancel)
+        self.import_worker.start()
+
+    def on_import_progress(self, imported, percent):
+        self.import_progress.setLabelText(f"Importing contacts... {imported} written")
+        self.import_progress.setValue(percent)
+
+    def close_import_progress(self):
+        self.import_progress.canceled.disconnect()
+        self.import_progress.close()
+
+    def on_import_completed(self, result):
+        self.close_import_progress()
+        if result.cancelled:
+            QMessageBox.information(self, "Import Cancelled", "The import was cancelled. No contacts were changed.")
+            return
 
-                conn.commit()
-                QMessageBox.information(self, "Import Complete", f"{count} contacts imported successfully.")
-                self.load_contacts()
+        box = QMessageBox(self)
+        box.setWindowTitle("Import Complete")
+        box.setIcon(QMessageBox.Information)
+        box.setText(f"{result.imported} contacts imported successfully.")
+        notes = []
+        if result.rejects:
+            notes.append(f"{len(result.rejects)} rows were rejected. See details.")
+            box.setDetailedText(result.reject_report())
+        if result.unreadable_birthdays:
+            notes.append(f"{result.unreadable_birthdays} birthdays could not be read "
+                         f"(python -m db.birthdays lists them).")
+        if notes:
+            box.setInformativeText("\n".join(notes))
+        box.exec_()
+        self.load_contacts()
 
-        except Exception as e:
-            QMessageBox.warning(self, "Import Failed", f"An error occurred during import: {str(e)}")
-        finally:
-            if conn:
-                conn.close()
+    def on_import_failed(self, error):
+        self.close_import_progress()
+        QMessageBox.warning(self, "Import Failed", f"An error occurred during import: {error}")
 
     def load_contacts(self):
-        search_term = self.search_input.text().lower().strip()
-        conn = self.db_connection()
-        cursor = conn.cursor()
-
-        # We still select only basic fields for the table display to keep it readable
-        cursor.execute("SELECT rowid, name, whatsapp, birthday, rating FROM contacts")
-        rows = cursor.fetchall()
-        conn.close()
+        # The model only loads the first page; further pages are fetched as the view scrolls
+        self.contact_model.set_search(self.search_input.text().strip())
 
-        self.contact_table.setRowCount(0)
-        for i, (rowid, name, whatsapp, birthday, rating) in enumerate(rows):
-            # Filtering can now also include club names if needed, but for simplicity
-            # we'll stick to name/whatsapp search here.
-            # If you want to search club names, you'd need to fetch them in the query too.
-            if search_term and not (search_term in (name or '').lower() or search_term in (whatsapp or '').lower()):
-                continue
-
-            row_position = self.contact_table.rowCount()
-            self.contact_table.insertRow(row_position)
-
-            name_item = QTableWidgetItem(name)
-            name_item.setData(Qt.UserRole, rowid)  # Store rowid in the name item for easy retrieval
-            name_item.setForeground(Qt.blue)
-            name_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)  # Make name clickable
-
-            self.contact_table.setItem(row_position, 0, name_item)
-            self.contact_table.setItem(row_position, 1, QTableWidgetItem(whatsapp))
-            self.contact_table.setItem(row_position, 2, QTableWidgetItem(birthday))
-            self.contact_table.setItem(row_position, 3, QTableWidgetItem(str(rating) if rating is not None else ""))
-
-            # Buttons for Edit and Delete
-            edit_btn = QPushButton("Edit")
-            delete_btn = QPushButton("Delete")
-
-            # Using partial to pass rowid to clicked handlers
-            # Note: lambda is used here instead of functools.partial directly for simplicity with event loop
-            edit_btn.clicked.connect(lambda _, rid=rowid: self.edit_contact(rid))
-            delete_btn.clicked.connect(lambda _, rid=rowid: self.delete_contact(rid))
-
-            self.contact_table.setCellWidget(row_position, 4, edit_btn)
-            self.contact_table.setCellWidget(row_position, 5, delete_btn)
-
-    def handle_cell_click(self, row, column):
+    def handle_cell_click(self, index):
         # Only open profile when clicking on the Name column (column 0)
-        if column == 0:
-            item = self.contact_table.item(row, column)
-            if item:
-                rowid = item.data(Qt.UserRole)  # Retrieve rowid from stored data
-                dialog = ContactProfileDialog(self, rowid=rowid)
-                dialog.exec_()
-                self.load_contacts()  # Reload contacts after profile dialog might have caused changes
+        if index.isValid() and index.column() == 0:
+            rowid = index.data(Qt.UserRole)  # The model exposes the rowid on every cell
+            dialog = ContactProfileDialog(self, rowid=rowid)
+            dialog.exec_()
+            self.load_contacts()  # Reload contacts after profile dialog might have caused changes
 
     def delete_contact(self, rowid):
         confirm = QMessageBox.question(self, "Confirm Delete", "Are you sure you want to delete this contact?",
@@ -226,23 +180,11 @@ class ContactsTab(QWidget):
         contact_data = {}
         try:
             conn = self.db_connection()
-            cursor = conn.cursor()
-
-            # --- CRITICAL CHANGE HERE ---
-            # Get all column names from the 'contacts' table dynamically
-            cursor.execute("PRAGMA table_info(contacts);")
-            columns_info = cursor.fetchall()
-            column_names = [col[1] for col in columns_info]
 
-            # Fetch ALL data for the contact using SELECT *
-            cursor.execute(f"SELECT * FROM contacts WHERE rowid = ?", (rowid,))
-            result = cursor.fetchone()
+            # Contact columns only (plus "rowid"); the dialog loads club visits itself
+            contact_data = get_contact(conn, rowid)
 
-            if result:
-                # Map fetched tuple data to a dictionary using column names
-                contact_data = dict(zip(column_names, result))
-                contact_data["rowid"] = rowid  # Ensure rowid is also in the dictionary
-            else:
+            if not contact_data:
                 QMessageBox.warning(self, "Error", "Contact data not found for editing.")
                 return
 
@@ -256,7 +198,7 @@ class ContactsTab(QWidget):
             if conn:
                 conn.close()
 
-        # Open AddContactDialog with the comprehensive contact_data
+        # Open AddContactDialog with the contact's data
         dialog = AddContactDialog(self, contact_data)
         if dialog.exec_() == dialog.Accepted:
             self.load_contacts()  # Reload contacts to reflect changes
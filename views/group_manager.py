@@ -3,9 +3,12 @@ from functools import partial
 import os
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout,
-    QTableWidget, QTableWidgetItem, QMessageBox, QComboBox, QCheckBox
+    QTableWidget, QTableWidgetItem, QMessageBox, QComboBox
 )
 from PyQt5.QtCore import Qt
+from db.connection import get_connection
+from db.groups import (add_matching_to_group, apply_membership_changes, create_group, filtered_contacts,
+                       group_members, list_groups, remove_all_from_group, rename_group, set_group_status)
 
 from PyQt5.QtWidgets import QInputDialog
 
@@ -27,6 +30,12 @@ class GroupManagerDialog(QDialog):
         self.group_select = QComboBox()
         self.group_select.currentIndexChanged.connect(self.load_group_contacts)
 
+        # Checkbox changes are staged here and written in one transaction by save_changes()
+        self.members_group_id = None
+        self.members = set()
+        self.staged_add = set()
+        self.staged_remove = set()
+
         self.group_name_input = QLineEdit()
         self.group_name_input.setPlaceholderText("Enter Group Name")
         self.create_group_btn = QPushButton("Create Group")
@@ -53,6 +62,8 @@ class GroupManagerDialog(QDialog):
         self.layout.addLayout(top_layout)
 
         filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("Group:"))
+        filter_layout.addWidget(self.group_select)
         filter_layout.addWidget(self.search_input)
         filter_layout.addWidget(QLabel("Rating:"))
         filter_layout.addWidget(self.rating_filter)
@@ -61,19 +72,33 @@ class GroupManagerDialog(QDialog):
         self.contacts_table = QTableWidget()
         self.contacts_table.setColumnCount(4)
         self.contacts_table.setHorizontalHeaderLabels(["Name", "WhatsApp", "Rating", "Add to Group"])
+        self.contacts_table.itemChanged.connect(self.stage_contact_assignment)
         select_layout = QHBoxLayout()
         select_all_btn = QPushButton("Select All")
         deselect_all_btn = QPushButton("Deselect All")
         select_all_btn.clicked.connect(self.select_all_contacts)
         deselect_all_btn.clicked.connect(self.deselect_all_contacts)
+        add_matching_btn = QPushButton("Add All Matching")
+        add_matching_btn.clicked.connect(self.add_all_matching)
+        remove_all_btn = QPushButton("Remove All")
+        remove_all_btn.clicked.connect(self.remove_all_members)
+        self.pending_label = QLabel()
+        self.save_btn = QPushButton("Save Changes")
+        self.save_btn.clicked.connect(self.save_changes)
         select_layout.addWidget(select_all_btn)
         select_layout.addWidget(deselect_all_btn)
+        select_layout.addWidget(add_matching_btn)
+        select_layout.addWidget(remove_all_btn)
+        select_layout.addStretch()
+        select_layout.addWidget(self.pending_label)
+        select_layout.addWidget(self.save_btn)
         self.layout.addLayout(select_layout)
 
         self.layout.addWidget(self.contacts_table)
 
-        self.load_group_summary()
-        self.load_contacts()
+        self.load_group_summary()  # Also lists the contacts of the first group
+        if not self.groups:
+            self.load_contacts()
 
     from PyQt5.QtWidgets import QInputDialog
 
@@ -82,28 +107,20 @@ class GroupManagerDialog(QDialog):
         if not name:
             QMessageBox.warning(self, "Input Error", "Group name cannot be empty.")
             return
-        conn = sqlite3.connect(os.path.join(os.path.dirname(__file__), "../db/clubbot.db"))
-        cursor = conn.cursor()
         try:
-            cursor.execute("INSERT INTO groups (name) VALUES (?)", (name,))
-            conn.commit()
+            create_group(get_connection(), name)
             self.group_name_input.clear()
             self.load_group_summary()
         except sqlite3.IntegrityError:
             QMessageBox.warning(self, "Duplicate", "Group with this name already exists.")
-        finally:
-            conn.close()
 
     def update_group(self):
         name = self.group_name_input.text().strip()
         if not name:
             QMessageBox.warning(self, "Input Error", "Group name cannot be empty.")
             return
-        conn = sqlite3.connect(os.path.join(os.path.dirname(__file__), "../db/clubbot.db"))
-        cursor = conn.cursor()
         try:
-            cursor.execute("UPDATE groups SET name = ? WHERE id = ?", (name, self.editing_group_id))
-            conn.commit()
+            rename_group(get_connection(), self.editing_group_id, name)
             self.group_name_input.clear()
             self.editing_group_id = None
             self.create_group_btn.setText("Create Group")
@@ -112,21 +129,12 @@ class GroupManagerDialog(QDialog):
             self.load_group_summary()
         except sqlite3.IntegrityError:
             QMessageBox.warning(self, "Duplicate", "Group with this name already exists.")
-        finally:
-            conn.close()
 
     def load_group_summary(self):
-        conn = sqlite3.connect(os.path.join(os.path.dirname(__file__), "../db/clubbot.db"))
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT g.id, g.name, g.status, COUNT(cgm.contact_id) as total
-            FROM groups g
-            LEFT JOIN contact_group_map cgm ON g.id = cgm.group_id
-            GROUP BY g.id, g.name, g.status
-        """)
-        rows = cursor.fetchall()
+        # Member counts come from group_stats (kept by triggers), not from counting the map
+        self.groups = list_groups(get_connection())
         self.group_table.setRowCount(0)
-        for i, (gid, name, status, total) in enumerate(rows):
+        for i, (gid, name, status, total) in enumerate(self.groups):
             self.group_table.insertRow(i)
             self.group_table.setItem(i, 0, QTableWidgetItem(name))
             self.group_table.setItem(i, 1, QTableWidgetItem(str(total)))
@@ -138,17 +146,18 @@ class GroupManagerDialog(QDialog):
             status_toggle = QPushButton("Deactivate" if status == "active" else "Activate")
             status_toggle.clicked.connect(partial(self.toggle_group_status_by_id, gid, status))
             self.group_table.setCellWidget(i, 3, status_toggle)
-        conn.close()
 
         if hasattr(self, 'group_select'):
+            # Rebuilt quietly and the selected group kept, so staged changes are not dropped
+            selected = self.group_select.currentData()
+            self.group_select.blockSignals(True)
             self.group_select.clear()
-            conn = sqlite3.connect(os.path.join(os.path.dirname(__file__), "../db/clubbot.db"))
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, name, status FROM groups")
-            self.groups = cursor.fetchall()
             for group in self.groups:
                 self.group_select.addItem(f"{group[1]} ({group[2]})", group[0])
-            conn.close()
+            self.group_select.setCurrentIndex(max(self.group_select.findData(selected), 0))
+            self.group_select.blockSignals(False)
+            if self.current_group_id() != self.members_group_id:
+                self.load_contacts()
 
     def edit_group_dialog(self, group_id, current_name):
         self.editing_group_id = group_id
@@ -161,12 +170,7 @@ class GroupManagerDialog(QDialog):
 
     def toggle_group_status_by_id(self, group_id, current_status):
         new_status = "inactive" if current_status == "active" else "active"
-        conn = sqlite3.connect(os.path.join(os.path.dirname(__file__), "../db/clubbot.db"))
-        cursor = conn.cursor()
-        cursor.execute("UPDATE groups SET status = ? WHERE id = ?", (new_status, group_id))
-        conn.commit()
-        conn.close()
-        self.load_group_summary()
+        set_group_status(get_connection(), group_id, new_status)
         self.load_group_summary()
 
     def toggle_group_status(self):
@@ -176,90 +180,162 @@ class GroupManagerDialog(QDialog):
         group_id = self.group_select.itemData(index)
         current_status = self.groups[index][2]
         new_status = "inactive" if current_status == "active" else "active"
-        conn = sqlite3.connect(os.path.join(os.path.dirname(__file__), "../db/clubbot.db"))
-        cursor = conn.cursor()
-        cursor.execute("UPDATE groups SET status = ? WHERE id = ?", (new_status, group_id))
-        conn.commit()
-        conn.close()
-        self.load_groups()
+        set_group_status(get_connection(), group_id, new_status)
+        self.load_group_summary()
 
-    def load_contacts(self):
-        search = self.search_input.text().lower()
+    def current_group_id(self):
+        if self.editing_group_id:
+            return self.editing_group_id
+        if self.group_select.currentIndex() >= 0:
+            return self.group_select.itemData(self.group_select.currentIndex())
+        return None
+
+    def current_filter(self):
         rating_filter = self.rating_filter.currentText()
+        return self.search_input.text().strip(), None if rating_filter == "All Ratings" else int(rating_filter)
 
-        conn = sqlite3.connect(os.path.join(os.path.dirname(__file__), "../db/clubbot.db"))
-        cursor = conn.cursor()
-
-        # Determine selected group
-        group_id = None
-        if hasattr(self, 'editing_group_id') and self.editing_group_id:
-            group_id = self.editing_group_id
-        elif hasattr(self, 'group_select') and self.group_select.currentIndex() >= 0:
-            group_id = self.group_select.itemData(self.group_select.currentIndex())
-
-        # Fetch all contacts
-        cursor.execute("SELECT rowid, name, whatsapp, rating FROM contacts")
-        all_contacts = cursor.fetchall()
-
-        # Fetch contacts already in group
-        assigned_ids = set()
-        if group_id:
-            cursor.execute("SELECT contact_id FROM contact_group_map WHERE group_id = ?", (group_id,))
-            assigned_ids = {row[0] for row in cursor.fetchall()}
-
-        conn.close()
-
-        filtered = []
-        for r in all_contacts:
-            if search and search not in r[1].lower() and search not in r[2]:
-                continue
-            if rating_filter != "All Ratings" and str(r[3]) != rating_filter:
-                continue
-            filtered.append(r)
-
-        self.contacts_table.setRowCount(0)
-        for i, (cid, name, whatsapp, rating) in enumerate(filtered):
-            self.contacts_table.insertRow(i)
-            self.contacts_table.setItem(i, 0, QTableWidgetItem(name))
-            self.contacts_table.setItem(i, 1, QTableWidgetItem(whatsapp))
+    def load_contacts(self):
+        group_id = self.current_group_id()
+        if group_id != self.members_group_id:
+            self.confirm_pending_changes()
+            self.members_group_id = group_id
+            self.members = group_members(get_connection(), group_id) if group_id else set()
+            self.staged_add.clear()
+            self.staged_remove.clear()
+
+        contacts = filtered_contacts(get_connection(), *self.current_filter())
+
+        # Checkable items instead of a QCheckBox widget per row; signals are blocked while filling
+        self.contacts_table.blockSignals(True)
+        self.contacts_table.setRowCount(len(contacts))
+        for i, (cid, name, whatsapp, rating) in enumerate(contacts):
+            self.contacts_table.setItem(i, 0, QTableWidgetItem(name or ""))
+            self.contacts_table.setItem(i, 1, QTableWidgetItem(whatsapp or ""))
             self.contacts_table.setItem(i, 2, QTableWidgetItem(str(rating)))
 
-            checkbox = QCheckBox()
-            if cid in assigned_ids:
-                checkbox.setChecked(True)
-            checkbox.stateChanged.connect(partial(self.toggle_contact_group_assignment, cid))
-            self.contacts_table.setCellWidget(i, 3, checkbox)
+            check_item = QTableWidgetItem()
+            check_item.setFlags(Qt.ItemIsUserCheckable | Qt.ItemIsEnabled)
+            check_item.setData(Qt.UserRole, cid)
+            check_item.setCheckState(Qt.Checked if self.is_member(cid) else Qt.Unchecked)
+            self.contacts_table.setItem(i, 3, check_item)
+        self.contacts_table.blockSignals(False)
+        self.update_pending_label()
 
-    def toggle_contact_group_assignment(self, contact_id, state):
-        index = self.group_select.currentIndex()
-        if index < 0:
+    def is_member(self, contact_id):
+        """Membership as it will be after saving the staged changes."""
+        return contact_id in self.staged_add or (contact_id in self.members and contact_id not in self.staged_remove)
+
+    def stage_contact_assignment(self, item):
+        if item.column() != 3 or self.members_group_id is None:
             return
-        group_id = self.group_select.itemData(index)
+        self.stage(item.data(Qt.UserRole), item.checkState() == Qt.Checked)
+        self.update_pending_label()
+
+    def stage(self, contact_id, checked):
+        if checked:
+            self.staged_remove.discard(contact_id)
+            if contact_id not in self.members:
+                self.staged_add.add(contact_id)
+        else:
+            self.staged_add.discard(contact_id)
+            if contact_id in self.members:
+                self.staged_remove.add(contact_id)
+
+    def update_pending_label(self):
+        pending = len(self.staged_add) + len(self.staged_remove)
+        self.pending_label.setText(f"{len(self.staged_add)} to add, {len(self.staged_remove)} to remove"
+                                   if pending else "")
+        self.save_btn.setEnabled(bool(pending))
+
+    def save_changes(self):
+        """Writes the staged additions and removals of the current group in one transaction."""
+        if self.members_group_id is None or not (self.staged_add or self.staged_remove):
+            return
+        try:
+            apply_membership_changes(get_connection(), self.members_group_id, self.staged_add, self.staged_remove)
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"Could not save group members: {e}")
+            return
+        self.members = (self.members | self.staged_add) - self.staged_remove
+        self.staged_add.clear()
+        self.staged_remove.clear()
+        self.update_pending_label()
+        self.load_group_summary()
 
-        conn = sqlite3.connect(os.path.join(os.path.dirname(__file__), "../db/clubbot.db"))
-        cursor = conn.cursor()
+    def confirm_pending_changes(self):
+        """Offers to save staged changes before they would be lost (group switch or close)."""
+        if not (self.staged_add or self.staged_remove):
+            return
+        answer = QMessageBox.question(self, "Unsaved Changes",
+                                      f"Save {len(self.staged_add)} additions and {len(self.staged_remove)} "
+                                      f"removals to the group?", QMessageBox.Yes | QMessageBox.No)
+        if answer == QMessageBox.Yes:
+            self.save_changes()
+
+    def add_all_matching(self):
+        group_id = self.current_group_id()
+        if not group_id:
+            QMessageBox.warning(self, "No Group", "Select a group first.")
+            return
+        # The member list is reloaded afterwards, so staged changes are saved now or dropped, as on a group switch
+        self.confirm_pending_changes()
+        self.staged_add.clear()
+        self.staged_remove.clear()
+        try:
+            added = add_matching_to_group(get_connection(), group_id, *self.current_filter())
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"Could not add contacts: {e}")
+            return
+        self.reload_members()
+        QMessageBox.information(self, "Group Updated", f"Added {added} contacts to the group.")
 
-        if state == Qt.Checked:
-            cursor.execute("INSERT OR IGNORE INTO contact_group_map (contact_id, group_id) VALUES (?, ?)",
-                           (contact_id, group_id))
-        else:
-            cursor.execute("DELETE FROM contact_group_map WHERE contact_id = ? AND group_id = ?",
-                           (contact_id, group_id))
+    def remove_all_members(self):
+        group_id = self.current_group_id()
+        if not group_id:
+            QMessageBox.warning(self, "No Group", "Select a group first.")
+            return
+        confirm = QMessageBox.question(self, "Confirm Remove", "Remove every contact from this group?",
+                                       QMessageBox.Yes | QMessageBox.No)
+        if confirm != QMessageBox.Yes:
+            return
+        # Staged changes would be wiped out by the delete anyway
+        self.staged_add.clear()
+        self.staged_remove.clear()
+        try:
+            removed = remove_all_from_group(get_connection(), group_id)
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"Could not remove contacts: {e}")
+            return
+        self.reload_members()
+        QMessageBox.information(self, "Group Updated", f"Removed {removed} contacts from the group.")
 
-        conn.commit()
-        conn.close()
+    def reload_members(self):
+        self.members_group_id = None  # Forces load_contacts to read the members again
+        self.load_contacts()
+        self.load_group_summary()
 
     def select_all_contacts(self):
-        for row in range(self.contacts_table.rowCount()):
-            checkbox = self.contacts_table.cellWidget(row, 3)
-            if checkbox:
-                checkbox.setChecked(True)
+        self.set_visible_checked(True)
 
     def deselect_all_contacts(self):
+        self.set_visible_checked(False)
+
+    def set_visible_checked(self, checked):
+        if self.members_group_id is None:
+            return
+        self.contacts_table.blockSignals(True)
         for row in range(self.contacts_table.rowCount()):
-            checkbox = self.contacts_table.cellWidget(row, 3)
-            if checkbox:
-                checkbox.setChecked(False)
+            item = self.contacts_table.item(row, 3)
+            if item:
+                item.setCheckState(Qt.Checked if checked else Qt.Unchecked)
+                self.stage(item.data(Qt.UserRole), checked)
+        self.contacts_table.blockSignals(False)
+        self.contacts_table.viewport().update()
+        self.update_pending_label()
+
+    def done(self, result):
+        self.confirm_pending_changes()
+        super().done(result)
 
     def load_group_contacts(self):
         self.load_contacts()
@@ -0,0 +1,34 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from db.connection import get_connection, release_thread_connection
+from db.csv_import import import_contacts_csv
+
+
+class CsvImportWorker(QThread):
+    """Runs the CSV contact import off the GUI thread and reports progress through signals."""
+
+    progress = pyqtSignal(int, int)  # contacts written so far, percent of the file read
+    completed = pyqtSignal(object)  # db.csv_import.ImportResult
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            result = import_contacts_csv(
+                get_connection(),  # This thread's own pooled connection
+                self.file_path,
+                progress_callback=self.progress.emit,
+                should_cancel=lambda: self._cancelled,
+            )
+            self.completed.emit(result)
+        except Exception as e:
+            self.failed.emit(str(e))
+        finally:
+            release_thread_connection()
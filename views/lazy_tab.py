@@ -0,0 +1,50 @@
+import importlib
+
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QLabel, QVBoxLayout, QWidget
+
+
+class LazyTab(QWidget):
+    """
+    Stand-in for a main window tab. The real tab is imported and constructed the first time this
+    placeholder is painted, i.e. when its tab is first shown, so hidden tabs cost nothing at startup.
+    `target` is "module:ClassName", e.g. "views.reports_view:ReportsTab".
+    """
+
+    built = pyqtSignal(object)  # The real tab widget
+
+    def __init__(self, target, parent=None):
+        super().__init__(parent)
+        self.target = target
+        self.widget = None
+        self._scheduled = False
+
+        self.placeholder = QLabel("Loading...")
+        self.placeholder.setAlignment(Qt.AlignCenter)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.placeholder)
+        self.setLayout(layout)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.widget is None and not self._scheduled:
+            self._scheduled = True
+            QTimer.singleShot(0, self.build)  # Once the placeholder is on screen
+
+    def build(self):
+        if self.widget is not None:
+            return self.widget
+        module_name, class_name = self.target.split(":")
+        try:
+            widget_class = getattr(importlib.import_module(module_name), class_name)
+            self.widget = widget_class()
+        except Exception as e:  # Raising out of a Qt slot would abort the whole application
+            self.placeholder.setText(f"❌ Could not open this tab: {e}")
+            print(f"❌ Could not build {self.target}: {e}")
+            return None
+        self.layout().removeWidget(self.placeholder)
+        self.placeholder.deleteLater()
+        self.layout().addWidget(self.widget)
+        self.built.emit(self.widget)
+        return self.widget
@@ -1,27 +1,14 @@
 import sqlite3
-import hashlib
 import os
-import requests  # For HTTP requests to Google Apps Script
-import uuid  # For getting MAC address
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox,
     QHBoxLayout, QGroupBox, QSpacerItem, QSizePolicy
 )
 from PyQt5.QtCore import Qt
-
-# --- Google Sheets Access Control Configuration ---
-# REPLACE THIS WITH YOUR DEPLOYED GOOGLE APPS SCRIPT WEB APP URL
-# Example: "https://script.google.com/macros/s/YOUR_DEPLOYMENT_ID/exec"
-GOOGLE_APPS_SCRIPT_URL = "https://script.google.com/macros/s/AKfycbzlZsY44p-P7BQyTkgOEg_Yd9Oly5t5SHTihOMIdFT6WM7CxnKTs6dipqLzI2bPlZTL/exec"  # <--- UPDATED!
-
-
-def get_mac_address():
-    """Retrieves the MAC address of the current machine."""
-    # Using uuid.getnode() which is cross-platform.
-    # Format it as XX:XX:XX:XX:XX:XX
-    mac_num = uuid.getnode()
-    mac_hex = ':'.join(f"{(mac_num >> i) & 0xff:02x}" for i in range(40, -1, -8))
-    return mac_hex
+from auth.access import ALLOWED, DENIED, AccessResult, UNREACHABLE, check_access, get_mac_address
+from auth.passwords import AuthResult, authenticate
+from db.connection import get_connection
+from views.query_worker import QueryWorker
 
 
 class LoginDialog(QDialog):
@@ -86,102 +73,74 @@ class LoginDialog(QDialog):
         self.logged_in_username = None
         self.logged_in_role = None
 
-    def db_connection(self):
-        """Helper method to establish local database connection."""
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        db_path = os.path.join(base_dir, "..", "db", "clubbot.db")
-        return sqlite3.connect(db_path)
+        # State of the login attempt in progress: the access check and the password check run on
+        # worker threads side by side and the attempt completes when both have succeeded
+        self.attempt = 0
+        self.access_worker = None
+        self.access_result = None
+        self.auth_worker = None
+        self.auth_result = None
 
-    def hash_password(self, password):
-        """Hashes a password using SHA256."""
-        return hashlib.sha256(password.encode()).hexdigest()
+    def db_connection(self):
+        """Returns the shared pooled local database connection for this thread."""
+        return get_connection()
+
+    def start_authentication(self, username, password):
+        """Verifies the password (a deliberately slow key derivation) on a worker thread."""
+        attempt = self.attempt
+        self.auth_worker = QueryWorker(lambda conn: authenticate(conn, username, password), self)
+        self.auth_worker.loaded.connect(lambda result: self.on_authenticated(attempt, result))
+        self.auth_worker.failed.connect(lambda error: self.on_authenticated(attempt, AuthResult(
+            None, f"Local DB error: {error}")))
+        self.auth_worker.start()
+
+    def on_authenticated(self, attempt, result):
+        if attempt != self.attempt:
+            return  # Answer to an earlier attempt
+        if result.user is None:
+            # The access verdict is not needed any more; a later answer to this attempt is ignored
+            self.attempt += 1
+            self.message_label.setText(result.message)
+            self.login_button.setEnabled(True)
+            return
+        self.auth_result = result
+        self.finish_login()
 
-    def authenticate_user(self, username, password):
-        """
-        Authenticates a user against the local database.
-        Returns (user_id, username, role) tuple on success, None otherwise.
-        """
-        conn = None
-        try:
-            conn = self.db_connection()
-            cursor = conn.cursor()
-
-            cursor.execute("SELECT id, username, password_hash, role, status FROM users WHERE username = ?",
-                           (username,))
-            user_record = cursor.fetchone()
-
-            if user_record:
-                user_id, db_username, stored_password_hash, role, status = user_record
-                if status == 'inactive':
-                    self.message_label.setText("Account is inactive. Please contact admin.")
-                    return None
-
-                entered_password_hash = self.hash_password(password)
-                if entered_password_hash == stored_password_hash:
-                    return user_id, db_username, role
-                else:
-                    self.message_label.setText("Invalid username or password.")
-            else:
-                self.message_label.setText("Invalid username or password.")
-            return None
-        except sqlite3.Error as e:
-            self.message_label.setText(f"Local DB error: {e}")
-            print(f"Login local DB error: {e}")
-            return None
-        except Exception as e:
-            self.message_label.setText(f"An unexpected error occurred during local DB authentication: {e}")
-            print(f"Login unexpected error during local DB auth: {e}")
-            return None
-        finally:
-            if conn:
-                conn.close()
-
-    def _check_remote_access_and_log(self, username, mac_address):
+    def start_access_check(self, username, mac_address):
         """
-        Communicates with the Google Apps Script to check access status
-        and log the login attempt.
+        Checks this machine's access (cached "allowed" verdict, else the Google Apps Script, which
+        also logs the attempt) on a worker thread; on_access_checked receives the verdict.
         """
-        if not GOOGLE_APPS_SCRIPT_URL or GOOGLE_APPS_SCRIPT_URL == "YOUR_GOOGLE_APPS_SCRIPT_WEB_APP_URL_HERE":
-            self.message_label.setText("Google Apps Script URL not configured. Access check skipped.")
-            print("WARNING: GOOGLE_APPS_SCRIPT_URL is not set. Remote access control is disabled.")
-            return True  # Allow access if URL is not configured
-
-        try:
-            # First, check the access status for this MAC address.
-            # The GAS script will return 'allowed' or 'denied', and also log/update
-            # the entry if it's a new MAC or an existing 'allowed' one.
-            params = {"action": "check", "mac": mac_address, "username": username}
-            response = requests.get(GOOGLE_APPS_SCRIPT_URL, params=params, timeout=10)
-            response.raise_for_status()  # Raises HTTPError for bad responses (4xx or 5xx)
-
-            result = response.text.strip().lower()
-            print(f"GAS response for MAC check ({mac_address}): {result}")
-
-            if result == "allowed":
-                return True
-            elif result == "denied":
-                self.message_label.setText("Configuration error Code:Access. Please contact developer.")
-                QMessageBox.warning(self, "Access Denied",
-                                    "Configuration error Code:Access. Please contact the developer.")
-                return False
-            else:
-                self.message_label.setText(f"Unknown response from access server: {result}")
-                QMessageBox.critical(self, "Access Error",
-                                     "Unknown response from access control server. Please contact developer.")
-                return False
-        except requests.exceptions.Timeout:
-            self.message_label.setText("Access timed out. Please check your network.")
-            QMessageBox.critical(self, "Network Error", "Connection to access timed out. Please try again.")
-            return False
-        except requests.exceptions.RequestException as e:
-            self.message_label.setText(f"Error connecting to access server: {e}")
+        attempt = self.attempt
+        self.access_worker = QueryWorker(lambda conn: check_access(conn, mac_address, username), self)
+        self.access_worker.loaded.connect(lambda result: self.on_access_checked(attempt, result))
+        self.access_worker.failed.connect(lambda error: self.on_access_checked(attempt, AccessResult(
+            UNREACHABLE, f"An unexpected error occurred during access check: {error}", False)))
+        self.access_worker.start()
+
+    def on_access_checked(self, attempt, result):
+        if attempt != self.attempt:
+            return  # Answer to an earlier attempt
+        self.access_result = result
+        self.finish_login()
+
+    def finish_login(self):
+        """Completes the attempt once both the access verdict and the local authentication are in."""
+        if self.auth_result is None or self.access_result is None:
+            return
+        result = self.access_result
+        self.login_button.setEnabled(True)
+        if result.verdict == ALLOWED:
+            self.logged_in_user_id, self.logged_in_username, self.logged_in_role = self.auth_result.user
+            self.accept()  # Close dialog and signal success
+        elif result.verdict == DENIED:
+            self.message_label.setText(result.message)
+            QMessageBox.warning(self, "Access Denied",
+                                "Configuration error Code:Access. Please contact the developer.")
+        else:
+            self.message_label.setText(result.message)
             QMessageBox.critical(self, "Network Error",
-                                 f"Could not reach access control . Please check your network/URL. Error: {e}")
-            return False
-        except Exception as e:
-            self.message_label.setText(f"An unexpected error occurred during  access check: {e}")
-            print(f"Unexpected error in access check: {e}")
-            return False
+                                 f"Could not reach access control. Please check your network/URL. {result.message}")
 
     def handle_login(self):
         """Handles the login button click event."""
@@ -200,21 +159,12 @@ class LoginDialog(QDialog):
                                  "Unable to retrieve MAC address. Please check your network connection.")
             return
 
-        # 1. Check MAC access from Google Sheet AND log/update the entry
-        # The GAS script handles logging/updating based on the 'check' action
-        # If the MAC is 'deny' in sheet, it will return False and show an alert.
-        if not self._check_remote_access_and_log(username, current_mac_address):
-            return  # Access denied, so stop login process
-
-        # 2. Authenticate user against local database (only if remote access is allowed)
-        user_info = self.authenticate_user(username, password)
+        self.attempt += 1
+        self.access_result = None
+        self.auth_result = None
+        self.login_button.setEnabled(False)
+        self.message_label.setText("Checking access...")
 
-        if user_info:
-            self.logged_in_user_id = user_info[0]
-            self.logged_in_username = user_info[1]
-            self.logged_in_role = user_info[2]
-
-            self.accept()  # Close dialog and signal success
-        else:
-            # Message is already set by authenticate_user method for local DB auth issues
-            pass
+        # The MAC access check (cache or Google Sheet) and the local password check run side by side
+        self.start_access_check(username, current_mac_address)
+        self.start_authentication(username, password)
@@ -8,6 +8,8 @@ from PyQt5.QtWidgets import (
     QTableWidget, QTableWidgetItem, QLabel, QMessageBox, QComboBox, QWidget as QW
 )
 from PyQt5.QtCore import Qt
+from db.connection import get_connection
+from campaign.templates import compile_template, validate_template
 
 
 class MessagesTab(QWidget):
@@ -30,7 +32,10 @@ class MessagesTab(QWidget):
         layout.addWidget(self.type_input)
 
         self.content_input = QTextEdit()
-        self.content_input.setPlaceholderText("Enter message content here. Use {Name} for personalization.")
+        self.content_input.setPlaceholderText(
+            "Enter message content here. Use {Name} or any contact field ({last_club}, {birthday}, {rating}), "
+            "{last_club|default}, {Hi|Hello} variants and {if rating}...{else}...{end}."
+        )
         layout.addWidget(self.content_input)
 
         self.save_btn = QPushButton("Save Message Template")
@@ -54,7 +59,7 @@ class MessagesTab(QWidget):
         self.setLayout(layout)
 
     def db_connection(self):
-        return sqlite3.connect(os.path.join(os.path.dirname(__file__), "../db/clubbot.db"))
+        return get_connection()
 
     def load_message_types(self):
         conn = self.db_connection()
@@ -117,6 +122,21 @@ class MessagesTab(QWidget):
             QMessageBox.warning(self, "Validation Error", "Both type and content are required.")
             return
 
+        # Placeholders are checked against the contacts schema before the template is stored
+        template_error = validate_template(msg_content)
+        if template_error:
+            QMessageBox.warning(self, "Template Error", template_error)
+            return
+        literal_tags = compile_template(msg_content).literal_tags
+        if literal_tags:
+            confirm = QMessageBox.question(
+                self, "Unknown Placeholders",
+                f"Not contact fields, sent as written: {', '.join(literal_tags)}\n"
+                f"Write {{{{ and }}}} for literal braces. Save anyway?",
+                QMessageBox.Yes | QMessageBox.No)
+            if confirm != QMessageBox.Yes:
+                return
+
         conn = self.db_connection()
         cursor = conn.cursor()
 
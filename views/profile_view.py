@@ -3,6 +3,9 @@ from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QLabel, QGridLayout, QPushButton, QHBoxLayout, QMessageBox, QWidget
 )
 from PyQt5.QtCore import Qt  # Import Qt for alignment
+from db.connection import get_connection
+from db.contacts import get_contact
+from db.club_visits import CLUB_NAMES, WEEK_DAYS, club_key, load_visits
 from views.add_contact_dialog import AddContactDialog
 import os
 
@@ -42,9 +45,7 @@ class ContactProfileDialog(QDialog):
 
     # Helper method for consistent database connection
     def db_connection(self):
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        db_path = os.path.join(base_dir, "..", "db", "clubbot.db")
-        return sqlite3.connect(db_path)
+        return get_connection()
 
     def build_ui(self):
         """Builds the UI for basic contact information."""
@@ -63,12 +64,8 @@ class ContactProfileDialog(QDialog):
 
     def build_club_visit_frequency_ui(self):
         """Builds the read-only UI for club visit frequency."""
-        self.week_days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-        self.club_names = [
-            "Cirque Le Soir", "Madox", "Tabu", "Leo", "Reign", "Tape",
-            "Dear Darling", "The Box", "Lio", "Dolce", "Gallery", "Rex Rooms", "Selene"
-        ]
-        self.club_names.sort()  # Ensure consistent order
+        self.week_days = [day.capitalize() for day in WEEK_DAYS]
+        self.club_names = CLUB_NAMES  # Already sorted, same order as the edit dialog
 
         # Add day headers to the grid (first row, starting from column 1)
         for col, day in enumerate(self.week_days):
@@ -78,10 +75,9 @@ class ContactProfileDialog(QDialog):
 
         self.club_day_display_labels = {}  # Store QLabel references for updating
         for row, club in enumerate(self.club_names):
-            # Generate club_key consistent with add_contact_dialog.py and init_db_schema.py
-            club_key = club.lower().replace(' ', '_').replace('.', '')
+            key = club_key(club)
 
-            self.club_day_display_labels[club_key] = {}
+            self.club_day_display_labels[key] = {}
 
             club_label = QLabel(club)
             self.club_visit_display_grid.addWidget(club_label, row + 1, 0)  # +1 for header row
@@ -92,7 +88,7 @@ class ContactProfileDialog(QDialog):
                 # Create a QLabel to display the value
                 value_label = QLabel("0")  # Default to 0
                 value_label.setAlignment(Qt.AlignCenter)
-                self.club_day_display_labels[club_key][day_key] = value_label
+                self.club_day_display_labels[key][day_key] = value_label
                 self.club_visit_display_grid.addWidget(value_label, row + 1, col + 1)
 
     def load_contact(self):
@@ -101,20 +97,11 @@ class ContactProfileDialog(QDialog):
         full_contact_data = {}
         try:
             conn = self.db_connection()
-            cursor = conn.cursor()
-
-            # Get all column names from the 'contacts' table dynamically
-            cursor.execute("PRAGMA table_info(contacts);")
-            columns_info = cursor.fetchall()
-            column_names = [col[1] for col in columns_info]
 
-            # Fetch all data for the contact using SELECT *
-            cursor.execute(f"SELECT * FROM contacts WHERE rowid = ?", (self.rowid,))
-            result = cursor.fetchone()
+            # Only the contact's own columns; visit counts come from the visits store
+            full_contact_data = get_contact(conn, self.rowid)
 
-            if result:
-                # Map fetched tuple data to a dictionary using column names
-                full_contact_data = dict(zip(column_names, result))
+            if full_contact_data:
 
                 # Populate basic info labels
                 for key in self.field_keys:
@@ -124,13 +111,10 @@ class ContactProfileDialog(QDialog):
                             str(full_contact_data[key]) if full_contact_data[key] is not None else "-")
 
                 # Populate club visit frequency labels
-                for club_key, day_labels in self.club_day_display_labels.items():
+                visits = load_visits(conn, self.rowid)
+                for key, day_labels in self.club_day_display_labels.items():
                     for day_key, label_widget in day_labels.items():
-                        column_name = f"{club_key}_{day_key}"
-                        if column_name in full_contact_data and full_contact_data[column_name] is not None:
-                            label_widget.setText(str(full_contact_data[column_name]))
-                        else:
-                            label_widget.setText("0")  # Default if column is missing or value is None
+                        label_widget.setText(str(visits.get(key, {}).get(day_key, 0)))
             else:
                 QMessageBox.warning(self, "Error", "Contact not found.")
 
@@ -148,21 +132,9 @@ class ContactProfileDialog(QDialog):
         contact_data = {}
         try:
             conn = self.db_connection()
-            cursor = conn.cursor()
-
-            # Get all column names from the 'contacts' table dynamically
-            cursor.execute("PRAGMA table_info(contacts);")
-            columns_info = cursor.fetchall()
-            column_names = [col[1] for col in columns_info]
+            contact_data = get_contact(conn, self.rowid)  # Includes "rowid"
 
-            # Fetch all data for the contact using SELECT *
-            cursor.execute(f"SELECT * FROM contacts WHERE rowid = ?", (self.rowid,))
-            result = cursor.fetchone()
-
-            if result:
-                contact_data = dict(zip(column_names, result))
-                contact_data["rowid"] = self.rowid  # Add rowid to the dictionary
-            else:
+            if not contact_data:
                 QMessageBox.warning(self, "Error", "Contact data not found for editing.")
                 return
 
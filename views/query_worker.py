@@ -0,0 +1,25 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from db.connection import get_connection, release_thread_connection
+
+
+class QueryWorker(QThread):
+    """
+    Runs `query(conn)` on its own thread and connection and hands the result back through
+    `loaded`, so a tab can show itself first and fill in its data when it arrives.
+    """
+
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, query, parent=None):
+        super().__init__(parent)
+        self.query = query
+
+    def run(self):
+        try:
+            self.loaded.emit(self.query(get_connection()))  # This thread's own pooled connection
+        except Exception as e:
+            self.failed.emit(str(e))
+        finally:
+            release_thread_connection()
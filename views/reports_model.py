@@ -0,0 +1,98 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QBrush, QColor
+
+from db.connection import get_connection
+from db.reports import REPORT_PAGE_SIZE, ReportFilter, fetch_report_page
+
+
+class DeliveryReportsModel(QAbstractTableModel):
+    """
+    delivery_report rows for the current filter, loaded a page at a time as the user scrolls.
+    Pages continue from the last loaded row's sort key, so scrolling deep costs the same as the first page.
+    """
+
+    HEADERS = ["Date", "Contact", "WhatsApp", "Campaign", "Message", "Status", "Latency (ms)", "Error"]
+    SORT_KEYS = {0: "date", 2: "number"}  # Sortable columns -> db.reports.SORT_COLUMNS key
+
+    def __init__(self, parent=None, page_size=REPORT_PAGE_SIZE):
+        super().__init__(parent)
+        self.page_size = page_size
+        self.filters = ReportFilter()
+        self.sort_column = 0
+        self.descending = True
+        self._rows = []
+        self._exhausted = False
+
+    # --- Loading ---
+    def set_filter(self, filters):
+        self.filters = filters
+        self.refresh()
+
+    def refresh(self):
+        """Drops the loaded rows and reloads the first page for the current filter and sort."""
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent):
+        if parent.isValid() or self._exhausted:
+            return
+        after = (self._rows[-1][0], self._rows[-1][1]) if self._rows else None
+        rows = fetch_report_page(get_connection(), self.filters, self.SORT_KEYS[self.sort_column],
+                                 self.descending, after, self.page_size)
+        if len(rows) < self.page_size:
+            self._exhausted = True
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # Only indexed columns can be paged in order; the tab puts the indicator back for the others
+        if column not in self.SORT_KEYS:
+            return
+        self.sort_column = column
+        self.descending = order == Qt.DescendingOrder
+        self.refresh()
+
+    # --- QAbstractTableModel interface ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        values = self._rows[index.row()][2:]  # Without the sort key and id
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            value = values[column]
+            if column == 1:
+                return value or "Unknown"
+            return "" if value is None else str(value)
+        elif role == Qt.ForegroundRole and column == 5:
+            status = (values[5] or "").lower()
+            if status == "sent":
+                return QBrush(QColor("green"))
+            if status == "failed":
+                return QBrush(QColor("red"))
+            return QBrush(QColor("orange"))
+        return None
+
+    def flags(self, index):
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled
@@ -1,76 +1,177 @@
-import os
-import sqlite3
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem, QPushButton, QLabel
+    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QTableView, QPushButton, QLabel,
+    QComboBox, QDateEdit, QHeaderView, QAbstractItemView
 )
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QColor, QBrush
+from PyQt5.QtCore import Qt, QDate
+from db.connection import get_connection
+from db.delivery_stats import fetch_message_type_stats, refresh_delivery_stats
+from db.reports import ReportFilter, default_filter, fetch_rollup, list_report_campaigns, report_totals
+from views.query_worker import QueryWorker
+from views.reports_model import DeliveryReportsModel
+
+SUMMARY_GROUPS = [("Day", "day"), ("Campaign", "campaign"), ("Message", "message")]
+
+
+def fetch_report_summary(filters, group_by, refresh=False):
+    """
+    Query for QueryWorker: totals, rollup rows, performance per message type and the campaign list.
+    All read small tables. With `refresh` the statistics are first brought up to date with the
+    reports logged since the last refresh; that takes the write lock, so filter changes only read.
+    """
+    def query(conn):
+        if refresh:
+            refresh_delivery_stats(conn)
+        return (report_totals(conn, filters), fetch_rollup(conn, filters, group_by),
+                fetch_message_type_stats(conn, filters.date_from, filters.date_to), list_report_campaigns(conn))
+    return query
+
 
 class ReportsTab(QWidget):
     def __init__(self):
         super().__init__()
         self.layout = QVBoxLayout()
+        self.loader = None
         self.setup_ui()
         self.setLayout(self.layout)
 
     def db_connection(self):
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        return sqlite3.connect(os.path.join(base_dir, "../db/clubbot.db"))
+        return get_connection()
 
     def setup_ui(self):
-        self.reports_table = QTableWidget()
-        self.reports_table.setColumnCount(4)
-        self.reports_table.setHorizontalHeaderLabels(["Contact Name", "Message", "Status", "Date"])
+        defaults = default_filter()
+        filter_layout = QHBoxLayout()
+        self.date_from = QDateEdit(QDate.fromString(defaults.date_from, Qt.ISODate))
+        self.date_to = QDateEdit(QDate.fromString(defaults.date_to, Qt.ISODate))
+        for date_edit in (self.date_from, self.date_to):
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat("yyyy-MM-dd")
+        self.campaign_filter = QComboBox()
+        self.campaign_filter.addItem("All Campaigns", None)
+        self.status_filter = QComboBox()
+        self.status_filter.addItem("All Statuses", None)
+        self.status_filter.addItem("Sent", "Sent")
+        self.status_filter.addItem("Failed", "Failed")
+        self.summary_group = QComboBox()
+        for label, key in SUMMARY_GROUPS:
+            self.summary_group.addItem(label, key)
+        self.refresh_btn = QPushButton("Refresh Reports")
+        self.refresh_btn.clicked.connect(self.refresh_reports)
+
+        filter_layout.addWidget(QLabel("From:"))
+        filter_layout.addWidget(self.date_from)
+        filter_layout.addWidget(QLabel("To:"))
+        filter_layout.addWidget(self.date_to)
+        filter_layout.addWidget(self.campaign_filter)
+        filter_layout.addWidget(self.status_filter)
+        filter_layout.addWidget(QLabel("Summary by:"))
+        filter_layout.addWidget(self.summary_group)
+        filter_layout.addWidget(self.refresh_btn)
+        for signal in (self.date_from.dateChanged, self.date_to.dateChanged, self.campaign_filter.currentIndexChanged,
+                       self.status_filter.currentIndexChanged, self.summary_group.currentIndexChanged):
+            signal.connect(self.load_reports)
+
+        self.status_label = QLabel()
+
+        # Daily rollup (db/reports.py): one row per day, campaign or message
+        self.summary_table = QTableWidget()
+        self.summary_table.setColumnCount(4)
+        self.summary_table.setHorizontalHeaderLabels(["Day", "Sent", "Failed", "Failed %"])
+        self.summary_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.summary_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+        # Failure rate and median latency per message type (db/delivery_stats.py); all campaigns
+        self.performance_table = QTableWidget()
+        self.performance_table.setColumnCount(5)
+        self.performance_table.setHorizontalHeaderLabels(
+            ["Message Type", "Sent", "Failed", "Failed %", "Median Latency (ms)"])
+        self.performance_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.performance_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+        # Individual sends, paged in as the user scrolls; Date and WhatsApp headers sort
+        self.reports_model = DeliveryReportsModel(self)
+        self.reports_table = QTableView()
+        self.reports_table.setModel(self.reports_model)
         self.reports_table.horizontalHeader().setStretchLastSection(True)
-        self.reports_table.setWordWrap(True)
+        self.reports_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.reports_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.reports_table.horizontalHeader().setSortIndicator(0, Qt.DescendingOrder)
+        self.reports_table.setSortingEnabled(True)
+        self.reports_table.horizontalHeader().sectionClicked.connect(self.restore_sort_indicator)
 
-        self.refresh_btn = QPushButton("Refresh Reports")
-        self.refresh_btn.clicked.connect(self.load_reports)
+        self.layout.addWidget(QLabel("📊 Delivery Reports"))
+        self.layout.addLayout(filter_layout)
+        self.layout.addWidget(self.status_label)
+        summary_layout = QHBoxLayout()
+        summary_layout.addWidget(self.summary_table)
+        summary_layout.addWidget(self.performance_table)
+        self.layout.addLayout(summary_layout, 1)
+        self.layout.addWidget(self.reports_table, 2)
+
+        self.refresh_reports()
 
-        self.layout.addWidget(QLabel("📊 Campaign Report Viewer"))
-        self.layout.addWidget(self.reports_table)
-        self.layout.addWidget(self.refresh_btn)
+    def current_filter(self):
+        return ReportFilter(self.date_from.date().toString(Qt.ISODate), self.date_to.date().toString(Qt.ISODate),
+                            self.campaign_filter.currentData(), self.status_filter.currentData())
 
-        self.load_reports()
+    def refresh_reports(self):
+        """Refresh button: also counts the reports logged since the last refresh into the statistics."""
+        self.start_loading(refresh=True)
 
     def load_reports(self):
-        try:
-            conn = self.db_connection()
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT c.name, r.message, r.status, r.sent_date
-                FROM campaign_reports r
-                LEFT JOIN contacts c ON r.contact_id = c.rowid
-                ORDER BY r.sent_date DESC
-            ''')
-            rows = cursor.fetchall()
-            conn.close()
-        except Exception as e:
-            self.reports_table.setRowCount(0)
-            self.reports_table.setColumnCount(1)
-            self.reports_table.setHorizontalHeaderLabels(["Error"])
-            self.reports_table.insertRow(0)
-            self.reports_table.setItem(0, 0, QTableWidgetItem(f"Error: {str(e)}"))
-            return
-
-        self.reports_table.setRowCount(len(rows))
-
-        for i, (name, message, status, sent_date) in enumerate(rows):
-            self.reports_table.setItem(i, 0, QTableWidgetItem(name or "Unknown"))
-
-            msg_item = QTableWidgetItem(message)
-            msg_item.setFlags(Qt.ItemIsEnabled)
-            self.reports_table.setItem(i, 1, msg_item)
-
-            status_item = QTableWidgetItem(status)
-            if status.lower() == "sent":
-                status_item.setForeground(QBrush(QColor("green")))
-            elif status.lower() == "failed":
-                status_item.setForeground(QBrush(QColor("red")))
-            else:
-                status_item.setForeground(QBrush(QColor("orange")))
-            self.reports_table.setItem(i, 2, status_item)
-
-            date_item = QTableWidgetItem(sent_date)
-            date_item.setTextAlignment(Qt.AlignCenter)
-            self.reports_table.setItem(i, 3, date_item)
+        """Filter changes: reads the summary as it is."""
+        self.start_loading(refresh=False)
+
+    def start_loading(self, refresh):
+        """Reads the summary on a worker thread and reloads the first page of the detail list."""
+        filters = self.current_filter()
+        self.reports_model.set_filter(filters)
+        if self.loader is not None and self.loader.isRunning():
+            self.loader.loaded.disconnect()  # A newer filter replaces the one still loading
+        self.status_label.setText("⏳ Loading reports...")
+        self.loader = QueryWorker(fetch_report_summary(filters, self.summary_group.currentData(), refresh), self)
+        self.loader.loaded.connect(self.show_summary)
+        self.loader.failed.connect(self.show_error)
+        self.loader.start()
+
+    def show_error(self, message):
+        self.status_label.setText(f"❌ Error: {message}")
+
+    def show_summary(self, result):
+        (sent, failed), rows, performance, campaigns = result
+        total = sent + failed
+        rate = f" ({failed * 100 / total:.1f}% failed)" if total else ""
+        self.status_label.setText(f"{sent} sent, {failed} failed{rate}")
+        self.update_campaigns(campaigns)
+
+        self.summary_table.setHorizontalHeaderLabels([self.summary_group.currentText(), "Sent", "Failed", "Failed %"])
+        self.summary_table.setRowCount(len(rows))
+        for i, (label, row_sent, row_failed) in enumerate(rows):
+            row_total = row_sent + row_failed
+            self.summary_table.setItem(i, 0, QTableWidgetItem(label))
+            self.summary_table.setItem(i, 1, QTableWidgetItem(str(row_sent)))
+            self.summary_table.setItem(i, 2, QTableWidgetItem(str(row_failed)))
+            self.summary_table.setItem(i, 3, QTableWidgetItem(f"{row_failed * 100 / row_total:.1f}" if row_total else ""))
+
+        self.performance_table.setRowCount(len(performance))
+        for i, (message_type, type_sent, type_failed, failure_rate, median) in enumerate(performance):
+            self.performance_table.setItem(i, 0, QTableWidgetItem(message_type))
+            self.performance_table.setItem(i, 1, QTableWidgetItem(str(type_sent)))
+            self.performance_table.setItem(i, 2, QTableWidgetItem(str(type_failed)))
+            self.performance_table.setItem(i, 3, QTableWidgetItem(
+                f"{failure_rate * 100:.1f}" if failure_rate is not None else ""))
+            self.performance_table.setItem(i, 4, QTableWidgetItem(str(median) if median is not None else ""))
+
+    def update_campaigns(self, campaigns):
+        selected = self.campaign_filter.currentData()
+        self.campaign_filter.blockSignals(True)
+        self.campaign_filter.clear()
+        self.campaign_filter.addItem("All Campaigns", None)
+        for campaign_id, label in campaigns:
+            self.campaign_filter.addItem(label, campaign_id)
+        self.campaign_filter.setCurrentIndex(max(self.campaign_filter.findData(selected), 0))
+        self.campaign_filter.blockSignals(False)
+
+    def restore_sort_indicator(self, column):
+        if column not in DeliveryReportsModel.SORT_KEYS:
+            order = Qt.DescendingOrder if self.reports_model.descending else Qt.AscendingOrder
+            self.reports_table.horizontalHeader().setSortIndicator(self.reports_model.sort_column, order)
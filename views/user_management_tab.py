@@ -1,5 +1,4 @@
 import sqlite3
-import hashlib
 import os
 from functools import partial
 from PyQt5.QtWidgets import (
@@ -8,26 +7,25 @@ from PyQt5.QtWidgets import (
     QInputDialog
 )
 from PyQt5.QtCore import Qt
+from auth.passwords import hash_password, load_hash_params
+from db.connection import get_connection
+from views.query_worker import QueryWorker
 
 
 class UserManagementTab(QWidget):
     def __init__(self):
         super().__init__()
+        # Password hashing is a deliberately slow key derivation, so it runs on worker threads
+        self.add_worker = None
+        self.password_worker = None
         self.layout = QVBoxLayout()
         self.setLayout(self.layout)
         self.setup_ui()
         self.load_users()
 
     def db_connection(self):
-        """Helper method to establish database connection."""
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        # Assumes clubbot.db is in 'db' folder, one level up from 'views'
-        db_path = os.path.join(base_dir, "..", "db", "clubbot.db")
-        return sqlite3.connect(db_path)
-
-    def hash_password(self, password):
-        """Hashes a password using SHA256 (consistent with create_admin.py and login_dialog.py)."""
-        return hashlib.sha256(password.encode()).hexdigest()
+        """Returns the shared pooled database connection for this thread."""
+        return get_connection()
 
     def setup_ui(self):
         # Add New User Section
@@ -39,13 +37,13 @@ class UserManagementTab(QWidget):
         self.new_password_input.setEchoMode(QLineEdit.Password)
         self.new_role_combo = QComboBox()
         self.new_role_combo.addItems(["user", "admin"])  # Default to 'user' for new accounts
-        add_user_btn = QPushButton("Add New User")
-        add_user_btn.clicked.connect(self.add_user)
+        self.add_user_btn = QPushButton("Add New User")
+        self.add_user_btn.clicked.connect(self.add_user)
 
         add_user_layout.addWidget(self.new_username_input)
         add_user_layout.addWidget(self.new_password_input)
         add_user_layout.addWidget(self.new_role_combo)
-        add_user_layout.addWidget(add_user_btn)
+        add_user_layout.addWidget(self.add_user_btn)
         self.layout.addLayout(add_user_layout)
 
         self.layout.addWidget(QLabel("<b>Existing Users:</b>"))
@@ -105,7 +103,7 @@ class UserManagementTab(QWidget):
                 conn.close()
 
     def add_user(self):
-        """Adds a new user to the database."""
+        """Adds a new user to the database; the password is hashed on a worker thread."""
         username = self.new_username_input.text().strip()
         password = self.new_password_input.text().strip()
         role = self.new_role_combo.currentText()
@@ -114,49 +112,50 @@ class UserManagementTab(QWidget):
             QMessageBox.warning(self, "Input Error", "Username and password cannot be empty.")
             return
 
-        conn = None
-        try:
-            conn = self.db_connection()
-            cursor = conn.cursor()
-            hashed_password = self.hash_password(password)
-
-            cursor.execute("INSERT INTO users (username, password_hash, role, status) VALUES (?, ?, ?, 'active')",
-                           (username, hashed_password, role))
+        def insert_user(conn):
+            hashed_password = hash_password(password, load_hash_params(conn))
+            try:
+                conn.execute("INSERT INTO users (username, password_hash, role, status) VALUES (?, ?, ?, 'active')",
+                             (username, hashed_password, role))
+            except sqlite3.IntegrityError:
+                return False  # Username taken
             conn.commit()
+            return True
+
+        self.add_user_btn.setEnabled(False)
+        self.add_worker = QueryWorker(insert_user, self)
+        self.add_worker.loaded.connect(lambda added: self.on_user_added(username, added))
+        self.add_worker.failed.connect(lambda error: self.on_user_added(username, None, error))
+        self.add_worker.start()
+
+    def on_user_added(self, username, added, error=None):
+        self.add_user_btn.setEnabled(True)
+        if error is not None:
+            QMessageBox.critical(self, "Database Error", f"Failed to add user: {error}")
+        elif not added:
+            QMessageBox.warning(self, "Duplicate User",
+                                f"User '{username}' already exists. Please choose a different username.")
+        else:
             QMessageBox.information(self, "Success", f"User '{username}' added successfully!")
             self.new_username_input.clear()
             self.new_password_input.clear()
             self.load_users()
-        except sqlite3.IntegrityError:
-            QMessageBox.warning(self, "Duplicate User",
-                                f"User '{username}' already exists. Please choose a different username.")
-        except sqlite3.Error as e:
-            QMessageBox.critical(self, "Database Error", f"Failed to add user: {str(e)}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"An unexpected error occurred: {str(e)}")
-        finally:
-            if conn:
-                conn.close()
 
     def change_user_password(self, user_id):
-        """Allows changing the password for a selected user."""
+        """Allows changing the password for a selected user; the new one is hashed on a worker thread."""
         new_password, ok = QInputDialog.getText(self, "Change Password", "Enter new password:", QLineEdit.Password)
         if ok and new_password:
-            conn = None
-            try:
-                conn = self.db_connection()
-                cursor = conn.cursor()
-                hashed_password = self.hash_password(new_password)
-                cursor.execute("UPDATE users SET password_hash = ? WHERE id = ?", (hashed_password, user_id))
+            def update_password(conn):
+                hashed_password = hash_password(new_password, load_hash_params(conn))
+                conn.execute("UPDATE users SET password_hash = ? WHERE id = ?", (hashed_password, user_id))
                 conn.commit()
-                QMessageBox.information(self, "Success", "Password changed successfully!")
-            except sqlite3.Error as e:
-                QMessageBox.critical(self, "Database Error", f"Failed to change password: {str(e)}")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"An unexpected error occurred: {str(e)}")
-            finally:
-                if conn:
-                    conn.close()
+
+            self.password_worker = QueryWorker(update_password, self)
+            self.password_worker.loaded.connect(
+                lambda result: QMessageBox.information(self, "Success", "Password changed successfully!"))
+            self.password_worker.failed.connect(
+                lambda error: QMessageBox.critical(self, "Database Error", f"Failed to change password: {error}"))
+            self.password_worker.start()
         elif ok and not new_password:
             QMessageBox.warning(self, "Input Error", "Password cannot be empty.")
 